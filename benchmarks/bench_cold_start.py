@@ -0,0 +1,77 @@
+"""CLIの起動時間のベンチマーク
+
+新しいPythonプロセスでスクレイパーを起動し、以下の時間を計測する。
+
+- import:  scraper モジュールの読み込み時間
+- no_op:   合成ページ（synthetic_pages.py）のアーカイブに対する、新しいセール情報がない実行
+           （--no-fetch、2回目以降の実行。前回から変わっていない場合は解析せずに終了する）
+- reparse: --force-notify で同じアーカイブを解析し直す実行（解析キャッシュあり）
+
+各項目は --repeat 回計測した最短の時間を採用する。ネットワークにはアクセスしない。
+
+実行例:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --shops 3000 --days 30 --json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_pages import write_archive  # noqa: E402
+
+
+def run_command(command, cwd, repeat):
+    """コマンドを repeat 回実行し、最短の経過時間（秒）を返す"""
+    # .envやWebhookの設定が混ざらないように、スクレイパーの設定は環境変数から除く
+    env = {key: value for key, value in os.environ.items() if key != "DISCORD_WEBHOOK_URL"}
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLIの起動時間のベンチマーク")
+    parser.add_argument("--shops", type=int, default=1000, help="1ページあたりの店舗数")
+    parser.add_argument("--days", type=int, default=7, help="アーカイブの日数")
+    parser.add_argument("--repeat", type=int, default=5, help="各項目の計測回数（最短の時間を採用）")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args()
+
+    scraper = [sys.executable, str(SRC_DIR / "scraper.py"), "--no-fetch"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        write_archive(workdir / "data", args.shops, args.days)
+        # 1回目の実行で通知履歴と解析キャッシュを作成する
+        run_command(scraper, workdir, 1)
+
+        result = {
+            "shops": args.shops,
+            "files": args.days,
+            "import": run_command([sys.executable, "-c", "import scraper"], SRC_DIR, args.repeat),
+            "no_op": run_command(scraper, workdir, args.repeat),
+            "reparse": run_command(scraper + ["--force-notify"], workdir, args.repeat)
+        }
+
+    if args.json:
+        print(json.dumps({key: round(value, 4) if isinstance(value, float) else value
+                          for key, value in result.items()}))
+    else:
+        for key in ("import", "no_op", "reparse"):
+            print(f"{key:<8} {result[key]:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""filter_new_sales の重複判定ベンチマーク
+
+履歴件数ごとに以下の3方式で、セール情報が通知済みかどうかを判定する時間を比較する。
+
+- json:   従来方式（JSON履歴を全件読み込んで辞書で判定）
+- sqlite: SQLiteの主キーで1件ずつ判定
+- bloom:  ブルームフィルタで事前判定し、含まれる可能性がある場合のみSQLiteで判定
+
+実行例:
+    python benchmarks/bench_dedup.py
+    python benchmarks/bench_dedup.py --sizes 10000,100000 --queries 5000
+"""
+import sys
+import time
+import json
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from history import JsonHistoryStore, SqliteHistoryStore, BloomFilteredHistoryStore  # noqa: E402
+
+
+def make_sale_id(i):
+    return hashlib.sha256(f"店舗{i}|セール{i}|2025/06/01〜06/05|詳細{i}".encode("utf-8")).hexdigest()
+
+
+def build_history(size):
+    entry = {"notified_at": "2025-06-01T08:00:00", "shop": "店舗", "title": "セール", "date": "2025/06/01〜06/05"}
+    return {make_sale_id(i): entry for i in range(size)}
+
+
+def run_queries(store, query_ids):
+    start = time.perf_counter()
+    new_count = sum(1 for sale_id in query_ids if sale_id not in store)
+    return time.perf_counter() - start, new_count
+
+
+def bench_size(size, num_queries, dup_ratio, workdir):
+    history = build_history(size)
+
+    json_file = workdir / f"history_{size}.json"
+    db_file = workdir / f"history_{size}.db"
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False)
+    store = SqliteHistoryStore(db_file)
+    store.add_many(history)
+    store.close()
+
+    # 事前にブルームフィルタを構築しておく（通常運用では実行ごとに更新される）
+    bloom_store = BloomFilteredHistoryStore(SqliteHistoryStore(db_file))
+    bloom_store.rebuild()
+    bloom_store.close()
+
+    # 通知済み（重複）と新規のセールIDを混ぜる
+    num_dups = int(num_queries * dup_ratio)
+    query_ids = [make_sale_id(i) for i in range(num_dups)]
+    query_ids += [make_sale_id(size + i) for i in range(num_queries - num_dups)]
+    del history
+
+    results = []
+    for name, open_store in (
+        ("json", lambda: JsonHistoryStore(json_file)),
+        ("sqlite", lambda: SqliteHistoryStore(db_file)),
+        ("bloom", lambda: BloomFilteredHistoryStore(SqliteHistoryStore(db_file))),
+    ):
+        start = time.perf_counter()
+        store = open_store()
+        # 初回の判定で履歴やフィルタの読み込みが発生するため、読み込み時間も含めて計測する
+        elapsed, new_count = run_queries(store, query_ids)
+        total = time.perf_counter() - start
+        store.close()
+        results.append({
+            "backend": name,
+            "history_size": size,
+            "queries": num_queries,
+            "new": new_count,
+            "lookup_seconds": round(elapsed, 4),
+            "total_seconds": round(total, 4)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重複判定ベンチマーク")
+    parser.add_argument("--sizes", type=str, default="10000,100000,1000000", help="履歴件数（カンマ区切り）")
+    parser.add_argument("--queries", type=int, default=5000, help="判定するセール情報の件数")
+    parser.add_argument("--dup-ratio", type=float, default=0.1, help="判定するセール情報のうち通知済みの割合")
+    parser.add_argument("--json", action="store_true", help="結果をJSON Lines形式で出力する")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for size in (int(size) for size in args.sizes.split(",")):
+            for result in bench_size(size, args.queries, args.dup_ratio, workdir):
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print(f"{result['backend']:>6} history={result['history_size']:>8} "
+                          f"queries={result['queries']} new={result['new']} "
+                          f"lookup={result['lookup_seconds']:.4f}s total={result['total_seconds']:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
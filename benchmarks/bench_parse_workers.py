@@ -0,0 +1,94 @@
+"""HTMLファイルの並列解析（--workers）のスケーリングベンチマーク
+
+合成ページ（synthetic_pages.py）でN店舗×M日分のアーカイブを作り、
+解析プロセス数を1からNまで変えて、解析キャッシュなしで全ファイルを解析する時間を計測する。
+各プロセス数の結果が1プロセスの結果と一致する（マージの順番が一定である）ことも確認する。
+
+実行例:
+    python benchmarks/bench_parse_workers.py --shops 2000 --days 30
+    python benchmarks/bench_parse_workers.py --workers 1,2,4,8 --parser bs4 --json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scraper import KaldiSaleScraper, PARSER_BACKENDS  # noqa: E402
+from synthetic_pages import write_archive  # noqa: E402
+
+
+def parse_archive(html_dir, workers, parser_backend):
+    scraper = KaldiSaleScraper(
+        html_dir=html_dir,
+        history_file=html_dir / "history.db",
+        use_parse_cache=False,
+        parser_backend=parser_backend,
+        parse_workers=workers
+    )
+    start = time.perf_counter()
+    sales = scraper.parse_html_files()
+    return sales, time.perf_counter() - start
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="HTMLファイルの並列解析のスケーリングベンチマーク")
+    parser.add_argument("--shops", type=int, default=2000, help="1ページあたりの店舗数")
+    parser.add_argument("--days", type=int, default=30, help="アーカイブの日数（解析するファイル数）")
+    parser.add_argument("--workers", type=str, default=",".join(str(n) for n in range(1, cpu_count + 1)),
+                        help=f"計測するプロセス数（カンマ区切り、デフォルト: 1〜{cpu_count}）")
+    parser.add_argument("--parser", type=str, choices=PARSER_BACKENDS, default="lxml", help="解析バックエンド")
+    parser.add_argument("--repeat", type=int, default=3, help="各プロセス数の計測回数（最短の時間を採用）")
+    parser.add_argument("--json", action="store_true", help="結果をJSON Lines形式で出力する")
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        html_dir = Path(tmp)
+        write_archive(html_dir, args.shops, args.days)
+
+        baseline = None
+        baseline_seconds = None
+        for workers in worker_counts:
+            timings = []
+            for _ in range(args.repeat):
+                # スクレイパーの進捗表示は結果と混ざるため表示しない
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sales, elapsed = parse_archive(html_dir, workers, args.parser)
+                timings.append(elapsed)
+            seconds = min(timings)
+
+            if baseline is None:
+                baseline, baseline_seconds = sales, seconds
+            speedup = baseline_seconds / seconds if seconds else 0.0
+            result = {
+                "parser": args.parser,
+                "shops": args.shops,
+                "files": args.days,
+                "workers": workers,
+                "cpu_count": cpu_count,
+                "rows": len(sales),
+                "identical": sales == baseline,
+                "seconds": round(seconds, 4),
+                "speedup": round(speedup, 2),
+                "efficiency": round(speedup / workers, 2)
+            }
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"workers={workers:>2} rows={result['rows']} {result['seconds']:.4f}s "
+                      f"speedup={result['speedup']:.2f}x efficiency={result['efficiency']:.2f} "
+                      f"identical={result['identical']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""スクレイパー処理全体のベンチマーク
+
+合成ページ（synthetic_pages.py）をN店舗×M日分生成し、以下の段階ごとに経過時間を計測する。
+
+- parse:         全スナップショットの解析（--parsers で指定したバックエンドごと、解析キャッシュなし）
+- history_save:  セール情報の半分を通知履歴に保存
+- history_load:  通知履歴の全件読み込み
+- dedup:         全セール情報の通知済み判定（filter_new_sales）
+- format:        通知メッセージの作成とDiscordの文字数上限でのまとめ
+- notify:        スタブWebhookへの送信（--no-notify で省略）
+
+各段階の後にプロセスの最大RSSを記録する（最大RSSは減らないため、段階ごとの増加分が目安になる）。
+結果はJSONで出力でき、実行ごとの結果を比較できる。ネットワークにはアクセスしない。
+
+実行例:
+    python benchmarks/bench_pipeline.py --shops 1000 --days 7
+    python benchmarks/bench_pipeline.py --shops 3000 --days 14 --parsers lxml --output results/bench.json
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import tempfile
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scraper import KaldiSaleScraper, PARSER_BACKENDS  # noqa: E402
+from discord_delivery import pack_messages  # noqa: E402
+from synthetic_pages import write_archive  # noqa: E402
+from stub_webhook import StubWebhookServer  # noqa: E402
+
+# 結果のJSONの形式が変わったら上げる
+RESULT_VERSION = 1
+
+
+def peak_rss_kb():
+    """プロセスの最大RSS（KB、取得できない環境ではNone）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOSはバイト単位、Linuxはキロバイト単位
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StageTimer:
+    """段階ごとの経過時間と最大RSSの記録"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """with文の中の処理を1つの段階として計測する
+
+        Yields:
+            段階の結果を書き込む辞書（処理件数などを追加できる）
+        """
+        result = {}
+        start = time.perf_counter()
+        yield result
+        result["seconds"] = round(time.perf_counter() - start, 4)
+        result["peak_rss_kb"] = peak_rss_kb()
+        self.stages[name] = result
+
+
+def run_benchmark(args, workdir):
+    timer = StageTimer()
+
+    start = time.perf_counter()
+    write_archive(workdir / "html", args.shops, args.days, seed=args.seed)
+    generate_seconds = round(time.perf_counter() - start, 4)
+
+    def make_scraper(parser_backend="lxml", webhook_url=None):
+        return KaldiSaleScraper(
+            html_dir=workdir / "html",
+            history_file=workdir / f"history{args.history_suffix}",
+            use_parse_cache=False,
+            parser_backend=parser_backend,
+            webhook_url=webhook_url
+        )
+
+    sales = None
+    for backend in args.parsers:
+        scraper = make_scraper(backend)
+        with timer.stage(f"parse_{backend}") as result:
+            parsed = scraper.parse_html_files()
+            result["items"] = len(parsed)
+        sales = sales or parsed
+    del parsed
+
+    # 通知履歴は毎回新しいスクレイパーで開き、読み込み時間を段階ごとに分けて計測する
+    half = sales[:len(sales) // 2]
+    scraper = make_scraper()
+    with timer.stage("history_save") as result:
+        scraper.update_notification_history(half)
+        result["items"] = len(half)
+    scraper.history_store.close()
+
+    scraper = make_scraper()
+    with timer.stage("history_load") as result:
+        result["items"] = len(scraper.load_notification_history())
+    scraper.history_store.close()
+
+    scraper = make_scraper()
+    with timer.stage("dedup") as result:
+        new_sales = scraper.filter_new_sales(sales)
+        result["items"] = len(sales)
+        result["new"] = len(new_sales)
+    scraper.history_store.close()
+
+    with timer.stage("format") as result:
+        messages = [scraper.format_sale_message(sale) for sale in new_sales]
+        batches = pack_messages(messages)
+        result["items"] = len(messages)
+        result["batches"] = len(batches)
+
+    if not args.no_notify:
+        stub = StubWebhookServer(("127.0.0.1", 0), bucket_size=args.bucket_size,
+                                 reset_after=args.reset_after).start()
+        scraper = make_scraper(webhook_url=stub.url)
+        with timer.stage("notify") as result:
+            result["ok"] = scraper.notify_discord(new_sales)
+            result["items"] = len(new_sales)
+            result["requests"] = stub.requests_count
+            result["rate_limited"] = stub.rate_limited_count
+        stub.shutdown()
+        stub.server_close()
+
+    return {
+        "version": RESULT_VERSION,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "shops": args.shops,
+            "days": args.days,
+            "seed": args.seed,
+            "parsers": args.parsers,
+            "history": args.history_suffix.lstrip("."),
+            "notify": not args.no_notify
+        },
+        "generate_seconds": generate_seconds,
+        "stages": timer.stages,
+        "total_seconds": round(sum(stage["seconds"] for stage in timer.stages.values()), 4),
+        "peak_rss_kb": peak_rss_kb()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スクレイパー処理全体のベンチマーク")
+    parser.add_argument("--shops", type=int, default=1000, help="1ページあたりの店舗数")
+    parser.add_argument("--days", type=int, default=7, help="アーカイブの日数")
+    parser.add_argument("--seed", type=int, default=0, help="合成ページの乱数のシード")
+    parser.add_argument("--parsers", type=str, default=",".join(PARSER_BACKENDS),
+                        help="計測する解析バックエンド（カンマ区切り、最初のバックエンドの結果を後続の段階で使用）")
+    parser.add_argument("--history", type=str, choices=["db", "json"], default="db",
+                        help="通知履歴の形式（db: SQLite、json: 従来のJSON）")
+    parser.add_argument("--no-notify", action="store_true", help="スタブWebhookへの送信を計測しない")
+    parser.add_argument("--bucket-size", type=int, default=5, help="スタブWebhookのレート制限のリクエスト数")
+    parser.add_argument("--reset-after", type=float, default=0.05, help="スタブWebhookのレート制限のリセット秒数")
+    parser.add_argument("--output", type=str, help="結果のJSONを保存するファイルパス（指定しない場合は表示のみ）")
+    parser.add_argument("--json", action="store_true", help="結果をJSON形式で表示する")
+    args = parser.parse_args()
+
+    args.parsers = [backend.strip() for backend in args.parsers.split(",") if backend.strip()]
+    unknown = [backend for backend in args.parsers if backend not in PARSER_BACKENDS]
+    if not args.parsers or unknown:
+        parser.error(f"不明な解析バックエンドです: {', '.join(unknown)}")
+    args.history_suffix = f".{args.history}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # スクレイパーの進捗表示は結果と混ざるため表示しない
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_benchmark(args, Path(tmp))
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    params = result["params"]
+    print(f"shops={params['shops']} days={params['days']} history={params['history']} "
+          f"generate={result['generate_seconds']:.3f}s")
+    for name, stage in result["stages"].items():
+        extra = " ".join(f"{key}={value}" for key, value in stage.items() if key not in ("seconds", "peak_rss_kb"))
+        print(f"{name:>14} {stage['seconds']:>8.4f}s  peak_rss={stage['peak_rss_kb']}KB  {extra}")
+    print(f"{'total':>14} {result['total_seconds']:>8.4f}s  peak_rss={result['peak_rss_kb']}KB")
+    if args.output:
+        print(f"結果を保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
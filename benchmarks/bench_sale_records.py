@@ -0,0 +1,111 @@
+"""セール情報の保持形式（辞書とSale）のベンチマーク
+
+合成ページ（synthetic_pages.py）でN店舗×M日分のアーカイブを作って解析し、
+同じセール情報を以下の2つの形式で保持した場合を比較する。
+
+- dict: 以前の形式。ページごとに文字列が別々のオブジェクトになる辞書
+- sale: Sale（__slots__、文字列はsys.intern、セール期間は解析済み、セールIDはキャッシュ）
+
+計測する項目:
+
+- memory_kb:    セール情報リスト全体が確保したメモリ（tracemalloc）
+- dedup_first:  全セール情報の通知済み判定（filter_new_sales）の1回目の時間
+- dedup_second: 同じセール情報で2回目の時間（Saleはキャッシュ済みのセールIDを使う）
+
+実行例:
+    python benchmarks/bench_sale_records.py --shops 2000 --days 30
+    python benchmarks/bench_sale_records.py --json
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scraper import KaldiSaleScraper  # noqa: E402
+from sale_record import Sale, SALE_FIELDS  # noqa: E402
+from synthetic_pages import write_archive  # noqa: E402
+
+
+def _copy(value):
+    # 解析結果の文字列はページごとに別のオブジェクトになるため、コピーして同じ状態を再現する
+    return value.encode("utf-8").decode("utf-8")
+
+
+def _as_dicts(rows):
+    return [{field: _copy(value) for field, value in zip(SALE_FIELDS, row)} for row in rows]
+
+
+def _as_sales(rows):
+    return [Sale(*(_copy(value) for value in row)) for row in rows]
+
+
+def measure_memory(build, rows):
+    """build(rows) が作成したセール情報リストのメモリ（KB）"""
+    tracemalloc.start()
+    sales = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sales, current // 1024
+
+
+def measure_dedup(scraper, sales):
+    start = time.perf_counter()
+    new_sales = scraper.filter_new_sales(sales)
+    return len(new_sales), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="セール情報の保持形式（辞書とSale）のベンチマーク")
+    parser.add_argument("--shops", type=int, default=2000, help="1ページあたりの店舗数")
+    parser.add_argument("--days", type=int, default=30, help="アーカイブの日数")
+    parser.add_argument("--json", action="store_true", help="結果をJSON Lines形式で出力する")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        html_dir = Path(tmp)
+        write_archive(html_dir, args.shops, args.days)
+        scraper = KaldiSaleScraper(
+            html_dir=html_dir,
+            history_file=html_dir / "history.db",
+            use_parse_cache=False
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            records = scraper.parse_html_files()
+        # 解析結果（intern済みの文字列）が残っているとSaleの計測で共有されるため、文字列をコピーして解放する
+        rows = [tuple(_copy(value) for value in sale.values()) for sale in records]
+        del records
+
+        for name, build in (("dict", _as_dicts), ("sale", _as_sales)):
+            sales, memory_kb = measure_memory(build, rows)
+            new_count, first = measure_dedup(scraper, sales)
+            _, second = measure_dedup(scraper, sales)
+            result = {
+                "format": name,
+                "shops": args.shops,
+                "files": args.days,
+                "rows": len(sales),
+                "new": new_count,
+                "memory_kb": memory_kb,
+                "bytes_per_row": round(memory_kb * 1024 / len(sales)) if sales else 0,
+                "dedup_first": round(first, 4),
+                "dedup_second": round(second, 4)
+            }
+            del sales
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{name:<4} rows={result['rows']} memory={result['memory_kb']}KB "
+                      f"({result['bytes_per_row']}B/row) dedup={result['dedup_first']:.4f}s "
+                      f"dedup(2回目)={result['dedup_second']:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
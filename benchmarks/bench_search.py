@@ -0,0 +1,110 @@
+"""全文検索の索引とキーワード購読のベンチマーク
+
+合成ページ（synthetic_pages.py）でN店舗×M日分のアーカイブを作り、以下を計測する。
+
+- index_build:    全スナップショットの索引への追加（解析を含む）
+- search:         索引を使った検索1回あたりの時間（--queries の平均）
+- scan:           同じ検索を全セール情報の文字列の確認で行った場合の時間
+- route_matcher:  キーワードを購読する通知先（--keyword-subs 件）への振り分け（KeywordMatcher）
+- route_naive:    同じ振り分けを通知先ごとに全キーワードを確認して行った場合の時間
+
+実行例:
+    python benchmarks/bench_search.py --shops 2000 --days 14
+    python benchmarks/bench_search.py --keyword-subs 1000 --json
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scraper import KaldiSaleScraper  # noqa: E402
+from sale_index import sale_text, query_terms  # noqa: E402
+from subscriptions import Subscription, SubscriptionTable  # noqa: E402
+from synthetic_pages import PRODUCTS, DISCOUNTS, write_archive  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全文検索の索引とキーワード購読のベンチマーク")
+    parser.add_argument("--shops", type=int, default=2000, help="1ページあたりの店舗数")
+    parser.add_argument("--days", type=int, default=14, help="アーカイブの日数")
+    parser.add_argument("--queries", type=str, default="コーヒー豆,ワイン 20%OFF,ﾄﾞﾘｯﾌﾟ,輸入菓子 2点目半額",
+                        help="検索語（カンマ区切り）")
+    parser.add_argument("--keyword-subs", type=int, default=200, help="キーワードを購読する通知先の数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args()
+
+    queries = args.queries.split(",")
+    with tempfile.TemporaryDirectory() as tmp:
+        html_dir = Path(tmp)
+        write_archive(html_dir, args.shops, args.days)
+        scraper = KaldiSaleScraper(html_dir=html_dir, history_file=html_dir / "history.db", use_sale_index=True)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            (_, added), build_seconds = timed(scraper.update_sale_index)
+            sales = list(scraper.iter_sales(filter_shops=False))
+
+        search_seconds = 0.0
+        scan_seconds = 0.0
+        for query in queries:
+            found, seconds = timed(lambda: scraper.sale_index.search(query, limit=None))
+            search_seconds += seconds
+            terms = query_terms(query)
+            _, seconds = timed(lambda: [sale for sale in sales if all(term in sale_text(sale) for term in terms)])
+            scan_seconds += seconds
+
+        # 通知先ごとに商品名・割引内容のキーワードを1〜2件購読する
+        keywords = PRODUCTS + DISCOUNTS
+        table = SubscriptionTable(
+            Subscription(f"https://example.invalid/{i}", name=f"sub{i}",
+                         keywords=[keywords[i % len(keywords)], keywords[(i * 7 + 3) % len(keywords)]])
+            for i in range(args.keyword_subs)
+        )
+        latest = sales[-args.shops:]
+        routed, route_seconds = timed(lambda: table.route(latest))
+
+        def route_naive():
+            result = {sub: [] for sub in table.subscriptions}
+            for sale in latest:
+                text = sale_text(sale)
+                for sub in table.subscriptions:
+                    if any(keyword in text for keyword in sub.keywords):
+                        result[sub].append(sale)
+            return result
+
+        naive, naive_seconds = timed(route_naive)
+
+    result = {
+        "shops": args.shops,
+        "files": args.days,
+        "rows": len(sales),
+        "indexed_sales": added,
+        "index_build": round(build_seconds, 4),
+        "search": round(search_seconds / len(queries), 6),
+        "scan": round(scan_seconds / len(queries), 6),
+        "keyword_subs": args.keyword_subs,
+        "route_matcher": round(route_seconds, 4),
+        "route_naive": round(naive_seconds, 4),
+        "route_identical": routed == naive
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for key, value in result.items():
+            print(f"{key:<16} {value}")
+
+
+if __name__ == "__main__":
+    main()
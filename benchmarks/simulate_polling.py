@@ -0,0 +1,140 @@
+"""適応スケジューラー（PollScheduler）のシミュレーション
+
+実際には待たずに、差し替えた時計（FakeClock）で数日分の確認を再現する。
+ページは --changes で指定した日時に更新されるものとし、以下を1日1回8時の実行と比較する。
+
+- polls:       確認回数（unchanged は条件付きリクエストで304になる回数）
+- max_polls:   1日の確認回数の最大値（--budget 以下になる）
+- delay:       ページの更新から検出までの時間（平均・最大）
+
+実行例:
+    python benchmarks/simulate_polling.py
+    python benchmarks/simulate_polling.py --days 7 --budget 24 --starts 2025-06-03 \\
+        --changes 2025-06-02T13:30,2025-06-03T09:10
+"""
+import sys
+import json
+import argparse
+import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from poll_scheduler import PollScheduler  # noqa: E402
+
+
+class FakeClock:
+    """sleep() で進む時計"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+class FakeSite:
+    """指定した日時に更新されるページ（前回の確認から更新されていればTrue）"""
+
+    def __init__(self, clock, changes):
+        self.clock = clock
+        self.changes = sorted(changes)
+        self.seen = 0
+        self.delays = []
+        self.polls = []
+        self.changed_polls = 0
+
+    def poll(self):
+        now = self.clock()
+        self.polls.append(now)
+        changed = False
+        while self.seen < len(self.changes) and self.changes[self.seen] <= now:
+            self.delays.append((now - self.changes[self.seen]).total_seconds())
+            self.seen += 1
+            changed = True
+        self.changed_polls += changed
+        return changed
+
+
+def summarize(site, num_days):
+    per_day = {}
+    for poll_at in site.polls:
+        per_day[poll_at.date()] = per_day.get(poll_at.date(), 0) + 1
+    delays = site.delays
+    return {
+        "polls": len(site.polls),
+        "unchanged": len(site.polls) - site.changed_polls,
+        "max_polls": max(per_day.values()) if per_day else 0,
+        "detected": len(delays),
+        "avg_delay_minutes": round(sum(delays) / len(delays) / 60, 1) if delays else None,
+        "max_delay_minutes": round(max(delays) / 60, 1) if delays else None,
+        "days": num_days
+    }
+
+
+def simulate_adaptive(args, begin, end, changes, starts):
+    clock = FakeClock(begin)
+    site = FakeSite(clock, changes)
+    scheduler = PollScheduler(
+        site.poll,
+        upcoming_starts=lambda: [start for start in starts if start >= clock().date()],
+        clock=clock,
+        min_interval=args.min_interval * 60,
+        max_interval=args.max_interval * 60,
+        daily_budget=args.budget
+    )
+    while clock() < end:
+        clock.sleep(scheduler.tick())
+    return site
+
+
+def simulate_daily(begin, end, changes):
+    clock = FakeClock(begin)
+    site = FakeSite(clock, changes)
+    day = begin.date()
+    while True:
+        clock.now = datetime.datetime.combine(day, datetime.time(8))
+        if clock() >= end:
+            break
+        if clock() >= begin:
+            site.poll()
+        day += datetime.timedelta(days=1)
+    return site
+
+
+def main():
+    parser = argparse.ArgumentParser(description="適応スケジューラーのシミュレーション")
+    parser.add_argument("--begin", type=str, default="2025-06-01", help="開始日")
+    parser.add_argument("--days", type=int, default=7, help="シミュレーションする日数")
+    parser.add_argument("--starts", type=str, default="2025-06-03,2025-06-06",
+                        help="予告のセールの開始日（カンマ区切り）")
+    parser.add_argument("--changes", type=str,
+                        default="2025-06-01T11:20,2025-06-03T00:05,2025-06-04T15:40,2025-06-06T09:30",
+                        help="ページが更新される日時（カンマ区切り）")
+    parser.add_argument("--min-interval", type=int, default=15, help="最短の確認間隔（分）")
+    parser.add_argument("--max-interval", type=int, default=360, help="最長の確認間隔（分）")
+    parser.add_argument("--budget", type=int, default=48, help="1日の確認回数の上限")
+    parser.add_argument("--json", action="store_true", help="結果をJSON Lines形式で出力する")
+    args = parser.parse_args()
+
+    begin = datetime.datetime.fromisoformat(args.begin)
+    end = begin + datetime.timedelta(days=args.days)
+    starts = [datetime.date.fromisoformat(start) for start in args.starts.split(",") if start]
+    changes = [datetime.datetime.fromisoformat(change) for change in args.changes.split(",") if change]
+
+    for name, site in (("daily", simulate_daily(begin, end, changes)),
+                       ("adaptive", simulate_adaptive(args, begin, end, changes, starts))):
+        result = dict(summarize(site, args.days), scheduler=name)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{name:<8} polls={result['polls']} (304: {result['unchanged']}) "
+                  f"max/day={result['max_polls']} detected={result['detected']}/{len(changes)} "
+                  f"delay avg={result['avg_delay_minutes']}min max={result['max_delay_minutes']}min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""ローカル確認用のカルディのセール情報ページのスタブサーバー
+
+/kaldi/articleList?kkw001=YYYY-MM-DD に日付ごとの合成ページ（synthetic_pages.py）を返す。
+ETag / Last-Modified を付けて返し、If-None-Match / If-Modified-Since が一致する場合は304を返す。
+最初の数回は503を返して、再試行の動作を確認できる。
+
+実行例:
+    python benchmarks/stub_kaldi_server.py --port 8766 --fail-first 2
+    python src/scraper.py --fetch-only --force-fetch \\
+        --url "http://127.0.0.1:8766/kaldi/articleList?kkw001=2025-03-10" \\
+        --url "http://127.0.0.1:8766/kaldi/articleList?kkw001=2025-03-11"
+"""
+import sys
+import hashlib
+import argparse
+import datetime
+import threading
+from pathlib import Path
+from email.utils import formatdate
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_pages import generate_page  # noqa: E402
+
+
+class StubKaldiServer(ThreadingHTTPServer):
+    """カルディのセール情報ページのスタブサーバー
+
+    Attributes:
+        pages: 日付（YYYY-MM-DD）: HTML文字列 の辞書（ない日付は合成ページを生成する）
+        requests_count: 受け取ったリクエスト数（503を含む）
+        not_modified_count: 304を返した回数
+        failed_count: 503を返した回数
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, pages=None, num_shops=50, fail_first=0, verbose=False):
+        """
+        初期化
+
+        Args:
+            address: (ホスト, ポート) のタプル（ポート0で空きポートを使用）
+            pages: 日付（YYYY-MM-DD）: HTML文字列 の辞書
+            num_shops: 合成ページの店舗数
+            fail_first: 最初に503を返すリクエスト数
+            verbose: リクエストを表示するかどうか
+        """
+        super().__init__(address, _Handler)
+        self.pages = dict(pages or {})
+        self.num_shops = num_shops
+        self.fail_first = fail_first
+        self.verbose = verbose
+        self.requests_count = 0
+        self.not_modified_count = 0
+        self.failed_count = 0
+        self._last_modified = formatdate(usegmt=True)
+        self._lock = threading.Lock()
+
+    def url_for(self, date):
+        """日付のページのURL（date: datetime.date または YYYY-MM-DD 形式の文字列）"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/kaldi/articleList?account=kaldi&kkw001={date}"
+
+    def set_page(self, date, html):
+        """日付のページを差し替える（ETagとLast-Modifiedも変わる）"""
+        with self._lock:
+            self.pages[str(date)] = html
+            self._last_modified = formatdate(usegmt=True)
+
+    def page(self, date):
+        """日付のページ（HTMLのバイト列, ETag, Last-Modified）"""
+        with self._lock:
+            if date not in self.pages:
+                base_date = datetime.date.fromisoformat(date)
+                self.pages[date] = generate_page(self.num_shops, base_date=base_date)
+            content = self.pages[date].encode("utf-8")
+            return content, f'"{hashlib.sha256(content).hexdigest()[:16]}"', self._last_modified
+
+    def take_request(self):
+        """リクエストを1件数える
+
+        Returns:
+            503を返す場合はFalse
+        """
+        with self._lock:
+            self.requests_count += 1
+            if self.failed_count < self.fail_first:
+                self.failed_count += 1
+                return False
+            return True
+
+    def start(self):
+        """バックグラウンドのスレッドでサーバーを起動"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.server.verbose:
+            print(f"GET {self.path} If-None-Match={self.headers.get('If-None-Match')}")
+
+        if not self.server.take_request():
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        url = urlparse(self.path)
+        dates = parse_qs(url.query).get("kkw001")
+        try:
+            date = datetime.date.fromisoformat(dates[0]).isoformat() if dates else None
+        except ValueError:
+            date = None
+        if url.path != "/kaldi/articleList" or date is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content, etag, last_modified = self.server.page(date)
+        if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == last_modified):
+            with self.server._lock:
+                self.server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="カルディのセール情報ページのスタブサーバー")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--shops", type=int, default=50, help="合成ページの店舗数")
+    parser.add_argument("--fail-first", type=int, default=0, help="最初に503を返すリクエスト数")
+    args = parser.parse_args()
+
+    server = StubKaldiServer((args.host, args.port), num_shops=args.shops, fail_first=args.fail_first,
+                             verbose=True)
+    print(f"スタブサーバーを起動しました: {server.url_for(datetime.date.today())}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
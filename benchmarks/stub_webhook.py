@@ -0,0 +1,132 @@
+"""ローカル確認用のDiscord Webhookスタブサーバー
+
+受け取ったメッセージを記録し、Discordと同じ形式のレート制限ヘッダを返す。
+一定回数ごとに429を返して、再試行の動作を確認できる。
+
+実行例:
+    python benchmarks/stub_webhook.py --port 8765 --bucket-size 5
+    python src/scraper.py --notify --discord-webhook http://127.0.0.1:8765/webhook
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubWebhookServer(ThreadingHTTPServer):
+    """Discord Webhookのスタブサーバー
+
+    Attributes:
+        messages: 受け取ったメッセージ本文のリスト
+        requests_count: 受け取ったリクエスト数（429を含む）
+        rate_limited_count: 429を返した回数
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, bucket_size=5, reset_after=0.05, verbose=False):
+        """
+        初期化
+
+        Args:
+            address: (ホスト, ポート) のタプル（ポート0で空きポートを使用）
+            bucket_size: レート制限のリセットまでに受け付けるリクエスト数
+            reset_after: レート制限がリセットされるまでの秒数
+            verbose: 受け取ったメッセージを表示するかどうか
+        """
+        super().__init__(address, _Handler)
+        self.bucket_size = bucket_size
+        self.reset_after = reset_after
+        self.verbose = verbose
+        self.messages = []
+        self.requests_count = 0
+        self.rate_limited_count = 0
+        self._remaining = bucket_size
+        self._reset_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+    def take_token(self):
+        """レート制限のトークンを1つ消費
+
+        Returns:
+            (受け付けたかどうか, 残り回数, リセットまでの秒数)
+        """
+        with self._lock:
+            self.requests_count += 1
+            now = time.monotonic()
+            if now >= self._reset_at:
+                self._remaining = self.bucket_size
+                self._reset_at = now + self.reset_after
+            reset_after = max(self._reset_at - now, 0.0)
+            if self._remaining <= 0:
+                self.rate_limited_count += 1
+                return False, 0, reset_after
+            self._remaining -= 1
+            return True, self._remaining, reset_after
+
+    def start(self):
+        """バックグラウンドのスレッドでサーバーを起動"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        accepted, remaining, reset_after = self.server.take_token()
+
+        if not accepted:
+            payload = json.dumps({"message": "You are being rate limited.", "retry_after": reset_after,
+                                  "global": False}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", f"{reset_after:.3f}")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        content = json.loads(body or b"{}").get("content", "")
+        with self.server._lock:
+            self.server.messages.append(content)
+        if self.server.verbose:
+            print(content)
+            print("-" * 40)
+
+        self.send_response(204)
+        self.send_header("X-RateLimit-Limit", str(self.server.bucket_size))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset-After", f"{reset_after:.3f}")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discord Webhookスタブサーバー")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bucket-size", type=int, default=5, help="レート制限のリセットまでに受け付けるリクエスト数")
+    parser.add_argument("--reset-after", type=float, default=2.0, help="レート制限がリセットされるまでの秒数")
+    args = parser.parse_args()
+
+    server = StubWebhookServer((args.host, args.port), bucket_size=args.bucket_size,
+                               reset_after=args.reset_after, verbose=True)
+    print(f"スタブWebhookを起動しました: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""ベンチマーク用の合成セールページ生成
+
+カルディのセール情報ページ（table.cz_sp_table）と同じ構造のHTMLを、
+店舗数と日数を指定して生成する。乱数のシードを固定しているため、同じ引数からは常に同じページが生成される。
+
+- 約1/3の店舗は予告（saleicon_f など）、残りは開催中
+- セール期間は生成日を基準にした今後の日付（終了済みとして除外されない）
+- 日ごとに一部の店舗のセール内容が入れ替わる（日をまたいだ重複と新規が混在する）
+
+実行例:
+    python benchmarks/synthetic_pages.py --shops 1000 --days 7 --out ./bench_data
+"""
+import sys
+import random
+import argparse
+import datetime
+from html import escape
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from snapshot_store import SnapshotStore  # noqa: E402
+
+PREFECTURES = ["東京都", "神奈川県", "埼玉県", "千葉県", "大阪府", "愛知県", "福岡県", "北海道"]
+PRODUCTS = ["コーヒー豆", "紅茶", "オリジナルブレンド", "輸入菓子", "ワイン", "調味料", "ドリップバッグ", "パスタ"]
+DISCOUNTS = ["10%OFF", "15%OFF", "20%OFF", "2点目半額", "ポイント2倍"]
+
+# 各店舗のセール内容が入れ替わる間隔（日数）。1日あたり約1/5の店舗が入れ替わる
+CHURN_DAYS = 5
+
+
+def shop_names(num_shops):
+    """合成ページの店舗名リスト（先頭はREADMEの例と同じ実在の店舗名）"""
+    names = ["池袋店", "渋谷店", "新宿店", "立川若葉ケヤキモール店"][:num_shops]
+    names += [f"ベンチ{i:05d}店" for i in range(len(names), num_shops)]
+    return names
+
+
+def _row(shop_id, shop, rng, start):
+    upcoming = shop_id % 3 == 0
+    suffix = "_f" if upcoming else ""
+    status = "予告" if upcoming else "開催中"
+    product = rng.choice(PRODUCTS)
+    discount = rng.choice(DISCOUNTS)
+    end = start + datetime.timedelta(days=rng.randint(2, 10))
+    notes = '<p class="saledetail_notes">※一部対象外の商品があります</p>' if rng.random() < 0.5 else ""
+    prefecture = PREFECTURES[shop_id % len(PREFECTURES)]
+
+    return (
+        "<tr>"
+        '<td aria-label="店舗名、住所など">'
+        f'<span class="saleicon{suffix}">{status}</span>'
+        f'<span class="salename"><a href="/kaldi/detailMap?id={shop_id}">{escape(shop)}</a></span>'
+        f'<span class="saleadress">{prefecture}サンプル市{shop_id}-{shop_id % 30 + 1}</span>'
+        f'<span class="saletitle{suffix}">{product}セール</span>'
+        "</td>"
+        '<td aria-label="セール内容">'
+        f'<p class="saledate{suffix}">{start:%Y/%m/%d}〜{end:%m/%d}</p>'
+        f'<p class="saledetail">{product} {discount} &amp; 店頭ポップをご覧ください</p>'
+        f"{notes}"
+        "</td>"
+        "</tr>\n"
+    )
+
+
+def generate_page(num_shops, day=0, seed=0, base_date=None):
+    """合成セールページを生成
+
+    Args:
+        num_shops: 店舗数
+        day: 何日目のページか（0始まり、日ごとに一部の店舗のセール内容が変わる）
+        seed: 乱数のシード
+        base_date: セール期間の基準日（Noneの場合は今日）
+
+    Returns:
+        HTML文字列
+    """
+    base_date = base_date or datetime.date.today()
+    rows = []
+    for shop_id, shop in enumerate(shop_names(num_shops)):
+        # セール内容が入れ替わった回数（店舗ごとに入れ替わる日がずれる）
+        generation = (day + shop_id % CHURN_DAYS) // CHURN_DAYS
+        rng = random.Random(f"{seed}:{shop_id}:{generation}")
+        start = base_date + datetime.timedelta(days=generation * 3 + rng.randint(0, 3))
+        rows.append(_row(shop_id, shop, rng, start))
+
+    return (
+        '<!DOCTYPE html>\n<html lang="ja"><head><meta charset="utf-8"><title>セール情報 | KALDI</title></head>\n'
+        '<body><div class="content"><table class="cz_sp_table">\n'
+        "<tr><th>店舗名、住所など</th><th>セール内容</th></tr>\n"
+        f"{''.join(rows)}"
+        "</table></div></body></html>\n"
+    )
+
+
+def write_archive(html_dir, num_shops, num_days, seed=0, base_date=None):
+    """M日分の合成ページをスナップショットとして保存
+
+    Args:
+        html_dir: 保存先ディレクトリ（scraperの ./data と同じ構成で、スナップショットは <html_dir>/snapshots に保存する）
+        num_shops: 1ページあたりの店舗数
+        num_days: 日数
+        seed: 乱数のシード
+        base_date: セール期間の基準日（Noneの場合は今日）
+
+    Returns:
+        保存したスナップショットファイルパスのリスト（日付順）
+    """
+    base_date = base_date or datetime.date.today()
+    store = SnapshotStore(Path(html_dir) / "snapshots")
+    paths = []
+    for day in range(num_days):
+        html = generate_page(num_shops, day=day, seed=seed, base_date=base_date)
+        date = (base_date - datetime.timedelta(days=num_days - 1 - day)).strftime("%Y%m%d")
+        path, _ = store.put(html.encode("utf-8"), date, url=f"synthetic://{date}")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成セールページ生成")
+    parser.add_argument("--shops", type=int, default=1000, help="1ページあたりの店舗数")
+    parser.add_argument("--days", type=int, default=7, help="生成する日数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    parser.add_argument("--out", type=str, default="./bench_data", help="保存先ディレクトリ")
+    args = parser.parse_args()
+
+    paths = write_archive(args.out, args.shops, args.days, seed=args.seed)
+    for path in paths:
+        print(f"{path} ({path.stat().st_size} バイト)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,155 @@
-from flask import Flask
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import datetime
 import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
 import schedule
-import time
-import subprocess
+from dotenv import load_dotenv
+from flask import Flask, Response, abort, jsonify, request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+import scraper as kaldi_scraper  # noqa: E402
+from poll_scheduler import PollScheduler  # noqa: E402
 
 app = Flask(__name__)
 
+# スクレイパーは起動時に1回だけ作成し、実行のたびに使い回す
+# （HTTPセッション・解析キャッシュ・通知履歴の接続を維持する）
+load_dotenv()
+SCRAPER_ARGS = kaldi_scraper.parse_args(["--notify"])
+# 適応スケジューラーでは同じ日付のHTMLがあっても条件付きリクエストで確認する（変わっていなければ304）
+POLL_ARGS = kaldi_scraper.parse_args(["--notify", "--force-fetch"])
+scraper = kaldi_scraper.create_scraper(SCRAPER_ARGS)
+
+class SalesCache:
+    """/sales APIのレスポンスキャッシュ
+
+    スクレイパーの実行が終わるたびに最新のスナップショットから全店舗のセール情報を読み込み、
+    全体と店舗ごとのJSON・gzip圧縮済みの本文・ETagを作っておく。
+    リクエスト時はETagの比較と作成済みの本文を返すだけで、ファイルの読み込みや解析は行わない。
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.updated_at = None
+        # 対象店舗の予告のセールの開始日（適応スケジューラーで使用）
+        self.upcoming_starts = []
+
+    @staticmethod
+    def _make_entry(sales):
+        body = json.dumps({"count": len(sales), "sales": [dict(sale) for sale in sales]},
+                          ensure_ascii=False).encode("utf-8")
+        return {
+            "body": body,
+            "gzip": gzip.compress(body),
+            "etag": hashlib.sha256(body).hexdigest()
+        }
+
+    def refresh(self, scraper):
+        sales = list(scraper.iter_sales(latest_only=True, filter_shops=False))
+        by_shop = {}
+        upcoming_starts = set()
+        for sale in sales:
+            by_shop.setdefault(sale["shop"], []).append(sale)
+            if sale.status == "予告" and sale.start and scraper._is_target_shop(sale.shop):
+                upcoming_starts.add(sale.start)
+
+        entries = {None: self._make_entry(sales)}
+        for shop, shop_sales in by_shop.items():
+            entries[shop] = self._make_entry(shop_sales)
+
+        # 参照の差し替えのみで更新する（リクエスト処理中のスレッドには影響しない）
+        self.entries = entries
+        self.upcoming_starts = sorted(upcoming_starts)
+        self.updated_at = datetime.datetime.now().isoformat()
+
+    def get(self, shop=None):
+        return self.entries.get(shop)
+
+
+sales_cache = SalesCache()
+executor = ThreadPoolExecutor(max_workers=1)
+run_lock = threading.Lock()
+last_run = {}
+poll_scheduler = None
+
+
+def _run_job(args=SCRAPER_ARGS):
+    started_at = datetime.datetime.now()
+    start = time.monotonic()
+    scraper.metrics.set("run_in_progress", 1)
+    result = None
+    error = None
+    try:
+        result = kaldi_scraper.run(scraper, args)
+        # HTMLが前回から変わっていない場合はセール情報も変わらない
+        if result["status"] != "unchanged":
+            sales_cache.refresh(scraper)
+    except Exception as e:
+        traceback.print_exc()
+        error = str(e)
+    finally:
+        last_run.clear()
+        last_run.update({
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.datetime.now().isoformat(),
+            "duration_seconds": round(time.monotonic() - start, 3),
+            "result": result,
+            "error": error
+        })
+        scraper.metrics.set("run_in_progress", 0)
+        run_lock.release()
+        print(f"Scraper finished in {last_run['duration_seconds']}s: {result or error}")
+    return result
+
 
 def run_scraper():
+    # 前回の実行が終わっていない場合はスキップする
+    if not run_lock.acquire(blocking=False):
+        print("Previous scraper run is still in progress. Skipping.")
+        return False
     print("Running scraper...")
-    subprocess.run(["python", "src/scraper.py", "--notify"])
+    executor.submit(_run_job)
+    return True
+
+
+def poll_scraper():
+    """適応スケジューラーの確認1回（HTMLが変わった場合はTrue、確認しなかった場合はNone）"""
+    if not run_lock.acquire(blocking=False):
+        print("Previous scraper run is still in progress. Skipping.")
+        return None
+    result = executor.submit(_run_job, POLL_ARGS).result()
+    # 取得の失敗やエラーも変更なしとして間隔を空ける
+    return bool(result) and result["status"] not in ("unchanged", "fetch_failed")
+
+
+def create_poll_scheduler():
+    # 確認の間隔と1日の上限（環境変数 > デフォルト値）
+    return PollScheduler(
+        poll_scraper,
+        upcoming_starts=lambda: sales_cache.upcoming_starts,
+        min_interval=int(os.environ.get("POLL_MIN_INTERVAL_MINUTES", "15")) * 60,
+        max_interval=int(os.environ.get("POLL_MAX_INTERVAL_MINUTES", "360")) * 60,
+        daily_budget=int(os.environ.get("POLL_DAILY_BUDGET", "48")),
+        metrics=scraper.metrics,
+        debug=scraper.debug
+    )
 
 
 def schedule_runner():
+    # 適応スケジューラー（予告のセールの開始日の前後は間隔を短くし、変化がなければ間隔を空ける）
+    global poll_scheduler
+    if os.environ.get("ADAPTIVE_POLLING") == "1":
+        poll_scheduler = create_poll_scheduler()
+        poll_scheduler.run_forever()
+        return
+
     schedule.every().day.at("08:00").do(run_scraper)
     while True:
         schedule.run_pending()
@@ -24,6 +161,70 @@ def status():
     return "Cardi-sale scraper scheduler is running."
 
 
+@app.route("/status")
+def run_status():
+    next_poll_at = poll_scheduler.next_poll_at if poll_scheduler else None
+    return jsonify({
+        "running": run_lock.locked(),
+        "last_run": last_run or None,
+        "next_poll_at": next_poll_at.isoformat() if next_poll_at else None
+    })
+
+
+@app.route("/metrics")
+def metrics():
+    # Prometheusのテキスト形式（スクレイパーの起動以降の累計）
+    return Response(scraper.metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+def _sales_response(entry):
+    if entry is None:
+        abort(404)
+
+    if request.if_none_match.contains(entry["etag"]):
+        response = Response(status=304)
+    elif "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = Response(entry["gzip"], mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(entry["body"], mimetype="application/json")
+
+    response.set_etag(entry["etag"])
+    response.headers["Vary"] = "Accept-Encoding"
+    if sales_cache.updated_at:
+        response.headers["X-Updated-At"] = sales_cache.updated_at
+    return response
+
+
+@app.route("/sales")
+def sales():
+    return _sales_response(sales_cache.get())
+
+
+@app.route("/sales/<shop>")
+def shop_sales(shop):
+    return _sales_response(sales_cache.get(shop))
+
+
+@app.route("/search")
+def search():
+    # /search?q=コーヒー豆&shop=池袋店&limit=50（索引はスクレイパーの実行のたびに更新される）
+    if not scraper.use_sale_index:
+        abort(404)
+    query = request.args.get("q", "")
+    if not query.strip():
+        abort(400)
+    results = scraper.sale_index.search(
+        query,
+        shops=request.args.getlist("shop") or None,
+        limit=request.args.get("limit", 50, type=int)
+    )
+    return jsonify({"query": query, "count": len(results), "sales": results})
+
+
 if __name__ == "__main__":
+    sales_cache.refresh(scraper)
+    if scraper.use_sale_index:
+        scraper.update_sale_index()
     threading.Thread(target=schedule_runner, daemon=True).start()
     app.run(host="0.0.0.0", port=8000)
@@ -0,0 +1,99 @@
+import os
+import math
+import json
+import hashlib
+from pathlib import Path
+
+
+class BloomFilter:
+    """ブルームフィルタ
+
+    「確実に含まれない」か「含まれる可能性がある」かを判定する。
+    偽陽性はあるが偽陰性はない。
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        初期化
+
+        Args:
+            capacity: 想定する要素数
+            error_rate: 想定する偽陽性率
+        """
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.num_bits = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # 128ビットのハッシュを2つに分けてダブルハッシュで位置を求める
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        """要素を追加"""
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        for pos in self._positions(item):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def is_full(self):
+        """想定要素数を超えたかどうか（超えると偽陽性率が上がる）"""
+        return self.count > self.capacity
+
+    def save(self, path, meta=None):
+        """ファイルに保存
+
+        1行目にJSON形式のヘッダ、2行目以降にビット列を書き込む。
+
+        Args:
+            path: 保存先ファイルパス
+            meta: ヘッダに含める追加情報
+        """
+        path = Path(path)
+        header = {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "count": self.count,
+            "meta": meta or {}
+        }
+        tmp_file = path.with_name(path.name + ".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(self.bits)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        """ファイルから読み込む
+
+        Args:
+            path: ファイルパス
+
+        Returns:
+            (BloomFilter, ヘッダの追加情報) のタプル
+        """
+        with open(path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+            bits = bytearray(f.read())
+
+        bloom = cls(header["capacity"], header["error_rate"])
+        if len(bits) != len(bloom.bits) or bloom.num_hashes != header["num_hashes"]:
+            raise ValueError(f"ブルームフィルタファイルが壊れています: {path}")
+        bloom.bits = bits
+        bloom.count = header["count"]
+        return bloom, header.get("meta", {})
@@ -0,0 +1,210 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Metrics
+
+# Discordのメッセージ本文（content）の最大文字数
+DISCORD_CONTENT_LIMIT = 2000
+
+
+def pack_messages(messages, limit=DISCORD_CONTENT_LIMIT, separator="\n"):
+    """複数のメッセージを上限文字数以内の本文にまとめる
+
+    メッセージの途中では区切らず、1件で上限を超えるメッセージのみ分割する。
+
+    Args:
+        messages: メッセージのリスト
+        limit: 1回の送信あたりの最大文字数
+        separator: メッセージ間の区切り文字列
+
+    Returns:
+        送信する本文のリスト
+    """
+    batches = []
+    current = ""
+    for message in messages:
+        message = message.strip("\n")
+        # 1件で上限を超える場合は分割
+        while len(message) > limit:
+            if current:
+                batches.append(current)
+                current = ""
+            batches.append(message[:limit])
+            message = message[limit:]
+
+        if not current:
+            current = message
+        elif len(current) + len(separator) + len(message) <= limit:
+            current += separator + message
+        else:
+            batches.append(current)
+            current = message
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+class DiscordDelivery:
+    """Discord Webhookへの一括送信
+
+    複数のセール情報を1通のメッセージにまとめ、HTTPセッションを使い回して送信する。
+    固定の待機時間ではなく、レスポンスの X-RateLimit-* / Retry-After ヘッダに従って待機する。
+    複数のWebhookには並行して送信する。
+    """
+
+    def __init__(self, webhook_urls, session=None, max_workers=4, max_retries=5, timeout=30,
+                 debug=False, sleep=time.sleep, metrics=None):
+        """
+        初期化
+
+        Args:
+            webhook_urls: Discord Webhook URLのリスト
+            session: 使用するrequests.Session（Noneの場合は作成する）
+            max_workers: 並行して送信するWebhookの最大数
+            max_retries: 送信失敗時の最大再試行回数
+            timeout: リクエストのタイムアウト秒数
+            debug: デバッグモードフラグ
+            sleep: 待機に使用する関数
+            metrics: 送信数や待機時間を記録するMetrics（Noneの場合は作成する）
+        """
+        self.webhook_urls = list(webhook_urls)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.debug = debug
+        self.sleep = sleep
+        self.metrics = metrics or Metrics()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+        self.stats = {"sent": 0, "retried": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+        self.metrics.inc(f"notifications_{key}_total")
+
+    def _wait(self, seconds):
+        self.metrics.inc("notify_wait_seconds_total", seconds)
+        self.sleep(seconds)
+
+    def _retry_after(self, response):
+        """429レスポンスから待機秒数を取得"""
+        retry_after = response.headers.get("Retry-After") or response.headers.get("X-RateLimit-Reset-After")
+        if retry_after is None:
+            try:
+                retry_after = response.json().get("retry_after")
+            except ValueError:
+                retry_after = None
+        try:
+            return max(float(retry_after), 0.0)
+        except (TypeError, ValueError):
+            return 1.0
+
+    def _post(self, url, content):
+        """本文を1通送信（レート制限やサーバーエラー時は再試行）
+
+        Returns:
+            送信に成功した場合はTrue
+        """
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(url, json={"content": content}, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                if self.debug:
+                    print(f"Discord通知エラー: {e}")
+                response = None
+            self.metrics.observe("notify_post_seconds", time.perf_counter() - start)
+
+            if response is not None and response.status_code < 300:
+                self._count("sent")
+                # 残り回数が0の場合はリセットまで待機
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    reset_after = response.headers.get("X-RateLimit-Reset-After")
+                    if reset_after:
+                        self._wait(float(reset_after))
+                return True
+
+            if attempt == self.max_retries:
+                break
+
+            if response is not None and response.status_code == 429:
+                wait = self._retry_after(response)
+            elif response is None or response.status_code >= 500:
+                wait = min(2 ** attempt, 30)
+            else:
+                # 4xx（429以外）は再試行しても成功しない
+                if self.debug:
+                    print(f"Discord通知レスポンス: ステータスコード {response.status_code}")
+                break
+
+            if self.debug:
+                status = response.status_code if response is not None else "接続エラー"
+                print(f"Discord通知を再試行します（{status}、{wait:.2f}秒待機）")
+            self._count("retried")
+            self._wait(wait)
+
+        self._count("failed")
+        return False
+
+    def _deliver(self, url, batches):
+        """1つのWebhookにすべての本文を順番に送信
+
+        Returns:
+            送信に成功した本文の数
+        """
+        sent = 0
+        for i, content in enumerate(batches):
+            if self.debug:
+                print(f"Discord通知 {i+1}/{len(batches)}: {len(content)}文字")
+            if self._post(url, content):
+                sent += 1
+        return sent
+
+    def send(self, messages):
+        """メッセージをまとめてすべてのWebhookに送信
+
+        Args:
+            messages: メッセージのリスト
+
+        Returns:
+            すべての本文をすべてのWebhookに送信できた場合はTrue
+        """
+        return self.send_routed({url: messages for url in self.webhook_urls})
+
+    def send_routed(self, messages_by_url):
+        """Webhookごとに異なるメッセージをまとめて送信
+
+        Args:
+            messages_by_url: Webhook URL: メッセージのリスト の辞書
+
+        Returns:
+            すべての本文をすべてのWebhookに送信できた場合はTrue
+        """
+        jobs = [(url, pack_messages(messages)) for url, messages in messages_by_url.items() if messages]
+        if not jobs:
+            return False
+
+        if self.debug:
+            for url, batches in jobs:
+                print(f"Discord通知: {url[:30]}... に{len(batches)}通にまとめて送信します")
+
+        if len(jobs) == 1:
+            results = [self._deliver(*jobs[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+                results = list(executor.map(lambda job: self._deliver(*job), jobs))
+
+        return all(sent == len(batches) for sent, (_, batches) in zip(results, jobs))
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Metrics
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class FetchResult:
+    """1件のURLの取得結果
+
+    Attributes:
+        url: 取得したURL
+        status_code: HTTPステータスコード（接続エラーの場合はNone）
+        content: レスポンス本文のバイト列（304やエラーの場合はNone）
+        text: レスポンス本文の文字列（304やエラーの場合はNone）
+        error: エラー内容（成功した場合はNone）
+    """
+
+    def __init__(self, url, status_code=None, content=None, text=None, error=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.text = text
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+    @property
+    def not_modified(self):
+        return self.status_code == 304
+
+
+class SnapshotFetcher:
+    """複数のURLを並行して取得するフェッチャー
+
+    HTTPセッションを使い回し、同時接続数を制限して取得する。
+    前回のレスポンスの ETag / Last-Modified を保存しておき、
+    If-None-Match / If-Modified-Since を付けた条件付きリクエストを送信する。
+    """
+
+    def __init__(self, state_file=None, max_workers=4, max_retries=3, backoff=1.0, timeout=30,
+                 session=None, debug=False, sleep=time.sleep, metrics=None):
+        """
+        初期化
+
+        Args:
+            state_file: ETag / Last-Modified を保存するJSONファイルパス（Noneの場合は保存しない）
+            max_workers: 同時に取得するURLの最大数
+            max_retries: 取得失敗時の最大再試行回数
+            backoff: 再試行時の待機秒数の基準値（再試行ごとに2倍）
+            timeout: リクエストのタイムアウト秒数
+            session: 使用するrequests.Session（Noneの場合は作成する）
+            debug: デバッグモードフラグ
+            sleep: 待機に使用する関数
+            metrics: 取得時間やバイト数を記録するMetrics（Noneの場合は作成する）
+        """
+        self.state_file = Path(state_file) if state_file else None
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.debug = debug
+        self.sleep = sleep
+        self.metrics = metrics or Metrics()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+        self.session = session
+
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if not self.state_file or not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            if self.debug:
+                print(f"取得状態ファイルの読み込みエラー: {e}")
+            return {}
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        tmp_file = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def forget(self, url):
+        """URLの ETag / Last-Modified を破棄する（次回は条件なしで取得）"""
+        with self._lock:
+            self.state.pop(url, None)
+
+    def _conditional_headers(self, url):
+        with self._lock:
+            state = self.state.get(url, {})
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def fetch(self, url, conditional=True):
+        """URLを1件取得（サーバーエラーや接続エラーの場合は再試行）
+
+        Args:
+            url: 取得するURL
+            conditional: 条件付きリクエストを送信するかどうか
+
+        Returns:
+            FetchResult
+        """
+        headers = self._conditional_headers(url) if conditional else {}
+        if self.debug:
+            print(f"リクエスト送信: {url}")
+            if headers:
+                print(f"条件付きリクエスト: {headers}")
+
+        error = None
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error = e
+                response = None
+            self.metrics.observe("fetch_seconds", time.perf_counter() - start)
+            self.metrics.inc("fetch_requests_total",
+                             status=response.status_code if response is not None else "error")
+
+            if response is not None:
+                if response.status_code == 304:
+                    if self.debug:
+                        print(f"更新なし(304): {url}")
+                    return FetchResult(url, status_code=304)
+
+                if response.status_code == 200:
+                    with self._lock:
+                        self.state[url] = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified")
+                        }
+                    self.metrics.inc("fetch_bytes_total", len(response.content))
+                    if self.debug:
+                        print(f"ステータスコード: {response.status_code}")
+                        print(f"レスポンスヘッダー: {response.headers}")
+                        print(f"HTML長さ: {len(response.content)} バイト")
+                    return FetchResult(url, status_code=200, content=response.content, text=response.text)
+
+                error = requests.exceptions.HTTPError(f"{response.status_code} {response.reason}: {url}")
+                # 429と5xx以外は再試行しても成功しない
+                if response.status_code != 429 and response.status_code < 500:
+                    return FetchResult(url, status_code=response.status_code, error=error)
+
+            if attempt < self.max_retries:
+                wait = self.backoff * (2 ** attempt)
+                if self.debug:
+                    print(f"取得を再試行します（{error}、{wait:.1f}秒待機）")
+                self.metrics.inc("fetch_retries_total")
+                self.sleep(wait)
+
+        status_code = response.status_code if response is not None else None
+        return FetchResult(url, status_code=status_code, error=error)
+
+    def fetch_many(self, urls, conditional=True):
+        """複数のURLを並行して取得
+
+        Args:
+            urls: 取得するURLのリスト
+            conditional: 条件付きリクエストを送信するかどうか
+
+        Returns:
+            URLと同じ順番のFetchResultのリスト
+        """
+        urls = list(urls)
+        if len(urls) == 1:
+            results = [self.fetch(urls[0], conditional)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+                results = list(executor.map(lambda url: self.fetch(url, conditional), urls))
+
+        self._save_state()
+        return results
@@ -0,0 +1,679 @@
+import os
+import json
+import sqlite3
+import datetime
+import contextlib
+from pathlib import Path
+
+from bloom import BloomFilter
+from sale_period import parse_sale_period
+
+
+@contextlib.contextmanager
+def file_lock(lock_file):
+    """ロックファイルによるプロセス間の排他制御
+
+    別のプロセスがロックを取得している場合は解放されるまで待つ。
+
+    Args:
+        lock_file: ロックファイルパス
+    """
+    with open(lock_file, 'a+b') as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def files_signature(paths):
+    """ファイルごとのサイズと更新日時（別のプロセスによる更新の検出用、存在しないファイルは0）
+
+    Args:
+        paths: ファイルパスのリスト
+
+    Returns:
+        {"size": サイズ, "mtime_ns": 更新日時} のリスト
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append({"size": 0, "mtime_ns": 0})
+        else:
+            signature.append({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    return signature
+
+
+def _fsync_dir(path):
+    """ディレクトリのエントリ（ファイルの置き換え）をディスクに反映する（Windowsでは何もしない）"""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class RetentionPolicy:
+    """通知履歴の保持ポリシー
+
+    セール期間の終了日から猶予日数を過ぎた履歴、
+    または通知日時から最大保持日数を過ぎた履歴を期限切れとする。
+    """
+
+    def __init__(self, grace_days=7, max_age_days=365):
+        """
+        初期化
+
+        Args:
+            grace_days: セール終了後に履歴を保持する日数
+            max_age_days: 通知日時から履歴を保持する最大日数（Noneの場合は無制限）
+        """
+        self.grace_days = grace_days
+        self.max_age_days = max_age_days
+
+    def max_age_cutoff(self, now):
+        """この日時より前に通知された履歴は期限切れ（ISO形式の文字列、無制限の場合はNone）"""
+        if self.max_age_days is None:
+            return None
+        return (now - datetime.timedelta(days=self.max_age_days)).isoformat()
+
+    def is_period_ended(self, date_text, today, reference=None):
+        """セール期間が終了し、猶予日数も過ぎているかどうか
+
+        Args:
+            date_text: セール期間の文字列
+            today: 判定する日付
+            reference: 年を補うための基準日（Noneの場合はtoday）
+        """
+        _, end = parse_sale_period(date_text, reference or today)
+        return self.is_end_passed(end, today)
+
+    def is_end_passed(self, end, today):
+        """解析済みのセール終了日から猶予日数を過ぎているかどうか
+
+        Args:
+            end: セール終了日（Noneの場合は終了していないとみなす）
+            today: 判定する日付
+        """
+        if end is None:
+            return False
+        return end + datetime.timedelta(days=self.grace_days) < today
+
+    def is_expired(self, entry, now):
+        """履歴エントリが期限切れかどうか
+
+        Args:
+            entry: 通知情報（notified_at, date を含む辞書）
+            now: 判定する日時
+        """
+        notified_at = entry.get("notified_at", "")
+        cutoff = self.max_age_cutoff(now)
+        if cutoff and notified_at and notified_at < cutoff:
+            return True
+
+        try:
+            reference = datetime.datetime.fromisoformat(notified_at).date()
+        except ValueError:
+            reference = now.date()
+        return self.is_period_ended(entry.get("date", ""), now.date(), reference)
+
+
+class HistoryStore:
+    """通知履歴ストアの基底クラス
+
+    通知済みのセールIDと通知情報（notified_at, shop, title, date）を保存する。
+    """
+
+    def __contains__(self, sale_id):
+        """セールIDが通知済みかどうか"""
+        raise NotImplementedError
+
+    def __len__(self):
+        """保存されている履歴の件数"""
+        raise NotImplementedError
+
+    def add_many(self, entries):
+        """履歴をまとめて追加
+
+        Args:
+            entries: セールID: 通知情報 の辞書
+        """
+        raise NotImplementedError
+
+    def iter_ids(self):
+        """すべてのセールIDを1件ずつ返す"""
+        raise NotImplementedError
+
+    def data_files(self):
+        """履歴を保存しているファイルのリスト（更新の確認用）"""
+        return [self.path]
+
+    def refresh(self):
+        """別のプロセスが追加した履歴を反映する（実行ごとの重複判定の前に呼び出す）"""
+
+    def load_all(self):
+        """すべての履歴を読み込む
+
+        Returns:
+            セールID: 通知情報 の辞書
+        """
+        raise NotImplementedError
+
+    def compact(self, policy, now=None):
+        """期限切れの履歴を削除してストアを書き直す
+
+        Args:
+            policy: RetentionPolicy
+            now: 判定する日時（Noneの場合は現在日時）
+
+        Returns:
+            (削除前の件数, 削除後の件数)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """ストアを閉じる"""
+
+
+class JsonHistoryStore(HistoryStore):
+    """JSONファイルによる通知履歴ストア（従来形式）
+
+    ファイルは最初のアクセス時に1回だけ読み込む。追加した履歴は履歴ファイルを書き直さずに
+    ジャーナル（<履歴ファイル>.journal、1行1件のJSON）の末尾に追記し、
+    ジャーナルが JOURNAL_CHECKPOINT_ENTRIES 件を超えた場合やコンパクション時にまとめて履歴ファイルに反映する。
+
+    - 書き込みはロックファイル（<履歴ファイル>.lock）で排他制御し、同時に実行された別のプロセスの追記を失わない
+    - 履歴ファイルは一時ファイルに書き出してfsyncしてから置き換えるため、途中で停止しても壊れない
+    - 読み込み時は履歴ファイルにジャーナルを再適用する。履歴ファイルの置き換え中に停止した場合は、
+      1つ前の履歴ファイル（<履歴ファイル>.bak）とジャーナルから復元する
+    - 読み込み後に別のプロセスが履歴ファイルやジャーナルを更新した場合は、refresh() と追加時に読み込み直す
+    """
+
+    # ジャーナルをこの件数まで追記したら履歴ファイルに反映する
+    JOURNAL_CHECKPOINT_ENTRIES = 1000
+
+    def __init__(self, path, debug=False):
+        self.path = Path(path)
+        self.journal_file = self.path.with_name(self.path.name + ".journal")
+        self.backup_file = self.path.with_name(self.path.name + ".bak")
+        self.lock_file = self.path.with_name(self.path.name + ".lock")
+        self.debug = debug
+        self._history = None
+        self._journal_entries = 0
+        # 読み込み・書き込みの直後の履歴ファイルとジャーナルのシグネチャ
+        self._signature = None
+
+    def data_files(self):
+        return [self.path, self.journal_file]
+
+    def _read_snapshot(self):
+        """履歴ファイルを読み込む（壊れている場合は1つ前の履歴ファイルを使う）"""
+        for path in (self.path, self.backup_file):
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    history = json.load(f)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                print(f"履歴ファイルが壊れています: {path} ({e})")
+                continue
+            if path != self.path:
+                print(f"1つ前の履歴ファイルとジャーナルから通知履歴を復元します: {path}")
+            return history
+
+        if self.path.exists():
+            # 壊れた履歴を空として扱うと、通知済みのセール情報をすべて再通知してしまう
+            raise ValueError(
+                f"通知履歴を読み込めません: {self.path}（履歴をリセットする場合はファイルを削除してください）"
+            )
+        return {}
+
+    def _replay_journal(self, history):
+        """ジャーナルの履歴を適用する
+
+        Returns:
+            適用した件数
+        """
+        if not self.journal_file.exists():
+            return 0
+
+        count = 0
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 追記の途中で停止した行は読み飛ばす
+                    if self.debug:
+                        print(f"ジャーナルの不完全な行を読み飛ばします: {line[:80]!r}")
+                    continue
+                history[record.pop("sale_id")] = record
+                count += 1
+        return count
+
+    def _read(self):
+        """履歴ファイルとジャーナルから現在の通知履歴を読み込む（ロックを取得してから呼び出す）"""
+        history = self._read_snapshot()
+        self._journal_entries = self._replay_journal(history)
+        self._signature = files_signature(self.data_files())
+        return history
+
+    def _is_stale(self):
+        """読み込み後に別のプロセスが履歴ファイルやジャーナルを更新したかどうか"""
+        return files_signature(self.data_files()) != self._signature
+
+    def _load(self):
+        if self._history is not None:
+            return self._history
+
+        if not self.path.exists() and not self.backup_file.exists() and not self.journal_file.exists():
+            if self.debug:
+                print(f"履歴ファイルが存在しません: {self.path}")
+            self._history = {}
+            self._signature = files_signature(self.data_files())
+            return self._history
+
+        with file_lock(self.lock_file):
+            self._history = self._read()
+
+        if self.debug:
+            print(f"通知履歴を読み込みました: {len(self._history)}件（ジャーナル: {self._journal_entries}件）")
+        return self._history
+
+    def _append_journal(self, entries):
+        """ジャーナルの末尾に追記してfsyncする（ロックを取得してから呼び出す）"""
+        with open(self.journal_file, 'ab') as f:
+            # 前回の追記が途中で停止していた場合は、その行と混ざらないように改行する
+            if f.tell() > 0:
+                with open(self.journal_file, 'rb') as last:
+                    last.seek(-1, os.SEEK_END)
+                    if last.read(1) != b"\n":
+                        f.write(b"\n")
+            lines = "".join(
+                json.dumps(dict(entry, sale_id=sale_id), ensure_ascii=False) + "\n"
+                for sale_id, entry in entries.items()
+            )
+            f.write(lines.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_entries += len(entries)
+        self._signature = files_signature(self.data_files())
+
+    def _checkpoint(self, history):
+        """通知履歴を履歴ファイルに書き出し、ジャーナルを空にする（ロックを取得してから呼び出す）
+
+        Args:
+            history: 書き出す通知履歴（ロック中に _read() で読み込んだもの）
+        """
+        tmp_file = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 置き換えの途中で停止した場合は、1つ前の履歴ファイルとジャーナルから復元できる
+        if self.path.exists():
+            os.replace(self.path, self.backup_file)
+        os.replace(tmp_file, self.path)
+        _fsync_dir(self.path.parent)
+
+        # 履歴ファイルに反映したため、ジャーナルを空にする
+        with open(self.journal_file, 'wb') as f:
+            os.fsync(f.fileno())
+        self._journal_entries = 0
+        self._signature = files_signature(self.data_files())
+
+        if self.debug:
+            print(f"通知履歴を保存しました: {len(history)}件")
+
+    def __contains__(self, sale_id):
+        return sale_id in self._load()
+
+    def __len__(self):
+        return len(self._load())
+
+    def add_many(self, entries):
+        history = self._load()
+        if not entries:
+            return
+
+        with file_lock(self.lock_file):
+            if self._is_stale():
+                # 別のプロセスが追記した履歴を読み込み直してから追記する
+                history = self._read()
+            self._append_journal(entries)
+            if self._journal_entries >= self.JOURNAL_CHECKPOINT_ENTRIES:
+                # 別のプロセスが追記した履歴も含めるため、ファイルから読み込み直して反映する
+                history = self._read()
+                self._checkpoint(history)
+        history.update(entries)
+        self._history = history
+
+        if self.debug:
+            print(f"通知履歴を保存しました: {len(entries)}件追加")
+
+    def refresh(self):
+        if self._history is None or not self._is_stale():
+            return
+        with file_lock(self.lock_file):
+            self._history = self._read()
+        if self.debug:
+            print(f"別のプロセスが更新した通知履歴を読み込み直しました: {len(self._history)}件")
+
+    def iter_ids(self):
+        return iter(list(self._load()))
+
+    def load_all(self):
+        return dict(self._load())
+
+    def compact(self, policy, now=None):
+        now = now or datetime.datetime.now()
+        with file_lock(self.lock_file):
+            history = self._read()
+            before = len(history)
+            self._history = {
+                sale_id: entry for sale_id, entry in history.items()
+                if not policy.is_expired(entry, now)
+            }
+            self._checkpoint(self._history)
+
+        return before, len(self._history)
+
+
+class SqliteHistoryStore(HistoryStore):
+    """SQLiteによる通知履歴ストア
+
+    sale_id を主キーにしたテーブルに保存するため、
+    通知済みかどうかの判定で履歴全体を読み込む必要がない。
+    """
+
+    def __init__(self, path, debug=False):
+        self.path = Path(path)
+        self.debug = debug
+        # サーバーではワーカースレッドから使用するため、スレッドの制限を外す（実行は同時に1つのみ）
+        # 同時に実行された別のプロセスが書き込み中の場合は、終わるまで待つ
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS notification_history (
+                    sale_id TEXT PRIMARY KEY,
+                    notified_at TEXT NOT NULL,
+                    shop TEXT NOT NULL DEFAULT '',
+                    title TEXT NOT NULL DEFAULT '',
+                    date TEXT NOT NULL DEFAULT ''
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_notification_history_notified_at "
+                "ON notification_history (notified_at)"
+            )
+
+    def __contains__(self, sale_id):
+        row = self.conn.execute(
+            "SELECT 1 FROM notification_history WHERE sale_id = ?", (sale_id,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM notification_history").fetchone()[0]
+
+    def add_many(self, entries):
+        rows = [
+            (
+                sale_id,
+                entry.get("notified_at", ""),
+                entry.get("shop", ""),
+                entry.get("title", ""),
+                entry.get("date", "")
+            )
+            for sale_id, entry in entries.items()
+        ]
+        # 1トランザクションでまとめて追加
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO notification_history "
+                "(sale_id, notified_at, shop, title, date) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+        if self.debug:
+            print(f"通知履歴を保存しました: {len(rows)}件追加")
+
+    def iter_ids(self):
+        for (sale_id,) in self.conn.execute("SELECT sale_id FROM notification_history"):
+            yield sale_id
+
+    def load_all(self):
+        cursor = self.conn.execute(
+            "SELECT sale_id, notified_at, shop, title, date FROM notification_history"
+        )
+        return {
+            sale_id: {"notified_at": notified_at, "shop": shop, "title": title, "date": date}
+            for sale_id, notified_at, shop, title, date in cursor
+        }
+
+    def compact(self, policy, now=None):
+        now = now or datetime.datetime.now()
+        before = len(self)
+
+        with self.conn:
+            # 最大保持日数はnotified_atのインデックスで削除
+            cutoff = policy.max_age_cutoff(now)
+            if cutoff:
+                self.conn.execute("DELETE FROM notification_history WHERE notified_at < ?", (cutoff,))
+
+            # セール期間は文字列のため1件ずつ判定
+            cursor = self.conn.execute("SELECT sale_id, notified_at, date FROM notification_history")
+            expired = [
+                (sale_id,) for sale_id, notified_at, date in cursor
+                if policy.is_expired({"notified_at": notified_at, "date": date}, now)
+            ]
+            self.conn.executemany("DELETE FROM notification_history WHERE sale_id = ?", expired)
+
+        # 削除した領域を解放してファイルを書き直す
+        self.conn.execute("VACUUM")
+
+        return before, len(self)
+
+    def close(self):
+        self.conn.close()
+
+
+class BloomFilteredHistoryStore(HistoryStore):
+    """ブルームフィルタで事前判定する通知履歴ストア
+
+    履歴ファイルと同じ場所にブルームフィルタのファイル（<履歴ファイル>.bloom）を置き、
+    フィルタに含まれないセールIDは履歴ストアを参照せずに未通知と判定する。
+    フィルタに含まれる可能性がある場合のみ履歴ストアで確認する。
+
+    フィルタには作成元の履歴ファイルのサイズと更新日時（シグネチャ）を記録する。
+    別のプロセスが履歴を追加してシグネチャが変わった場合は、フィルタにそのセールIDが含まれず
+    通知済みのセール情報を未通知と判定してしまうため、refresh() と add_many() で作り直す。
+    フィルタの更新はロックファイル（<履歴ファイル>.bloom.lock）で排他制御する。
+    """
+
+    def __init__(self, store, bloom_file=None, error_rate=0.001, debug=False):
+        """
+        初期化
+
+        Args:
+            store: 確認に使用する履歴ストア
+            bloom_file: ブルームフィルタのファイルパス（Noneの場合は <履歴ファイル>.bloom）
+            error_rate: ブルームフィルタの偽陽性率
+            debug: デバッグモードフラグ
+        """
+        self.store = store
+        self.bloom_file = Path(bloom_file) if bloom_file else store.path.with_name(store.path.name + ".bloom")
+        self.lock_file = self.bloom_file.with_name(self.bloom_file.name + ".lock")
+        self.error_rate = error_rate
+        self.debug = debug
+        self.bloom = None
+        # フィルタの作成元の履歴ファイルのシグネチャ
+        self.bloom_signature = None
+
+    def _store_signature(self):
+        """履歴ファイル（JSON形式ではジャーナルを含む）のサイズと更新日時（フィルタと履歴の同期確認用）"""
+        return files_signature(self.store.data_files())
+
+    def _load_bloom(self):
+        if self.bloom is not None:
+            return self.bloom
+
+        if self.bloom_file.exists():
+            try:
+                bloom, meta = BloomFilter.load(self.bloom_file)
+                signature = self._store_signature()
+                if meta.get("store") == signature:
+                    if self.debug:
+                        print(f"ブルームフィルタを読み込みました: {bloom.count}件")
+                    self.bloom = bloom
+                    self.bloom_signature = signature
+                    return bloom
+                if self.debug:
+                    print("履歴ファイルが更新されているためブルームフィルタを再構築します")
+            except (ValueError, KeyError, IOError) as e:
+                if self.debug:
+                    print(f"ブルームフィルタの読み込みエラー: {e}")
+
+        self.rebuild()
+        return self.bloom
+
+    def _save_bloom(self, signature):
+        """フィルタを保存（signature はフィルタに含まれる履歴のシグネチャ）"""
+        self.bloom.save(self.bloom_file, meta={"store": signature})
+        self.bloom_signature = signature
+
+    def _is_stale(self):
+        """フィルタの作成後に別のプロセスが履歴を更新したかどうか"""
+        return self._store_signature() != self.bloom_signature
+
+    def rebuild(self):
+        """履歴ストアのセールIDからブルームフィルタを作り直す"""
+        # 読み込み中に追加された履歴を含むシグネチャを記録しないように、読み込む前に取得する
+        signature = self._store_signature()
+        count = len(self.store)
+        bloom = BloomFilter(max(count * 2, 10000), self.error_rate)
+        for sale_id in self.store.iter_ids():
+            bloom.add(sale_id)
+        self.bloom = bloom
+        self._save_bloom(signature)
+
+        if self.debug:
+            print(f"ブルームフィルタを構築しました: {count}件")
+
+    def refresh(self):
+        self.store.refresh()
+        if self.bloom is not None and self._is_stale():
+            if self.debug:
+                print("別のプロセスが通知履歴を更新したためブルームフィルタを読み込み直します")
+            # 別のプロセスが保存したフィルタが最新であればそれを使い、なければ作り直す
+            self.bloom = None
+            with file_lock(self.lock_file):
+                self._load_bloom()
+
+    def __contains__(self, sale_id):
+        # フィルタに含まれなければ確実に未通知
+        if sale_id not in self._load_bloom():
+            return False
+        return sale_id in self.store
+
+    def __len__(self):
+        return len(self.store)
+
+    def add_many(self, entries):
+        with file_lock(self.lock_file):
+            self._load_bloom()
+            if self._is_stale():
+                # 別のプロセスが追加した履歴がフィルタに含まれていないため、追加する前に作り直す
+                if self.debug:
+                    print("別のプロセスが通知履歴を更新したためブルームフィルタを再構築します")
+                self.store.refresh()
+                self.rebuild()
+            bloom = self.bloom
+
+            self.store.add_many(entries)
+            for sale_id in entries:
+                bloom.add(sale_id)
+
+            if bloom.is_full():
+                self.rebuild()
+            else:
+                # ロック中に追加したのは entries だけのため、追加後のシグネチャを記録する
+                self._save_bloom(self._store_signature())
+
+    def iter_ids(self):
+        return self.store.iter_ids()
+
+    def load_all(self):
+        return self.store.load_all()
+
+    def compact(self, policy, now=None):
+        with file_lock(self.lock_file):
+            result = self.store.compact(policy, now)
+            # ブルームフィルタは要素を削除できないため作り直す
+            self.rebuild()
+        return result
+
+    def close(self):
+        self.store.close()
+
+
+def open_history_store(path, debug=False, bloom=False):
+    """ファイルの拡張子に応じた通知履歴ストアを開く
+
+    拡張子が .json の場合は従来のJSON形式、それ以外はSQLiteを使用する。
+
+    Args:
+        path: 履歴ファイルパス
+        debug: デバッグモードフラグ
+        bloom: ブルームフィルタで事前判定するかどうか
+
+    Returns:
+        HistoryStore
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        store = JsonHistoryStore(path, debug=debug)
+    else:
+        store = SqliteHistoryStore(path, debug=debug)
+
+    if bloom:
+        return BloomFilteredHistoryStore(store, debug=debug)
+    return store
+
+
+def migrate_json_to_sqlite(json_path, db_path, debug=False):
+    """JSON形式の通知履歴をSQLiteに移行
+
+    Args:
+        json_path: 移行元のJSON履歴ファイルパス
+        db_path: 移行先のSQLiteファイルパス
+        debug: デバッグモードフラグ
+
+    Returns:
+        移行した履歴の件数
+    """
+    history = JsonHistoryStore(json_path, debug=debug).load_all()
+    store = SqliteHistoryStore(db_path, debug=debug)
+    try:
+        store.add_many(history)
+    finally:
+        store.close()
+    return len(history)
@@ -0,0 +1,177 @@
+import io
+
+from lxml import etree
+
+from sale_record import Sale
+
+BASE_URL = "https://map.kaldi.co.jp"
+
+SHOP_CELL_LABEL = "店舗名、住所など"
+DETAIL_CELL_LABEL = "セール内容"
+
+SALE_TABLE_CLASS = "cz_sp_table"
+
+# 店舗名のリンク（CSSセレクタ "span.salename a" と同等）
+_SHOP_NAME = etree.XPath(
+    "(.//span[contains(concat(' ', normalize-space(@class), ' '), ' salename ')]//a)[1]"
+)
+
+# 各セルで取得する要素（タグ名, クラス名）
+_SHOP_CELL_TARGETS = {
+    ("span", "saleadress"),
+    ("span", "saleicon"),
+    ("span", "saleicon_f"),
+    ("span", "saletitle"),
+    ("span", "saletitle_f"),
+}
+_DETAIL_CELL_TARGETS = {
+    ("p", "saledate"),
+    ("p", "saledate_f"),
+    ("p", "saledetail"),
+    ("p", "saledetail_notes"),
+}
+
+
+# BeautifulSoupの .text が含めない要素（要素内の文字列は除き、要素の後の文字列は含める）
+_SKIPPED_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+
+def _iter_text(elem):
+    if elem.tag not in _SKIPPED_TEXT_TAGS:
+        # コメントなどの文字列は含めない
+        if isinstance(elem.tag, str) and elem.text:
+            yield elem.text
+        for child in elem:
+            yield from _iter_text(child)
+            if child.tail:
+                yield child.tail
+
+
+def _text(elem):
+    """BeautifulSoupの .text.strip() と同じ結果を返す"""
+    if elem is None:
+        return ""
+    return "".join(_iter_text(elem)).strip()
+
+
+def _collect(cell, targets):
+    """セル内の要素を1回だけ走査し、(タグ名, クラス名) ごとに最初の要素を集める"""
+    found = {}
+    for elem in cell.iter("span", "p"):
+        for class_name in (elem.get("class") or "").split():
+            key = (elem.tag, class_name)
+            if key in targets and key not in found:
+                found[key] = elem
+    return found
+
+
+def _find_cells(row):
+    """行内の店舗セルとセール内容セルを取得"""
+    shop_cell = None
+    detail_cell = None
+    has_td = False
+    for td in row.iter("td"):
+        has_td = True
+        label = td.get("aria-label")
+        if shop_cell is None and label == SHOP_CELL_LABEL:
+            shop_cell = td
+        elif detail_cell is None and label == DETAIL_CELL_LABEL:
+            detail_cell = td
+    return has_td, shop_cell, detail_cell
+
+
+def extract_sale(row, shop_filter=None):
+    """テーブル行1件からセール情報を抽出
+
+    Args:
+        row: lxmlの<tr>要素
+        shop_filter: 店舗名を受け取り対象かどうかを返す関数（Noneの場合は全店舗）
+
+    Returns:
+        Sale、または対象外の行の場合はNone
+    """
+    has_td, shop_cell, detail_cell = _find_cells(row)
+    if not has_td or shop_cell is None or detail_cell is None:
+        return None
+
+    shop_name_elems = _SHOP_NAME(shop_cell)
+    if not shop_name_elems:
+        return None
+
+    # 対象外の店舗は他の要素を取り出す前に除外
+    shop_name_elem = shop_name_elems[0]
+    shop_name = _text(shop_name_elem)
+    if shop_filter and not shop_filter(shop_name):
+        return None
+
+    href = shop_name_elem.get("href")
+    shop = _collect(shop_cell, _SHOP_CELL_TARGETS)
+    detail = _collect(detail_cell, _DETAIL_CELL_TARGETS)
+
+    def first(found, *keys):
+        for key in keys:
+            if key in found:
+                return found[key]
+        return None
+
+    return Sale(
+        shop=shop_name,
+        address=_text(shop.get(("span", "saleadress"))),
+        status=_text(first(shop, ("span", "saleicon"), ("span", "saleicon_f"))),
+        title=_text(first(shop, ("span", "saletitle"), ("span", "saletitle_f"))),
+        date=_text(first(detail, ("p", "saledate"), ("p", "saledate_f"))),
+        detail=_text(detail.get(("p", "saledetail"))),
+        notes=_text(detail.get(("p", "saledetail_notes"))),
+        url=BASE_URL + href if href is not None else ""
+    )
+
+
+def _in_sale_table(row):
+    """行がセール情報テーブル（table.cz_sp_table）内にあるか判定"""
+    for table in row.iterancestors("table"):
+        if SALE_TABLE_CLASS in (table.get("class") or "").split():
+            return True
+    return False
+
+
+def iter_sales(source, shop_filter=None):
+    """HTMLを逐次解析し、セール情報を1行ずつ返す（lxml版）
+
+    <tr>の終了タグごとにセール情報を抽出し、処理済みの行は木から削除するため、
+    メモリ使用量はファイル全体ではなく1行分に収まる。
+
+    Args:
+        source: HTMLファイルパス、またはバイナリモードのファイルオブジェクト
+        shop_filter: 店舗名を受け取り対象かどうかを返す関数（Noneの場合は全店舗）
+
+    Yields:
+        Sale
+    """
+    events = etree.iterparse(source, events=("end",), tag="tr", html=True, encoding="utf-8")
+    for _, row in events:
+        sale = extract_sale(row, shop_filter) if _in_sale_table(row) else None
+
+        # 処理済みの行と、それより前の兄弟要素を解放
+        row.clear()
+        parent = row.getparent()
+        if parent is not None:
+            while row.getprevious() is not None:
+                del parent[0]
+
+        if sale is not None:
+            yield sale
+
+
+def extract_sales(content, shop_filter=None):
+    """HTMLからカルディのセール情報を抽出（lxml版）
+
+    KaldiSaleScraper._extract_sales_info（BeautifulSoup版）と同じ結果を返す。
+
+    Args:
+        content: HTMLのバイト列
+        shop_filter: 店舗名を受け取り対象かどうかを返す関数（Noneの場合は全店舗）
+
+    Returns:
+        Saleのリスト
+    """
+    return list(iter_sales(io.BytesIO(content), shop_filter))
@@ -0,0 +1,132 @@
+import time
+import threading
+import contextlib
+
+# 計測値の名前: (種類, 説明)
+# 名前にはPrometheusの形式で出力する際に "kaldi_" が付く
+METRICS = {
+    "runs_total": ("counter", "スクレイパーの実行回数（status: 実行結果）"),
+    "run_seconds": ("summary", "スクレイパー1回の実行時間"),
+    "run_in_progress": ("gauge", "スクレイパーを実行中かどうか"),
+    "stage_seconds": ("summary", "実行中の段階ごとの経過時間（stage: fetch, process, history, notify, index）"),
+    "fetch_requests_total": ("counter", "HTMLの取得リクエスト数（status: HTTPステータスコード、接続エラーはerror）"),
+    "fetch_retries_total": ("counter", "HTMLの取得の再試行回数"),
+    "fetch_seconds": ("summary", "HTMLの取得リクエスト1件あたりの時間"),
+    "fetch_bytes_total": ("counter", "取得したHTMLのバイト数"),
+    "files_parsed_total": ("counter", "解析したHTMLファイル数（backend: 解析バックエンド）"),
+    "parse_seconds": ("summary", "HTMLファイル1件あたりの解析時間（backend: 解析バックエンド）"),
+    "rows_parsed_total": ("counter", "HTMLから抽出したセール情報の件数（backend: 解析バックエンド）"),
+    "parse_cache_hits_total": ("counter", "解析キャッシュを使用したHTMLファイル数"),
+    "history_entries": ("gauge", "通知履歴の件数"),
+    "history_open_seconds": ("summary", "通知履歴ストアを開く時間（移行を含む）"),
+    "history_load_seconds": ("summary", "通知履歴の全件読み込み時間"),
+    "history_save_seconds": ("summary", "通知履歴の保存時間"),
+    "history_lookup_seconds": ("summary", "通知済みかどうかの判定時間（1回の実行の合計）"),
+    "dedup_checked_total": ("counter", "通知済みかどうかを判定したセール情報の件数"),
+    "dedup_new_total": ("counter", "未通知と判定したセール情報の件数"),
+    "diff_changes_total": ("counter", "前回のスナップショットからの変更の件数（kind: added, changed, status_changed, ended）"),
+    "notifications_sent_total": ("counter", "Discordに送信したメッセージ数"),
+    "notifications_retried_total": ("counter", "Discordへの送信の再試行回数"),
+    "notifications_failed_total": ("counter", "Discordへの送信に失敗したメッセージ数"),
+    "notify_post_seconds": ("summary", "Discordへの送信リクエスト1件あたりの時間"),
+    "notify_wait_seconds_total": ("counter", "Discordのレート制限や再試行で待機した時間"),
+    "polls_total": ("counter", "適応スケジューラーの確認回数（result: changed, unchanged, skipped）"),
+}
+
+PREFIX = "kaldi_"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics:
+    """カウンタ・ゲージ・タイマーの計測値
+
+    計測値はメモリ上に保持するだけで、外部のライブラリやサーバーは使用しない。
+    複数のスレッド（並行取得・並行送信）から更新できる。
+    名前は METRICS に定義したものを使用する。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (名前, ラベルのタプル) -> 値（summaryは [件数, 合計]）
+        self._values = {}
+
+    @staticmethod
+    def _key(name, labels):
+        if name not in METRICS:
+            raise ValueError(f"未定義の計測値です: {name}")
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        """カウンタを増やす"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """ゲージの値を設定"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, seconds, **labels):
+        """経過時間を1件記録"""
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._values.setdefault(key, [0, 0.0])
+            summary[0] += 1
+            summary[1] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """with文の中の処理の経過時間を記録"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """計測値の一覧
+
+        Returns:
+            名前: [{"labels": ラベルの辞書, "value": 値}] の辞書
+            （summaryの値は {"count": 件数, "sum": 合計秒数}）
+        """
+        with self._lock:
+            items = sorted(self._values.items())
+
+        result = {}
+        for (name, labels), value in items:
+            if METRICS[name][0] == "summary":
+                value = {"count": value[0], "sum": round(value[1], 6)}
+            elif isinstance(value, float):
+                value = round(value, 6)
+            result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return result
+
+    def render_prometheus(self):
+        """Prometheusのテキスト形式で出力
+
+        Returns:
+            /metrics のレスポンス本文
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            if name not in snapshot:
+                continue
+            full_name = PREFIX + name
+            lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for sample in snapshot[name]:
+                labels = ",".join(f'{key}="{_escape(value)}"' for key, value in sample["labels"].items())
+                labels = f"{{{labels}}}" if labels else ""
+                if kind == "summary":
+                    lines.append(f"{full_name}_count{labels} {sample['value']['count']}")
+                    lines.append(f"{full_name}_sum{labels} {sample['value']['sum']}")
+                else:
+                    lines.append(f"{full_name}{labels} {sample['value']}")
+        return "\n".join(lines) + "\n"
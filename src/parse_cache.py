@@ -0,0 +1,176 @@
+import os
+import json
+import sqlite3
+import hashlib
+import datetime
+from pathlib import Path
+
+from sale_record import Sale
+
+# テーブルの形式を変更した場合はこの値を上げる（次回の起動時にキャッシュを作り直す）
+CACHE_FORMAT = 2
+
+
+def file_digest(path):
+    """ファイル内容のSHA256ハッシュを計算
+
+    Args:
+        path: 対象ファイルパス
+
+    Returns:
+        16進数のハッシュ文字列
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_sales(sales):
+    """セール情報リストを保存用のJSON文字列に変換（セール期間は解析済みの日付を保存する）"""
+    return json.dumps([
+        list(record[:8]) + [record[8] and record[8].isoformat(), record[9] and record[9].isoformat()]
+        for record in (sale.to_record() for sale in sales)
+    ], ensure_ascii=False)
+
+
+def _decode_sales(text):
+    """保存用のJSON文字列からセール情報リストを作成（セール期間は解析し直さない）"""
+    fromisoformat = datetime.date.fromisoformat
+    return [
+        Sale.from_record(record[:8] + [record[8] and fromisoformat(record[8]),
+                                       record[9] and fromisoformat(record[9])])
+        for record in json.loads(text)
+    ]
+
+
+class ParseCache:
+    """HTMLファイルごとの解析結果キャッシュ（SQLite）
+
+    ファイルパスと解析バックエンドを主キーにして、サイズ・更新日時・内容ハッシュと
+    _extract_sales_info で抽出したセール情報を1ファイル1行で保存する。
+    参照・登録はファイル単位で行い、キャッシュ全体を読み込んだり書き直したりしない。
+    バックエンドごとに保存するため、--parser を切り替えても別のバックエンドの結果は使わない。
+    抽出ロジックのバージョンが変わった場合はキャッシュ全体を破棄する。
+    """
+
+    def __init__(self, cache_file, extractor_version, parser_backend="lxml", debug=False):
+        """
+        初期化
+
+        Args:
+            cache_file: キャッシュを保存するファイルパス（SQLite）
+            extractor_version: 抽出ロジックのバージョン
+            parser_backend: 解析結果を登録・参照する解析バックエンド
+            debug: デバッグモードフラグ
+        """
+        self.cache_file = Path(cache_file)
+        self.extractor_version = extractor_version
+        self.parser_backend = parser_backend
+        self.debug = debug
+        # サーバーではワーカースレッドから使用するため、スレッドの制限を外す（実行は同時に1つのみ）
+        self.conn = sqlite3.connect(self.cache_file, check_same_thread=False, timeout=30)
+        with self.conn:
+            self._create_tables()
+
+    def _create_tables(self):
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if not row or row[0] != str(CACHE_FORMAT):
+            self.conn.execute("DROP TABLE IF EXISTS files")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT NOT NULL, backend TEXT NOT NULL, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL, sales TEXT NOT NULL, PRIMARY KEY (path, backend))"
+        )
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'extractor_version'").fetchone()
+        if row and row[0] != str(self.extractor_version):
+            if self.debug:
+                print(f"抽出ロジックのバージョンが変わったため解析キャッシュを破棄します: "
+                      f"{row[0]} -> {self.extractor_version}")
+            self.conn.execute("DELETE FROM files")
+        self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              [("format", str(CACHE_FORMAT)), ("extractor_version", str(self.extractor_version))])
+
+    def __contains__(self, html_file):
+        """キャッシュ済みのセール情報が有効かどうか（セール情報は読み込まない）
+
+        サイズと更新日時が一致すれば有効とし、
+        一致しない場合は内容ハッシュを比較する。
+
+        Args:
+            html_file: HTMLファイルパス
+        """
+        row = self.conn.execute("SELECT size, mtime_ns, sha256 FROM files WHERE path = ? AND backend = ?",
+                                (str(html_file), self.parser_backend)).fetchone()
+        if not row:
+            return False
+
+        size, mtime_ns, sha256 = row
+        stat = os.stat(html_file)
+        if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+            return True
+
+        # 更新日時だけが変わった場合（コピーやtouchなど）は内容で判定
+        if size == stat.st_size and sha256 == file_digest(html_file):
+            with self.conn:
+                self.conn.execute("UPDATE files SET mtime_ns = ? WHERE path = ? AND backend = ?",
+                                  (stat.st_mtime_ns, str(html_file), self.parser_backend))
+            return True
+
+        return False
+
+    def get(self, html_file):
+        """キャッシュ済みのセール情報を取得
+
+        Args:
+            html_file: HTMLファイルパス
+
+        Returns:
+            セール情報リスト、またはキャッシュが無効な場合はNone
+        """
+        if html_file not in self:
+            return None
+        row = self.conn.execute("SELECT sales FROM files WHERE path = ? AND backend = ?",
+                                (str(html_file), self.parser_backend)).fetchone()
+        return _decode_sales(row[0]) if row else None
+
+    def put(self, html_file, sales, sha256=None):
+        """セール情報をキャッシュに登録
+
+        Args:
+            html_file: HTMLファイルパス
+            sales: 抽出したセール情報リスト
+            sha256: ファイル内容のハッシュ（Noneの場合は計算する）
+        """
+        stat = os.stat(html_file)
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (path, backend, size, mtime_ns, sha256, sales) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (str(html_file), self.parser_backend, stat.st_size, stat.st_mtime_ns,
+                     sha256 or file_digest(html_file), _encode_sales(sales))
+                )
+        except sqlite3.Error as e:
+            if self.debug:
+                print(f"解析キャッシュの保存エラー: {e}")
+
+    def prune(self, html_files):
+        """存在しなくなったファイルのエントリを削除
+
+        Args:
+            html_files: 現在存在するHTMLファイルパスのリスト
+        """
+        existing = {str(path) for path in html_files}
+        removed = [(path,) for (path,) in self.conn.execute("SELECT DISTINCT path FROM files")
+                   if path not in existing]
+        if removed:
+            with self.conn:
+                self.conn.executemany("DELETE FROM files WHERE path = ?", removed)
+            if self.debug:
+                print(f"解析キャッシュから削除しました: {len(removed)}ファイル")
+
+    def close(self):
+        self.conn.close()
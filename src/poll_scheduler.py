@@ -0,0 +1,162 @@
+import time
+import datetime
+
+from metrics import Metrics
+
+
+class PollScheduler:
+    """セールの開始日に合わせて確認の間隔を変えるスケジューラー
+
+    1日1回の決まった時刻に実行する代わりに、以下の規則で次の確認日時を決める。
+
+    - 予告のセールの開始日の前後（lead_hours 前から window_hours 後まで）は min_interval ごとに確認する
+      （その日の残りの回数が足りない場合は、開始日の前後の終わりまで確認できるように間隔を空ける）
+    - それ以外は、HTMLが変わらなかった回数に応じて間隔を倍にし（min_interval〜max_interval）、
+      HTMLが変わった場合は min_interval に戻す
+    - 1日の確認回数は daily_budget 回までとし、開始日の前後以外はその日の残りの回数で
+      日付が変わるまで確認できるように間隔を空ける
+
+    確認（poll）はHTMLが変わったかどうかを返す関数で、条件付きリクエストを使うため
+    変わっていない場合はほとんどが304になる。
+    現在日時（clock）と待機（sleep）は差し替えられるため、実際に待たずに動作を確認できる。
+    """
+
+    def __init__(self, poll, upcoming_starts=None, clock=None, min_interval=15 * 60,
+                 max_interval=6 * 60 * 60, daily_budget=48, lead_hours=6, window_hours=18,
+                 metrics=None, debug=False):
+        """
+        初期化
+
+        Args:
+            poll: 確認を1回行う関数（HTMLが変わった場合はTrue、変わっていない場合はFalse、
+                  前回の実行中などで確認しなかった場合はNoneを返す）
+            upcoming_starts: 予告のセールの開始日（datetime.date）のリストを返す関数（Noneの場合は使用しない）
+            clock: 現在日時（datetime.datetime）を返す関数（Noneの場合は datetime.datetime.now）
+            min_interval: 最短の確認間隔（秒）
+            max_interval: 最長の確認間隔（秒）
+            daily_budget: 1日の確認回数の上限
+            lead_hours: セールの開始日の何時間前から間隔を短くするか
+            window_hours: セールの開始日の0時から何時間後まで間隔を短くするか
+            metrics: 確認回数を記録するMetrics（Noneの場合は作成する）
+            debug: デバッグモードフラグ
+        """
+        self.poll = poll
+        self.upcoming_starts = upcoming_starts or (lambda: [])
+        self.clock = clock or datetime.datetime.now
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.daily_budget = daily_budget
+        self.lead_hours = lead_hours
+        self.window_hours = window_hours
+        self.metrics = metrics or Metrics()
+        self.debug = debug
+
+        # HTMLが続けて変わらなかった回数
+        self.unchanged_streak = 0
+        # 確認回数を数えている日付と、その日の確認回数
+        self.budget_date = None
+        self.polls_today = 0
+        # 前回確認した日時と、次に確認する日時（Noneの場合はすぐに確認する）
+        self.last_poll_at = None
+        self.next_poll_at = None
+
+    def hot_window_end(self, now):
+        """セールの開始日の前後の場合はその終わりの日時（それ以外はNone）"""
+        end = None
+        for start in self.upcoming_starts():
+            midnight = datetime.datetime.combine(start, datetime.time())
+            window_end = midnight + datetime.timedelta(hours=self.window_hours)
+            if midnight - datetime.timedelta(hours=self.lead_hours) <= now < window_end:
+                end = max(end, window_end) if end else window_end
+        return end
+
+    def is_hot(self, now):
+        """セールの開始日の前後かどうか"""
+        return self.hot_window_end(now) is not None
+
+    def remaining_budget(self, now):
+        """その日の残りの確認回数"""
+        if self.budget_date != now.date():
+            return self.daily_budget
+        return max(self.daily_budget - self.polls_today, 0)
+
+    def next_delay(self, now):
+        """次に確認するまでの秒数
+
+        Args:
+            now: 現在日時
+        """
+        tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        until_tomorrow = (tomorrow - now).total_seconds()
+
+        remaining = self.remaining_budget(now)
+        if remaining <= 0:
+            # その日の上限に達した場合は日付が変わるまで確認しない
+            return until_tomorrow
+
+        hot_end = self.hot_window_end(now)
+        if hot_end is not None:
+            # 残りの回数で開始日の前後の終わり（日付が変わる方が早ければ日付が変わるまで）確認できるようにする
+            until_end = min((hot_end - now).total_seconds(), until_tomorrow)
+            return max(self.min_interval, until_end / remaining)
+
+        # 変わらなかった回数に応じて間隔を倍にする
+        delay = min(self.min_interval * 2 ** min(self.unchanged_streak, 32), self.max_interval)
+        # 残りの回数で日付が変わるまで確認できるように間隔を空ける
+        return max(delay, until_tomorrow / remaining)
+
+    def record(self, now, changed):
+        """確認の結果を記録し、次に確認する日時を決める
+
+        Args:
+            now: 確認した日時
+            changed: HTMLが変わったかどうか（確認しなかった場合はNone）
+        """
+        if changed is None:
+            self.metrics.inc("polls_total", result="skipped")
+            self.next_poll_at = now + datetime.timedelta(seconds=self.min_interval)
+            return
+
+        if self.budget_date != now.date():
+            self.budget_date = now.date()
+            self.polls_today = 0
+        self.polls_today += 1
+        self.last_poll_at = now
+
+        self.metrics.inc("polls_total", result="changed" if changed else "unchanged")
+        self.unchanged_streak = 0 if changed else self.unchanged_streak + 1
+        self.next_poll_at = now + datetime.timedelta(seconds=self.next_delay(now))
+
+        if self.debug:
+            print(f"確認結果: {'変更あり' if changed else '変更なし'}、本日{self.polls_today}回目、"
+                  f"次回: {self.next_poll_at.isoformat(timespec='seconds')}")
+
+    def tick(self):
+        """確認する日時になっていれば1回確認する
+
+        Returns:
+            次に確認するまでの秒数
+        """
+        now = self.clock()
+        # 待機中にセールの開始日の前後に入った場合は、次に確認する日時を決め直す
+        if (self.last_poll_at is not None and self.next_poll_at is not None and now < self.next_poll_at
+                and self.is_hot(now) and not self.is_hot(self.last_poll_at)):
+            self.next_poll_at = min(self.next_poll_at, now + datetime.timedelta(seconds=self.next_delay(now)))
+        if self.next_poll_at is not None and now < self.next_poll_at:
+            return (self.next_poll_at - now).total_seconds()
+
+        if self.remaining_budget(now) <= 0:
+            self.next_poll_at = now + datetime.timedelta(seconds=self.next_delay(now))
+        else:
+            self.record(now, self.poll())
+        return max((self.next_poll_at - self.clock()).total_seconds(), 0)
+
+    def run_forever(self, sleep=time.sleep, max_sleep=60):
+        """確認を繰り返す
+
+        Args:
+            sleep: 待機する関数（秒数を受け取る）
+            max_sleep: 1回に待機する最長の秒数（時刻の変更やセールの予告の追加に追従するため）
+        """
+        while True:
+            sleep(min(self.tick(), max_sleep))
@@ -0,0 +1,229 @@
+import os
+import json
+import datetime
+from pathlib import Path
+
+from sale_period import parse_sale_period
+
+# 比較するセール情報の項目（表示順）
+SALE_FIELDS = ("status", "title", "date", "detail", "notes", "address", "url")
+
+# 通知メッセージに表示する項目名
+FIELD_LABELS = {
+    "status": "状態",
+    "title": "タイトル",
+    "date": "期間",
+    "detail": "内容",
+    "notes": "注意事項",
+    "address": "住所",
+    "url": "URL"
+}
+
+# 変更の種類
+ADDED = "added"
+CHANGED = "changed"
+STATUS_CHANGED = "status_changed"
+ENDED = "ended"
+
+
+class SaleChange:
+    """前回のスナップショットからのセール情報の変更1件
+
+    Attributes:
+        kind: 変更の種類（ADDED, CHANGED, STATUS_CHANGED, ENDED）
+        sale: 今回のセール情報（ENDEDの場合は前回のセール情報）
+        previous: 前回のセール情報（ADDEDの場合はNone）
+        changes: 項目名: (前回の値, 今回の値) の辞書（ADDED・ENDEDの場合は空）
+    """
+
+    def __init__(self, kind, sale, previous=None, changes=None):
+        self.kind = kind
+        self.sale = sale
+        self.previous = previous
+        self.changes = changes or {}
+
+    @property
+    def shop(self):
+        return self.sale.get("shop", "")
+
+    def __repr__(self):
+        return f"SaleChange({self.kind!r}, {self.shop!r}, changes={list(self.changes)})"
+
+
+def _sale_key(sale):
+    return tuple(sale.get(field, "") for field in SALE_FIELDS)
+
+
+def _group_by_shop(sales):
+    groups = {}
+    for sale in sales:
+        groups.setdefault(sale.get("shop", ""), []).append(sale)
+    return groups
+
+
+def _sale_period(sale):
+    """セール情報の (開始日, 終了日)（片方しかない場合は同じ日、解析できない場合は (None, None)）"""
+    if isinstance(sale, dict):
+        start, end = parse_sale_period(sale.get("date", ""))
+    else:
+        # Sale は抽出時に解析済みのセール期間を使う
+        start, end = sale.start, sale.end
+    return start or end, end or start
+
+
+def _periods_overlap(a, b):
+    """2つのセール期間が重なるかどうか（どちらかの期間が不明な場合は重ならないとする）"""
+    if a[0] is None or b[0] is None:
+        return False
+    return a[0] <= b[1] and b[0] <= a[1]
+
+
+def _match_shop(previous, current):
+    """1店舗のセール情報を前回と今回で対応付ける
+
+    同じ内容 -> 同じタイトル -> セール期間が重なるもの（掲載順） の順に対応付ける。
+    タイトルが異なり期間も重ならない場合は、前のセールが終わって次のセールが掲載されたものとして
+    対応付けずに終了・追加とする。
+    同じ内容・同じタイトルは辞書で対応付けるため、件数に比例した時間で終わる
+    （期間の比較は、タイトルも変わった残りのセール情報の間だけで行う）。
+
+    Returns:
+        ((前回, 今回) のリスト, 追加されたセール情報のリスト, 終了したセール情報のリスト)
+    """
+    # ほとんどの店舗は前回・今回とも同じタイトルの1件のため、そのまま対応付ける
+    if (len(previous) == 1 and len(current) == 1
+            and previous[0].get("title", "") == current[0].get("title", "")):
+        return [(previous[0], current[0])], [], []
+
+    pairs = []
+    remaining = current
+
+    for key_of in (_sale_key, lambda sale: sale.get("title", "")):
+        if not previous or not remaining:
+            break
+        index = {}
+        for sale in reversed(previous):
+            index.setdefault(key_of(sale), []).append(sale)
+
+        matched = set()
+        unmatched = []
+        for sale in remaining:
+            candidates = index.get(key_of(sale))
+            if candidates:
+                old = candidates.pop()
+                matched.add(id(old))
+                pairs.append((old, sale))
+            else:
+                unmatched.append(sale)
+        remaining = unmatched
+        previous = [sale for sale in previous if id(sale) not in matched]
+
+    # タイトルも変わった場合は、セール期間が重なるものだけを掲載順で対応付ける
+    added = []
+    if previous and remaining:
+        previous_periods = [_sale_period(sale) for sale in previous]
+        for sale in remaining:
+            period = _sale_period(sale)
+            for i, old_period in enumerate(previous_periods):
+                if _periods_overlap(old_period, period):
+                    pairs.append((previous.pop(i), sale))
+                    del previous_periods[i]
+                    break
+            else:
+                added.append(sale)
+    else:
+        added = remaining
+    return pairs, added, previous
+
+
+def diff_sales(previous, current):
+    """前回と今回のセール情報を店舗ごとに比較
+
+    Args:
+        previous: 前回のスナップショットのセール情報リスト
+        current: 今回のスナップショットのセール情報リスト
+
+    Returns:
+        SaleChangeのリスト（今回の掲載順、終了したセール情報は最後に前回の掲載順）
+    """
+    previous_by_shop = _group_by_shop(previous)
+    # 今回のセール情報のid -> 変更、終了した前回のセール情報のid
+    changed = {}
+    ended = set()
+
+    for shop, current_sales in _group_by_shop(current).items():
+        pairs, added, removed = _match_shop(previous_by_shop.pop(shop, []), current_sales)
+        for sale in added:
+            changed[id(sale)] = SaleChange(ADDED, sale)
+        ended.update(id(sale) for sale in removed)
+
+        for old, new in pairs:
+            if old == new:
+                continue
+            fields = {
+                field: (old.get(field, ""), new.get(field, ""))
+                for field in SALE_FIELDS
+                if old.get(field, "") != new.get(field, "")
+            }
+            if fields:
+                kind = STATUS_CHANGED if "status" in fields else CHANGED
+                changed[id(new)] = SaleChange(kind, new, previous=old, changes=fields)
+
+    for sales in previous_by_shop.values():
+        ended.update(id(sale) for sale in sales)
+
+    changes = [changed[id(sale)] for sale in current if id(sale) in changed]
+    changes.extend(SaleChange(ENDED, sale, previous=sale) for sale in previous if id(sale) in ended)
+    return changes
+
+
+class DiffBaseline:
+    """差分の比較元（前回処理したスナップショットのセール情報）
+
+    比較元は全店舗のセール情報を保存し、対象店舗を変更しても追加・終了と誤判定しないようにする。
+    """
+
+    def __init__(self, baseline_file, debug=False):
+        """
+        初期化
+
+        Args:
+            baseline_file: 比較元を保存するJSONファイルパス
+            debug: デバッグモードフラグ
+        """
+        self.baseline_file = Path(baseline_file)
+        self.debug = debug
+
+    def load(self):
+        """比較元の読み込み
+
+        Returns:
+            (比較元のHTMLファイルパス, セール情報リスト) のタプル。比較元がない場合は (None, None)
+        """
+        if not self.baseline_file.exists():
+            return None, None
+        try:
+            with open(self.baseline_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            if self.debug:
+                print(f"差分の比較元の読み込みエラー: {e}")
+            return None, None
+        return data.get("source"), data.get("sales", [])
+
+    def save(self, source, sales):
+        """比較元の保存
+
+        Args:
+            source: 比較元のHTMLファイルパス
+            sales: 全店舗のセール情報リスト
+        """
+        data = {
+            "source": str(source),
+            "saved_at": datetime.datetime.now().isoformat(),
+            "sales": [dict(sale) for sale in sales]
+        }
+        tmp_file = self.baseline_file.with_name(self.baseline_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.baseline_file)
@@ -0,0 +1,195 @@
+import os
+import csv
+import sys
+import gzip
+import json
+import argparse
+import datetime
+from pathlib import Path
+
+from sale_period import parse_sale_period
+
+# 出力する列を変更した場合はこの値を上げる（既存のパーティションは次回のエクスポートで書き直される）
+EXPORT_SCHEMA_VERSION = 1
+
+EXPORT_COLUMNS = (
+    "snapshot_date", "fetched_at", "source", "sale_id",
+    "shop", "address", "status", "title", "date", "start", "end", "detail", "notes", "url"
+)
+
+# 1回にまとめて書き込む行数
+CHUNK_ROWS = 5000
+
+
+def _normalize_date(value):
+    """日付（date、YYYY-MM-DD、YYYYMMDD）をパーティション名と同じYYYYMMDD形式にする"""
+    if value is None:
+        return None
+    if isinstance(value, datetime.date):
+        return value.strftime("%Y%m%d")
+    return str(value).replace("-", "").replace("/", "")
+
+
+class SaleExporter:
+    """スナップショットごとのセール情報を日付でパーティション分割したgzip圧縮CSVに書き出す
+
+    出力先の構成:
+        <export_dir>/_manifest.json                      スキーマのバージョンと書き出し済みのスナップショット
+        <export_dir>/date=YYYYMMDD/part-<source>.csv.gz  スナップショット1件分のセール情報
+
+    書き出し済みのスナップショットは次回以降書き出さないため、実行のたびに新しいパーティションだけが追加される。
+    """
+
+    def __init__(self, export_dir, debug=False):
+        """
+        初期化
+
+        Args:
+            export_dir: 出力先ディレクトリパス
+            debug: デバッグモードフラグ
+        """
+        self.export_dir = Path(export_dir)
+        self.manifest_file = self.export_dir / "_manifest.json"
+        self.debug = debug
+        os.makedirs(self.export_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        empty = {"schema_version": EXPORT_SCHEMA_VERSION, "columns": list(EXPORT_COLUMNS), "sources": {}}
+        if not self.manifest_file.exists():
+            return empty
+        with open(self.manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("schema_version") != EXPORT_SCHEMA_VERSION:
+            print(f"エクスポートのスキーマが変わったため、すべてのスナップショットを書き出し直します: "
+                  f"{manifest.get('schema_version')} -> {EXPORT_SCHEMA_VERSION}")
+            return empty
+        return manifest
+
+    def save_manifest(self):
+        tmp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def is_exported(self, snapshot_date, source):
+        """スナップショットが書き出し済みかどうか"""
+        return f"{snapshot_date}/{source}" in self.manifest["sources"]
+
+    def write(self, snapshot_date, source, fetched_at, sales, sale_id):
+        """スナップショット1件分のセール情報を書き出す
+
+        セール情報は CHUNK_ROWS 行ずつまとめて書き込むため、ジェネレータも渡せる。
+
+        Args:
+            snapshot_date: スナップショットの日付（YYYYMMDD形式）
+            source: スナップショットの識別子（内容ハッシュまたはファイル名）
+            fetched_at: 取得日時（ISO形式）
+            sales: セール情報のリストまたはイテラブル
+            sale_id: セール情報からセールIDを作る関数（KaldiSaleScraper.generate_sale_id）
+
+        Returns:
+            書き出した行数
+        """
+        partition = self.export_dir / f"date={snapshot_date}"
+        os.makedirs(partition, exist_ok=True)
+        part_file = partition / f"part-{source}.csv.gz"
+        tmp_file = part_file.with_name(part_file.name + ".tmp")
+        reference = datetime.datetime.strptime(snapshot_date, "%Y%m%d").date()
+
+        count = 0
+        with gzip.open(tmp_file, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            chunk = []
+            for sale in sales:
+                start, end = parse_sale_period(sale.get("date", ""), reference)
+                chunk.append((
+                    snapshot_date, fetched_at, source, sale_id(sale),
+                    sale.get("shop", ""), sale.get("address", ""), sale.get("status", ""),
+                    sale.get("title", ""), sale.get("date", ""),
+                    start.isoformat() if start else "", end.isoformat() if end else "",
+                    sale.get("detail", ""), sale.get("notes", ""), sale.get("url", "")
+                ))
+                if len(chunk) >= CHUNK_ROWS:
+                    writer.writerows(chunk)
+                    count += len(chunk)
+                    chunk = []
+            writer.writerows(chunk)
+            count += len(chunk)
+        os.replace(tmp_file, part_file)
+
+        self.manifest["sources"][f"{snapshot_date}/{source}"] = {
+            "file": str(part_file.relative_to(self.export_dir)),
+            "fetched_at": fetched_at,
+            "rows": count,
+            "exported_at": datetime.datetime.now().isoformat()
+        }
+        if self.debug:
+            print(f"エクスポート: {part_file} ({count}行)")
+        return count
+
+
+def query_sales(export_dir, shop=None, date_from=None, date_to=None, contains=None):
+    """エクスポートしたセール情報を条件で絞り込んで1行ずつ返す
+
+    日付の範囲外のパーティションは開かず、対象のファイルも1行ずつ読み込むため、
+    データ全体をメモリに読み込まない。
+
+    Args:
+        export_dir: エクスポート先ディレクトリパス
+        shop: 店舗名（Noneの場合は全店舗）
+        date_from: スナップショットの日付の下限（date、YYYY-MM-DD、YYYYMMDD）
+        date_to: スナップショットの日付の上限（同上）
+        contains: タイトルまたはセール内容に含まれる文字列
+
+    Yields:
+        列名: 値 の辞書
+    """
+    date_from = _normalize_date(date_from)
+    date_to = _normalize_date(date_to)
+
+    for partition in sorted(Path(export_dir).glob("date=*")):
+        snapshot_date = partition.name[len("date="):]
+        if (date_from and snapshot_date < date_from) or (date_to and snapshot_date > date_to):
+            continue
+
+        for part_file in sorted(partition.glob("part-*.csv.gz")):
+            with gzip.open(part_file, "rt", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    if shop and row["shop"] != shop:
+                        continue
+                    if contains and contains not in row["title"] and contains not in row["detail"]:
+                        continue
+                    yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エクスポートしたセール情報の検索")
+    parser.add_argument("--export-dir", type=str, default=os.environ.get("EXPORT_DIR", "./data/export"),
+                        help="エクスポート先ディレクトリ（デフォルト: ./data/export）")
+    parser.add_argument("--shop", type=str, help="店舗名")
+    parser.add_argument("--from", dest="date_from", type=str, help="スナップショットの日付の下限（例: 2025-06-01）")
+    parser.add_argument("--to", dest="date_to", type=str, help="スナップショットの日付の上限（例: 2025-06-30）")
+    parser.add_argument("--contains", type=str, help="タイトルまたはセール内容に含まれる文字列")
+    parser.add_argument("--distinct", action="store_true", help="同じセール（sale_id）は最初の1行だけ出力する")
+    parser.add_argument("--count", action="store_true", help="行を出力せずに件数のみ表示する")
+    args = parser.parse_args()
+
+    rows = query_sales(args.export_dir, shop=args.shop, date_from=args.date_from,
+                       date_to=args.date_to, contains=args.contains)
+    if args.distinct:
+        seen = set()
+        rows = (row for row in rows if not (row["sale_id"] in seen or seen.add(row["sale_id"])))
+
+    if args.count:
+        print(sum(1 for _ in rows))
+        return
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
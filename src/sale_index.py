@@ -0,0 +1,297 @@
+import sqlite3
+import datetime
+import threading
+import unicodedata
+from pathlib import Path
+
+# 文字n-gramの文字数（日本語は単語の区切りがないため、2文字ずつ区切って索引を作る）
+NGRAM = 2
+
+# 索引の対象にするセール情報の項目
+INDEXED_FIELDS = ("title", "detail", "notes")
+
+# 索引の形式やトークン化を変更した場合はこの値を上げる（次回の更新時に索引を作り直す）
+# 2: 追加済みのスナップショットを「日付/内容ハッシュ」で記録する（同じ内容の別の日付も最終掲載日に反映する）
+INDEX_VERSION = 2
+
+
+def normalize(text):
+    """検索用に文字列を正規化（全角英数字・半角カナの統一、小文字化、空白の統一）"""
+    return " ".join(unicodedata.normalize("NFKC", text or "").lower().split())
+
+
+def ngrams(text, n=NGRAM):
+    """正規化済みの文字列の文字n-gramの集合（n文字未満の場合は文字列そのもの）"""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def sale_text(sale):
+    """セール情報の検索対象の文字列（正規化済み）"""
+    return normalize("\n".join(sale.get(field, "") for field in INDEXED_FIELDS))
+
+
+def query_terms(query):
+    """検索語を空白で区切った正規化済みの語のリスト（すべての語を含むセール情報を検索する）"""
+    return normalize(query).split()
+
+
+class KeywordMatcher:
+    """複数のキーワードのうち、文字列に含まれるものを求める
+
+    キーワードの文字n-gram -> キーワード の索引を作っておき、
+    文字列のn-gramから候補のキーワードを絞り込んでから含まれるか確認する。
+    キーワードの数によらず、1件あたりの処理は文字列の長さにほぼ比例する。
+    """
+
+    def __init__(self, keywords):
+        """
+        初期化
+
+        Args:
+            keywords: キーワードのイテラブル
+        """
+        # 正規化したキーワード -> n-gramの数
+        self.gram_counts = {}
+        # n-gram -> キーワードのリスト
+        self.gram_index = {}
+        # n文字未満のキーワード（索引を使わずに確認する）
+        self.short_keywords = set()
+        for keyword in keywords:
+            keyword = normalize(keyword)
+            if not keyword or keyword in self.gram_counts or keyword in self.short_keywords:
+                continue
+            if len(keyword) < NGRAM:
+                self.short_keywords.add(keyword)
+                continue
+            grams = ngrams(keyword)
+            self.gram_counts[keyword] = len(grams)
+            for gram in grams:
+                self.gram_index.setdefault(gram, []).append(keyword)
+
+    def __bool__(self):
+        return bool(self.gram_counts or self.short_keywords)
+
+    def match(self, text):
+        """文字列に含まれるキーワードの集合
+
+        Args:
+            text: 正規化済みの文字列（sale_text() の戻り値など）
+        """
+        counts = {}
+        for gram in ngrams(text):
+            for keyword in self.gram_index.get(gram, ()):
+                counts[keyword] = counts.get(keyword, 0) + 1
+
+        # n-gramがすべて含まれていても順番が違う場合があるため、最後に文字列で確認する
+        matched = {keyword for keyword, count in counts.items()
+                   if count == self.gram_counts[keyword] and keyword in text}
+        matched.update(keyword for keyword in self.short_keywords if keyword in text)
+        return matched
+
+
+class SaleIndex:
+    """セール情報の全文検索用の転置索引（SQLite）
+
+    セール情報（セールID単位）の title・detail・notes を文字n-gramに区切り、
+    n-gram -> セール情報 の対応を保存する。
+    索引に追加したスナップショットを日付ごとに記録し、新しいスナップショットのセール情報だけを追加する。
+    同じ内容のスナップショットが別の日付で取得された場合も、その日付の掲載として最終掲載日と状態を更新する。
+    """
+
+    def __init__(self, path, debug=False):
+        """
+        初期化
+
+        Args:
+            path: 索引ファイルパス（SQLite）
+            debug: デバッグモードフラグ
+        """
+        self.path = Path(path)
+        self.debug = debug
+        # サーバーではリクエスト処理のスレッドからも検索するため、接続を共有してロックで排他制御する
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self.conn:
+            self._create_tables()
+
+    def _create_tables(self):
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row and row[0] != str(INDEX_VERSION):
+            if self.debug:
+                print(f"索引の形式が変わったため作り直します: {row[0]} -> {INDEX_VERSION}")
+            for table in ("sales", "postings", "sources"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sales (
+                doc INTEGER PRIMARY KEY,
+                sale_id TEXT NOT NULL UNIQUE,
+                shop TEXT NOT NULL,
+                status TEXT NOT NULL,
+                title TEXT NOT NULL,
+                date TEXT NOT NULL,
+                detail TEXT NOT NULL,
+                notes TEXT NOT NULL,
+                url TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_shop ON sales (shop)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings (gram TEXT NOT NULL, doc INTEGER NOT NULL, "
+            "PRIMARY KEY (gram, doc)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, snapshot_date TEXT NOT NULL, "
+            "rows INTEGER NOT NULL, indexed_at TEXT NOT NULL)"
+        )
+
+    def is_indexed(self, source):
+        """スナップショットが索引に追加済みかどうか"""
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM sources WHERE source = ?", (source,)).fetchone()
+        return row is not None
+
+    def add_snapshot(self, source, snapshot_date, sales, sale_id):
+        """スナップショット1件分のセール情報を索引に追加
+
+        すでに索引にあるセール情報は、最後に掲載されていた日付と状態だけを更新する（n-gramは登録し直さない）。
+
+        Args:
+            source: スナップショットの識別子（「日付/内容ハッシュ」または「日付/ファイル名」）
+            snapshot_date: スナップショットの日付（YYYYMMDD形式）
+            sales: セール情報のリストまたはイテラブル（全店舗）
+            sale_id: セール情報からセールIDを作る関数（KaldiSaleScraper.generate_sale_id）
+
+        Returns:
+            新しく追加したセール情報の件数
+        """
+        count = 0
+        added = 0
+        with self._lock, self.conn:
+            for sale in sales:
+                count += 1
+                key = sale_id(sale)
+                row = self.conn.execute("SELECT doc, first_seen, last_seen FROM sales WHERE sale_id = ?",
+                                        (key,)).fetchone()
+                if row:
+                    doc, first_seen, last_seen = row
+                    if snapshot_date >= last_seen:
+                        self.conn.execute("UPDATE sales SET status = ?, last_seen = ? WHERE doc = ?",
+                                          (sale.get("status", ""), snapshot_date, doc))
+                    elif snapshot_date < first_seen:
+                        self.conn.execute("UPDATE sales SET first_seen = ? WHERE doc = ?", (snapshot_date, doc))
+                    continue
+
+                cursor = self.conn.execute(
+                    "INSERT INTO sales (sale_id, shop, status, title, date, detail, notes, url, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, sale.get("shop", ""), sale.get("status", ""), sale.get("title", ""),
+                     sale.get("date", ""), sale.get("detail", ""), sale.get("notes", ""),
+                     sale.get("url", ""), snapshot_date, snapshot_date)
+                )
+                doc = cursor.lastrowid
+                self.conn.executemany("INSERT OR IGNORE INTO postings (gram, doc) VALUES (?, ?)",
+                                      ((gram, doc) for gram in ngrams(sale_text(sale))))
+                added += 1
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (source, snapshot_date, rows, indexed_at) VALUES (?, ?, ?, ?)",
+                (source, snapshot_date, count, datetime.datetime.now().isoformat())
+            )
+
+        if self.debug:
+            print(f"索引に追加: {source} ({count}件中{added}件が新規)")
+        return added
+
+    def _docs_for(self, term):
+        """語のn-gramをすべて含むセール情報の番号の集合（候補、Noneの場合は絞り込めない）"""
+        grams = ngrams(term)
+        if len(term) < NGRAM:
+            return None
+
+        docs = None
+        # 件数の少ないn-gramから順に積集合を取る
+        postings = []
+        for gram in grams:
+            rows = self.conn.execute("SELECT doc FROM postings WHERE gram = ?", (gram,)).fetchall()
+            if not rows:
+                return set()
+            postings.append(rows)
+        for rows in sorted(postings, key=len):
+            found = {doc for (doc,) in rows}
+            docs = found if docs is None else docs & found
+            if not docs:
+                break
+        return docs
+
+    def search(self, query, shops=None, limit=50):
+        """検索語をすべて含むセール情報を検索
+
+        n-gramで候補を絞り込んでから、正規化した文字列に検索語が含まれるか確認する。
+
+        Args:
+            query: 検索語（空白区切りで複数指定した場合はすべてを含むもの）
+            shops: 店舗名のリスト（Noneの場合は全店舗）
+            limit: 最大件数（Noneの場合は無制限）
+
+        Returns:
+            セール情報の辞書（shop, status, title, date, detail, notes, url, first_seen, last_seen）のリスト
+            （最後に掲載されていた日付の新しい順）
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            docs = None
+            for term in terms:
+                found = self._docs_for(term)
+                if found is None:
+                    continue
+                docs = found if docs is None else docs & found
+                if not docs:
+                    return []
+
+            columns = "doc, shop, status, title, date, detail, notes, url, first_seen, last_seen"
+            if docs is None:
+                # すべての検索語がn文字未満の場合は全件を確認する
+                rows = self.conn.execute(f"SELECT {columns} FROM sales").fetchall()
+            else:
+                rows = []
+                doc_list = sorted(docs)
+                # SQLiteのパラメータ数の上限を超えないように分けて取得する
+                for i in range(0, len(doc_list), 500):
+                    chunk = doc_list[i:i + 500]
+                    rows.extend(self.conn.execute(
+                        f"SELECT {columns} FROM sales WHERE doc IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+
+        shops = set(shops) if shops else None
+        results = []
+        for row in rows:
+            sale = dict(zip(("shop", "status", "title", "date", "detail", "notes", "url",
+                             "first_seen", "last_seen"), row[1:]))
+            if shops and sale["shop"] not in shops:
+                continue
+            text = sale_text(sale)
+            if all(term in text for term in terms):
+                results.append(sale)
+
+        results.sort(key=lambda sale: (sale["last_seen"], sale["shop"]), reverse=True)
+        return results[:limit] if limit else results
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
@@ -0,0 +1,72 @@
+import re
+import datetime
+
+# 「2025/06/01」「2025年6月1日」「6/1」「06月01日」などの日付表記
+_DATE_PATTERN = re.compile(
+    r"(?:(\d{4})\s*[年/.\-]\s*)?(\d{1,2})\s*[月/.\-]\s*(\d{1,2})\s*日?"
+)
+
+
+def _closest_year(month, day, reference):
+    """年の記載がない日付について、基準日に最も近い年を選ぶ"""
+    candidates = []
+    for year in (reference.year - 1, reference.year, reference.year + 1):
+        try:
+            candidates.append(datetime.date(year, month, day))
+        except ValueError:
+            continue
+    if not candidates:
+        return None
+    return min(candidates, key=lambda date: abs((date - reference).days))
+
+
+def parse_sale_period(text, reference=None):
+    """セール期間の文字列から開始日と終了日を取り出す
+
+    例: "2025/06/01〜06/05" -> (2025-06-01, 2025-06-05)
+
+    年が省略されている場合は基準日に最も近い年とみなし、
+    終了日の年が省略されている場合は開始日以降になるように補う。
+
+    Args:
+        text: セール期間の文字列
+        reference: 年を補うための基準日（Noneの場合は今日）
+
+    Returns:
+        (開始日, 終了日) のタプル。解析できない場合は (None, None)
+    """
+    if not text:
+        return None, None
+
+    reference = reference or datetime.date.today()
+    dates = []
+    for match in _DATE_PATTERN.finditer(text):
+        year, month, day = match.groups()
+        month, day = int(month), int(day)
+        if year:
+            try:
+                date = datetime.date(int(year), month, day)
+            except ValueError:
+                continue
+        elif dates:
+            # 終了日は開始日の年を基準にし、開始日より前なら翌年とみなす
+            try:
+                date = datetime.date(dates[0].year, month, day)
+            except ValueError:
+                continue
+            if date < dates[0]:
+                try:
+                    date = datetime.date(dates[0].year + 1, month, day)
+                except ValueError:
+                    continue
+        else:
+            date = _closest_year(month, day, reference)
+            if date is None:
+                continue
+        dates.append(date)
+        if len(dates) == 2:
+            break
+
+    if not dates:
+        return None, None
+    return dates[0], dates[-1]
@@ -0,0 +1,117 @@
+import sys
+import hashlib
+
+from sale_period import parse_sale_period
+
+# セール情報の項目（辞書として扱う場合のキーの順番）
+SALE_FIELDS = ("shop", "address", "status", "title", "date", "detail", "notes", "url")
+_FIELD_SET = frozenset(SALE_FIELDS)
+
+
+class Sale:
+    """セール情報1件
+
+    辞書の代わりに __slots__ のクラスで保持し、1件あたりのメモリを減らす。
+    文字列は sys.intern で共有するため、日付ごとのスナップショットに同じ店舗・同じセールが
+    繰り返し現れても文字列は1つだけになる。
+    セール期間（start / end）は作成時に1回だけ解析し、セールIDは最初に参照した時に1回だけ計算する。
+
+    format_sale_message や通知履歴など、辞書を前提とした処理のために
+    sale["shop"]、sale.get("shop")、dict(sale) などの辞書と同じ操作に対応する。
+    作成後に値を変更しないこと（セールIDがキャッシュされるため）。
+    """
+
+    __slots__ = SALE_FIELDS + ("start", "end", "_sale_id")
+
+    def __init__(self, shop="", address="", status="", title="", date="", detail="", notes="", url="",
+                 start=None, end=None, reference=None):
+        """
+        初期化
+
+        Args:
+            shop〜url: セール情報の各項目の文字列
+            start: セール開始日（startとendの両方がNoneの場合はdateから解析する）
+            end: セール終了日
+            reference: セール期間の年を補うための基準日（Noneの場合は今日）
+        """
+        intern = sys.intern
+        self.shop = intern(shop)
+        self.address = intern(address)
+        self.status = intern(status)
+        self.title = intern(title)
+        self.date = intern(date)
+        self.detail = intern(detail)
+        self.notes = intern(notes)
+        self.url = intern(url)
+        if start is None and end is None:
+            start, end = parse_sale_period(date, reference)
+        self.start = start
+        self.end = end
+        self._sale_id = None
+
+    @classmethod
+    def from_dict(cls, data, reference=None):
+        """辞書からセール情報を作成"""
+        return cls(*(data.get(field, "") for field in SALE_FIELDS), reference=reference)
+
+    @classmethod
+    def from_record(cls, record):
+        """to_record() のタプルからセール情報を作成（セール期間は解析し直さない）"""
+        return cls(*record)
+
+    def to_record(self):
+        """プロセス間の受け渡し用のタプル（SALE_FIELDS の順の文字列と start, end）"""
+        return (self.shop, self.address, self.status, self.title, self.date,
+                self.detail, self.notes, self.url, self.start, self.end)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in SALE_FIELDS}
+
+    @property
+    def sale_id(self):
+        """セールのユニークID（KaldiSaleScraper.generate_sale_id と同じ値）"""
+        if self._sale_id is None:
+            key = "|".join((self.shop, self.title, self.date, self.detail))
+            self._sale_id = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self._sale_id
+
+    # 辞書と同じ操作
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in _FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def __iter__(self):
+        return iter(SALE_FIELDS)
+
+    def __len__(self):
+        return len(SALE_FIELDS)
+
+    def keys(self):
+        return SALE_FIELDS
+
+    def values(self):
+        return tuple(getattr(self, field) for field in SALE_FIELDS)
+
+    def items(self):
+        return tuple((field, getattr(self, field)) for field in SALE_FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Sale):
+            return self.values() == other.values()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Sale({self.to_dict()!r})"
@@ -1,48 +1,142 @@
 import os
 import re
 import json
+import time
 import hashlib
 import datetime
 from pathlib import Path
-from bs4 import BeautifulSoup
-import requests
-from discord_webhook import DiscordWebhook
 from dotenv import load_dotenv
+from parse_cache import ParseCache
+from snapshot_store import SnapshotStore, open_html
+from subscriptions import load_subscriptions
+from metrics import Metrics
+from sale_record import Sale
+from sale_diff import ADDED, ENDED, STATUS_CHANGED, FIELD_LABELS, DiffBaseline, diff_sales
+from history import RetentionPolicy, open_history_store, migrate_json_to_sqlite
+
+# 抽出ロジック（_extract_sales_info）を変更した場合はこの値を上げる。
+# 解析キャッシュはバージョンが一致しない場合に破棄される。
+EXTRACTOR_VERSION = 2
+
+# HTML解析バックエンド（bs4: BeautifulSoup版の基準実装、lxml: 高速版）
+# 解析キャッシュはバックエンドごとに保存される。
+PARSER_BACKENDS = ("lxml", "bs4")
+
+# BeautifulSoup・requests・discord_webhook などの読み込みに時間がかかるモジュールは、
+# 新しいセール情報がない実行や --fetch-only で読み込まないように、使用する処理の中で読み込む。
+
+# 解析プロセスごとのスクレイパー（_init_parse_worker で作成）
+_worker_scraper = None
+
+
+def _init_parse_worker(html_dir, history_file, target_shops, parser_backend):
+    """解析プロセスの初期化（プロセスごとに1回だけスクレイパーを作成）"""
+    global _worker_scraper
+    _worker_scraper = KaldiSaleScraper(html_dir, target_shops=target_shops, history_file=history_file,
+                                       use_parse_cache=False, parser_backend=parser_backend)
+
+
+def _parse_in_worker(html_file):
+    """解析プロセスでHTMLファイル1件を解析
+    
+    Returns:
+        (Sale.to_record() のタプルのリスト, 解析時間の秒数) のタプル
+    """
+    start = time.perf_counter()
+    records = [sale.to_record() for sale in _worker_scraper._iter_html_file(html_file)]
+    return records, time.perf_counter() - start
 
 class KaldiSaleScraper:
-    def __init__(self, html_dir, target_shops=None, webhook_url=None, debug=False, history_file=None):
+    def __init__(self, html_dir, target_shops=None, webhook_url=None, debug=False, history_file=None,
+                 parse_cache_file=None, use_parse_cache=True, parser_backend="lxml", retention_policy=None,
+                 use_bloom_filter=False, fetch_workers=4, subscriptions=None, metrics=None, parse_workers=1,
+                 use_sale_index=False):
         """
         初期化
         
         Args:
             html_dir: HTMLファイルが保存されているディレクトリパス
             target_shops: 対象店舗リスト（Noneの場合は全店舗）
-            webhook_url: Discord Webhook URL
+            webhook_url: Discord Webhook URL（カンマ区切りで複数指定可）
             debug: デバッグモードフラグ
             history_file: 通知履歴を保存するファイルパス
+            parse_cache_file: 解析キャッシュを保存するファイルパス
+            use_parse_cache: 解析キャッシュを使用するかどうか
+            parser_backend: HTML解析バックエンド（"lxml" または "bs4"）
+            retention_policy: 通知履歴の保持ポリシー（Noneの場合はデフォルト設定）
+            use_bloom_filter: 通知済みかどうかの判定にブルームフィルタを使用するかどうか
+            fetch_workers: 複数のURLを取得する際の同時接続数
+            subscriptions: 通知先ごとの購読店舗（SubscriptionTable、指定した場合はtarget_shopsとwebhook_urlより優先）
+            metrics: 処理時間や件数を記録するMetrics（Noneの場合は作成する）
+            parse_workers: HTMLファイルを並列に解析するプロセス数（1の場合は並列化しない）
+            use_sale_index: 実行のたびに新しいスナップショットのセール情報を全文検索用の索引に追加するかどうか
         """
+        if parser_backend not in PARSER_BACKENDS:
+            raise ValueError(f"不明な解析バックエンドです: {parser_backend}")
+        
         self.html_dir = Path(html_dir)
         self.target_shops = target_shops
         self.webhook_url = webhook_url
+        self.webhook_urls = [url.strip() for url in webhook_url.split(',') if url.strip()] if webhook_url else []
+        self.subscriptions = subscriptions
+        if subscriptions:
+            self.target_shops = subscriptions.target_shops
+            self.webhook_urls = subscriptions.webhook_urls
+        self._delivery = None
         self.debug = debug
-        self.history_file = Path(history_file) if history_file else Path("./data/notification_history.json")
+        self.history_file = Path(history_file) if history_file else Path("./data/notification_history.db")
+        self._history_store = None
+        self.parse_cache_file = Path(parse_cache_file) if parse_cache_file else self.html_dir / "parse_cache.db"
+        self.use_parse_cache = use_parse_cache
+        self._parse_cache = None
+        self.parser_backend = parser_backend
+        self.retention_policy = retention_policy or RetentionPolicy()
+        self.use_bloom_filter = use_bloom_filter
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self._fetcher = None
+        self._snapshot_store = None
+        self.diff_baseline = DiffBaseline(self.html_dir / "diff_baseline.json", debug=debug)
+        self.last_processed_file = self.html_dir / "last_processed.json"
+        self.use_sale_index = use_sale_index
+        self.sale_index_file = self.html_dir / "sale_index.db"
+        self._sale_index = None
+        self.metrics = metrics or Metrics()
         
         # ディレクトリがなければ作成
         os.makedirs(self.html_dir, exist_ok=True)
         os.makedirs(self.history_file.parent, exist_ok=True)
     
-    def get_kaldi_url(self):
+    def get_kaldi_url(self, date=None):
         """
-        現在の日付を使用したカルディのURL生成
+        日付を使用したカルディのURL生成
+        
+        Args:
+            date: 対象日（datetime.date、Noneの場合は今日）
         
         Returns:
             生成したURL
         """
-        # 今日の日付をフォーマット (yyyy-MM-dd)
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        # 日付をフォーマット (yyyy-MM-dd)
+        date = date or datetime.date.today()
+        date_str = date.strftime("%Y-%m-%d")
         # 基本URLに日付を追加
-        url = f"https://map.kaldi.co.jp/kaldi/articleList?account=kaldi&accmd=1&ftop=1&kkw001={today}"
+        url = f"https://map.kaldi.co.jp/kaldi/articleList?account=kaldi&accmd=1&ftop=1&kkw001={date_str}"
         return url
+    
+    def get_kaldi_urls(self, start_date, end_date):
+        """
+        期間内の各日付のカルディのURL生成
+        
+        Args:
+            start_date: 開始日（datetime.date）
+            end_date: 終了日（datetime.date、この日を含む）
+        
+        Returns:
+            生成したURLのリスト
+        """
+        days = (end_date - start_date).days
+        return [self.get_kaldi_url(start_date + datetime.timedelta(days=i)) for i in range(days + 1)]
         
     def get_date_from_url(self, url):
         """URLから日付を抽出する
@@ -73,7 +167,14 @@ class KaldiSaleScraper:
         Returns:
             見つかったファイルパス、または見つからない場合はNone
         """
-        # 日付を含むHTMLファイルを検索
+        # スナップショットのマニフェストを検索
+        snapshot = self.snapshot_store.find_by_date(date)
+        if snapshot:
+            if self.debug:
+                print(f"同じ日付の既存スナップショットを発見: {snapshot}")
+            return snapshot
+        
+        # 従来形式のHTMLファイルを検索
         pattern = f"kaldi_sale_{date}*.html"
         for html_file in self.html_dir.glob(pattern):
             if self.debug:
@@ -81,6 +182,26 @@ class KaldiSaleScraper:
             return html_file
         return None
     
+    @property
+    def snapshot_store(self):
+        """HTMLのスナップショットストア（最初のアクセス時に開く）"""
+        if self._snapshot_store is None:
+            self._snapshot_store = SnapshotStore(self.html_dir / "snapshots", debug=self.debug)
+        return self._snapshot_store
+    
+    @property
+    def fetcher(self):
+        """HTMLフェッチャー（HTTPセッションを使い回すため最初のアクセス時に1回だけ作成）"""
+        if self._fetcher is None:
+            from fetcher import SnapshotFetcher
+            self._fetcher = SnapshotFetcher(
+                state_file=self.html_dir / "fetch_state.json",
+                max_workers=self.fetch_workers,
+                debug=self.debug,
+                metrics=self.metrics
+            )
+        return self._fetcher
+    
     def fetch_and_save_html(self, url=None, force_fetch=False):
         """
         指定URLからHTMLを取得して保存
@@ -92,89 +213,371 @@ class KaldiSaleScraper:
         Returns:
             保存したファイルパス
         """
-        try:
-            # URLが指定されていない場合は自動生成
-            if url is None:
-                url = self.get_kaldi_url()
-                print(f"自動生成したURLを使用します: {url}")
+        # URLが指定されていない場合は自動生成
+        if url is None:
+            url = self.get_kaldi_url()
+            print(f"自動生成したURLを使用します: {url}")
+        
+        return self.fetch_many_html([url], force_fetch=force_fetch)[0]
+    
+    def fetch_many_html(self, urls, force_fetch=False):
+        """
+        複数のURLからHTMLを並行して取得して保存
+        
+        前回取得時の ETag / Last-Modified を使って条件付きリクエストを送信し、
+        サーバーが304（更新なし）を返した場合は保存済みのHTMLファイルを使用する。
+        
+        Args:
+            urls: 取得するURLのリスト
+            force_fetch: 既存ファイルがあっても強制的に取得するフラグ
             
+        Returns:
+            URLと同じ順番の保存したファイルパスのリスト（取得に失敗した場合はNone）
+        """
+        paths = [None] * len(urls)
+        pending = []
+        
+        for i, url in enumerate(urls):
             # URLから日付を抽出
             date = self.get_date_from_url(url)
-            if date and not force_fetch:
-                # 同じ日付のHTMLファイルを探す
-                existing_file = self.find_html_by_date(date)
-                if existing_file:
-                    print(f"同じ日付({date})のHTMLファイルが既に存在します: {existing_file}")
-                    return existing_file
-            
-            # リクエストヘッダー（Webサイトによっては必要）
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            if self.debug:
-                print(f"リクエスト送信: {url}")
-                print(f"ヘッダー: {headers}")
+            existing_file = self.find_html_by_date(date) if date else None
+            if existing_file and not force_fetch:
+                print(f"同じ日付({date})のHTMLファイルが既に存在します: {existing_file}")
+                paths[i] = existing_file
+                continue
             
-            # GETリクエスト送信
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()  # エラーチェック
+            # 保存済みのファイルがない場合は条件なしで取得する
+            if not existing_file:
+                self.fetcher.forget(url)
+            pending.append((i, url, date, existing_file))
+        
+        if not pending:
+            return paths
+        
+        results = self.fetcher.fetch_many([url for _, url, _, _ in pending])
+        
+        for (i, url, date, existing_file), result in zip(pending, results):
+            if result.not_modified:
+                print(f"HTMLは更新されていません(304): {existing_file}")
+                paths[i] = existing_file
+            elif result.ok:
+                paths[i] = self._save_html(result.text, date, url)
+            else:
+                print(f"HTMLの取得に失敗しました: {result.error}")
+        
+        return paths
+    
+    def _save_html(self, text, date=None, url=None):
+        """
+        取得したHTMLをスナップショットとして保存
+        
+        同じ内容のHTMLが既に保存されている場合は新しいファイルを作成しない。
+        
+        Args:
+            text: HTML文字列
+            date: YYYYMMDD形式の日付文字列（Noneの場合は現在日付）
+            url: 取得元のURL
             
-            if self.debug:
-                print(f"ステータスコード: {response.status_code}")
-                print(f"レスポンスヘッダー: {response.headers}")
-                print(f"HTML長さ: {len(response.text)} バイト")
-            
-            # 日付をファイル名に含める
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            # 日付情報が取得できた場合はそれを使う
-            prefix = date if date else timestamp[:8]
-            filename = f"kaldi_sale_{prefix}_{timestamp[9:]}.html"
-            filepath = self.html_dir / filename
-            
-            # HTMLをファイルに保存
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(response.text)
-                
+        Returns:
+            保存したファイルパス
+        """
+        date = date or datetime.datetime.now().strftime("%Y%m%d")
+        filepath, is_new = self.snapshot_store.put(text.encode("utf-8"), date, url)
+        
+        if is_new:
             print(f"HTMLを保存しました: {filepath}")
-            return filepath
+        else:
+            print(f"同じ内容のHTMLが既に保存されています: {filepath}")
+        return filepath
+    
+    @property
+    def parse_cache(self):
+        """解析キャッシュ（無効の場合はNone、繰り返し実行する場合も接続は最初に1回だけ開く）"""
+        if self.use_parse_cache and self._parse_cache is None:
+            self._parse_cache = ParseCache(self.parse_cache_file, EXTRACTOR_VERSION,
+                                           parser_backend=self.parser_backend, debug=self.debug)
+        return self._parse_cache
+    
+    def _list_html_files(self):
+        """解析対象のHTMLファイルをページの日付の古い順に列挙
+        
+        スナップショットはマニフェストの日付、従来形式のHTMLファイル（data/*.html, data/*.html.gz）は
+        ファイル名の日付（ない場合は更新日時の日付）をページの日付とし、同じ日付の場合は取得日時順に並べる。
+        過去の日付をまとめて取得した場合も、取得した順番ではなくページの日付の順番になる。
+        
+        Returns:
+            (HTMLファイルパス, (YYYYMMDD形式のページの日付, 取得日時のタイムスタンプ)) のタプルのリスト
+        """
+        html_files = []
+        for path in sorted(list(self.html_dir.glob("*.html")) + list(self.html_dir.glob("*.html.gz"))):
+            mtime = path.stat().st_mtime
+            match = re.search(r"(\d{8})", path.name)
+            date = match.group(1) if match else datetime.datetime.fromtimestamp(mtime).strftime("%Y%m%d")
+            html_files.append((path, (date, mtime)))
+        
+        for path, (date, fetched_at) in self.snapshot_store.last_listed().items():
+            if path.exists():
+                html_files.append((path, (date, datetime.datetime.fromisoformat(fetched_at).timestamp())))
+        
+        return sorted(html_files, key=lambda item: item[1])
+    
+    def _latest_html_file(self, listed):
+        """最新のHTMLファイル（今日までの日付のページのうち、日付・取得日時が最も新しいもの）
+        
+        --days-ahead で取得した先の日付のページは、今日のページより後に取得しても最新として扱わない
+        （先の日付のページしかない場合は、その中で最も新しいものを使う）。
+        
+        Args:
+            listed: _list_html_files() の結果
             
-        except requests.exceptions.RequestException as e:
-            print(f"HTMLの取得に失敗しました: {e}")
-            if self.debug:
-                import traceback
-                traceback.print_exc()
-            return None
+        Returns:
+            HTMLファイルパス、またはファイルがない場合はNone
+        """
+        today = datetime.date.today().strftime("%Y%m%d")
+        candidates = [item for item in listed if item[1][0] <= today] or listed
+        return max(candidates, key=lambda item: item[1])[0] if candidates else None
     
-    def parse_html_files(self):
-        """ディレクトリ内のすべてのHTMLファイルを解析"""
-        sales_info = []
+    def parse_html_files(self, latest_only=False):
+        """ディレクトリ内のHTMLファイルを解析
         
-        for html_file in self.html_dir.glob("*.html"):
-            if self.debug:
-                print(f"HTMLファイル解析: {html_file}")
-                
-            with open(html_file, "r", encoding="utf-8") as f:
-                content = f.read()
+        Args:
+            latest_only: 最新のHTMLファイルのみを解析するフラグ
+            
+        Returns:
+            セール情報リスト
+        """
+        return list(self.iter_sales(latest_only=latest_only))
+    
+    def iter_sales(self, latest_only=False, filter_shops=True):
+        """ディレクトリ内のHTMLファイルを解析し、セール情報を1件ずつ返す
+        
+        ファイル全体やセール情報リストを保持せずに、対象店舗のセール情報を逐次返す。
+        解析キャッシュが有効な場合、前回から変更のないファイルは
+        キャッシュ済みのセール情報を使用して再解析しない。キャッシュはファイルを処理する時に
+        そのファイルの分だけ読み込むため、保持するのは処理中の1ファイル分のセール情報のみ。
+        parse_workers が2以上の場合は解析が必要なファイルを複数のプロセスで解析し、
+        ファイルの順番どおりに返す（結果は1プロセスで解析した場合と同じ）。
+        
+        Args:
+            latest_only: 最新のHTMLファイルのみを解析するフラグ
+            filter_shops: 対象店舗のみに絞り込むかどうか
             
+        Yields:
+            セール情報辞書
+        """
+        listed = self._list_html_files()
+        html_files = [path for path, _ in listed]
+        
+        cache = self.parse_cache
+        if latest_only and listed:
+            html_files = [self._latest_html_file(listed)]
             if self.debug:
-                print(f"HTML長さ: {len(content)} バイト")
+                print(f"最新のHTMLファイルのみを解析します: {html_files[0]}")
+        elif cache:
+            cache.prune(html_files)
+        
+        # キャッシュが有効かどうかだけを先に確認し、セール情報はファイルを処理する時に読み込む
+        hits = {html_file for html_file in html_files if html_file in cache} if cache else set()
+        misses = [html_file for html_file in html_files if html_file not in hits]
+        parsed = (self._parse_in_pool(misses, cache, filter_shops=filter_shops)
+                  if self.parse_workers > 1 and len(misses) > 1 else None)
+        
+        for html_file in html_files:
+            file_sales = cache.get(html_file) if html_file in hits else None
+            if file_sales is not None:
+                self.metrics.inc("parse_cache_hits_total")
+                if self.debug:
+                    print(f"解析キャッシュを使用: {html_file} ({len(file_sales)}件)")
+            elif parsed is not None and html_file not in hits:
+                file_sales = next(parsed)
+            else:
+                file_sales = self._iter_html_file(html_file, cache, filter_shops=filter_shops)
+            
+            for sale in file_sales:
+                if not filter_shops or self._is_target_shop(sale["shop"]):
+                    yield sale
+    
+    def _parse_in_pool(self, html_files, cache=None, filter_shops=True):
+        """複数のHTMLファイルをプロセスプールで解析し、ファイルの順番どおりにセール情報リストを返す
+        
+        解析プロセスからはBeautifulSoupやlxmlのオブジェクトではなく、
+        セール情報のタプルのリストだけを受け取る。
+        
+        Args:
+            html_files: HTMLファイルパスのリスト
+            cache: 解析結果を登録するParseCache（Noneの場合は登録しない）
+            filter_shops: キャッシュ無効時に対象店舗のみに絞り込むかどうか
+            
+        Yields:
+            ファイルごとのセール情報リスト
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # キャッシュには全店舗を登録し、キャッシュ無効時は絞り込む場合のみ対象外の店舗を解析プロセスで除外する
+        target_shops = self.target_shops if cache is None and filter_shops else None
+        workers = min(self.parse_workers, len(html_files))
+        if self.debug:
+            print(f"{len(html_files)}件のHTMLファイルを{workers}プロセスで解析します")
+        
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_parse_worker,
+            initargs=(self.html_dir, self.history_file, target_shops, self.parser_backend)
+        )
+        try:
+            # map は投入した順番に結果を返すため、完了順によらず結果の順番は一定になる
+            for html_file, (records, parse_seconds) in zip(html_files, executor.map(_parse_in_worker, html_files)):
+                file_sales = [Sale.from_record(record) for record in records]
+                self.metrics.inc("files_parsed_total", backend=self.parser_backend)
+                self.metrics.inc("rows_parsed_total", len(file_sales), backend=self.parser_backend)
+                self.metrics.observe("parse_seconds", parse_seconds, backend=self.parser_backend)
+                if self.debug:
+                    print(f"HTMLファイル解析: {html_file} ({len(file_sales)}件、{parse_seconds:.3f}秒)")
+                if cache:
+                    cache.put(html_file, file_sales)
+                yield file_sales
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _iter_html_file(self, html_file, cache=None, filter_shops=None):
+        """HTMLファイル1件を解析し、セール情報を1件ずつ返す
+        
+        lxmlバックエンドではファイルを逐次読み込むため、ファイル全体を保持しない。
+        解析キャッシュに登録する場合は全店舗を返し、それ以外は対象店舗のみを返す。
+        解析時間には、呼び出し元がセール情報を処理している時間は含めない。
+        
+        Args:
+            html_file: HTMLファイルパス
+            cache: 解析結果を登録するParseCache（Noneの場合は登録しない）
+            filter_shops: 対象店舗のみに絞り込むかどうか（Noneの場合は解析キャッシュに登録しない場合のみ絞り込む）
+            
+        Yields:
+            セール情報辞書
+        """
+        if self.debug:
+            print(f"HTMLファイル解析: {html_file}")
+            print(f"HTML長さ: {html_file.stat().st_size} バイト")
+        
+        # キャッシュに登録するセール情報（キャッシュ無効時は保持しない）
+        file_sales = [] if cache else None
+        count = 0
+        parse_seconds = 0.0
+        with open_html(html_file) as f:
+            start = time.perf_counter()
+            # キャッシュには全店舗を登録し、キャッシュ無効時は対象外の店舗を抽出時に除外する
+            if filter_shops is None or cache is not None:
+                filter_shops = cache is None
+            if self.parser_backend == "lxml":
+                from lxml_extractor import iter_sales
+                rows = iter_sales(f, shop_filter=self._is_target_shop if filter_shops else None)
+            else:
+                rows = iter(self._extract_with_backend("bs4", f.read(), filter_shops=filter_shops))
+            parse_seconds += time.perf_counter() - start
+            
+            while True:
+                start = time.perf_counter()
+                sale = next(rows, None)
+                parse_seconds += time.perf_counter() - start
+                if sale is None:
+                    break
                 
-            soup = BeautifulSoup(content, "html.parser")
-            file_sales = self._extract_sales_info(soup)
+                if self.debug and count == 0:
+                    print(f"最初のセール情報サンプル: {sale}")
+                count += 1
+                if file_sales is not None:
+                    file_sales.append(sale)
+                yield sale
+        
+        if self.debug:
+            print(f"抽出されたセール情報数: {count}")
+        
+        self.metrics.inc("files_parsed_total", backend=self.parser_backend)
+        self.metrics.inc("rows_parsed_total", count, backend=self.parser_backend)
+        self.metrics.observe("parse_seconds", parse_seconds, backend=self.parser_backend)
+        
+        if cache:
+            cache.put(html_file, file_sales)
+    
+    def _extract_with_backend(self, backend, raw, filter_shops=True):
+        """指定した解析バックエンドでHTMLからセール情報を抽出
+        
+        Args:
+            backend: 解析バックエンド（"lxml" または "bs4"）
+            raw: HTMLのバイト列
+            filter_shops: 対象店舗のみに絞り込むかどうか
             
-            if self.debug:
-                print(f"抽出されたセール情報数: {len(file_sales)}")
-                if len(file_sales) > 0:
-                    print(f"最初のセール情報サンプル: {file_sales[0]}")
-                    
-            sales_info.extend(file_sales)
+        Returns:
+            セール情報リスト
+        """
+        if backend == "lxml":
+            return self._extract_sales_info_lxml(raw, filter_shops=filter_shops)
+        
+        from bs4 import BeautifulSoup
+        # html.parser は閉じタグの省略（<p>の後の<p>など）を補わず、後続の要素を入れ子にしてしまうため、
+        # lxmlバックエンドと同じくブラウザと同じ規則で木を作る lxml のツリービルダーを使う
+        soup = BeautifulSoup(raw.decode("utf-8"), "lxml")
+        return self._extract_sales_info(soup, filter_shops=filter_shops)
+    
+    def check_parser_parity(self, html_files=None):
+        """すべての解析バックエンドが同じセール情報を返すか検証
         
-        return sales_info
+        HTMLファイルをBeautifulSoup版（基準実装）と
+        lxml版（一括解析・逐次解析）で解析し、結果を比較する。
+        
+        Args:
+            html_files: 検証するHTMLファイルパスのリスト（Noneの場合はディレクトリ内のすべてのファイル）
+        
+        Returns:
+            すべてのファイルで一致した場合はTrue
+        """
+        from lxml_extractor import iter_sales
+        all_match = True
+        
+        if html_files is None:
+            html_files = [path for path, _ in self._list_html_files()]
+        
+        for html_file in html_files:
+            with open_html(html_file) as f:
+                raw = f.read()
+            
+            expected = self._extract_with_backend("bs4", raw, filter_shops=False)
+            actual = self._extract_with_backend("lxml", raw, filter_shops=False)
+            # 逐次解析（実行時に使用する経路）も一括解析と同じ結果になるか確認する
+            with open_html(html_file) as f:
+                streamed = list(iter_sales(f))
+            if streamed != actual:
+                print(f"不一致: {html_file} (lxml: {len(actual)}件, lxml逐次解析: {len(streamed)}件)")
+                all_match = False
+                continue
+            
+            if expected == actual:
+                print(f"一致: {html_file} ({len(expected)}件)")
+                continue
+            
+            all_match = False
+            print(f"不一致: {html_file} (bs4: {len(expected)}件, lxml: {len(actual)}件)")
+            for i, (bs4_sale, lxml_sale) in enumerate(zip(expected, actual)):
+                if bs4_sale != lxml_sale:
+                    print(f"  最初の相違 {i}件目:")
+                    print(f"    bs4:  {bs4_sale}")
+                    print(f"    lxml: {lxml_sale}")
+                    break
+        
+        return all_match
+    
+    def _is_target_shop(self, shop_name):
+        """対象店舗かどうかを判定"""
+        if self.subscriptions:
+            return self.subscriptions.follows(shop_name)
+        return not self.target_shops or shop_name in self.target_shops
     
-    def _extract_sales_info(self, soup):
+    def _extract_sales_info(self, soup, filter_shops=True):
         """
         BeautifulSoupオブジェクトからカルディのセール情報を抽出
+        
+        Args:
+            soup: BeautifulSoupオブジェクト
+            filter_shops: 対象店舗のみに絞り込むかどうか
         """
         sales = []
         base_url = "https://map.kaldi.co.jp"
@@ -191,11 +594,6 @@ class KaldiSaleScraper:
             shop_cell = row.select_one("td[aria-label='店舗名、住所など']")
             if not shop_cell:
                 continue
-                
-            # セール内容を含むtdを取得
-            detail_cell = row.select_one("td[aria-label='セール内容']")
-            if not detail_cell:
-                continue
             
             # 店舗名
             shop_name_elem = shop_cell.select_one("span.salename a")
@@ -204,8 +602,13 @@ class KaldiSaleScraper:
                 
             shop_name = shop_name_elem.text.strip()
             
-            # 対象店舗のみフィルタリング
-            if self.target_shops and shop_name not in self.target_shops:
+            # 対象店舗のみフィルタリング（セール内容を取り出す前に除外）
+            if filter_shops and not self._is_target_shop(shop_name):
+                continue
+                
+            # セール内容を含むtdを取得
+            detail_cell = row.select_one("td[aria-label='セール内容']")
+            if not detail_cell:
                 continue
                 
             # 店舗URL
@@ -233,19 +636,33 @@ class KaldiSaleScraper:
             sale_notes = detail_cell.select_one("p.saledetail_notes").text.strip() if detail_cell.select_one("p.saledetail_notes") else ""
             
             # 販売情報をまとめる
-            sales.append({
-                "shop": shop_name,
-                "address": shop_address,
-                "status": sale_status,
-                "title": sale_title,
-                "date": sale_date,
-                "detail": sale_detail,
-                "notes": sale_notes,
-                "url": shop_url
-            })
+            sales.append(Sale(
+                shop=shop_name,
+                address=shop_address,
+                status=sale_status,
+                title=sale_title,
+                date=sale_date,
+                detail=sale_detail,
+                notes=sale_notes,
+                url=shop_url
+            ))
         
         return sales
     
+    def _extract_sales_info_lxml(self, raw, filter_shops=True):
+        """
+        lxmlでHTMLからカルディのセール情報を抽出
+        
+        _extract_sales_info と同じ結果を返す高速版。各行を1回だけ走査する。
+        _extract_sales_info を修正した場合は lxml_extractor.py も合わせて修正すること。
+        
+        Args:
+            raw: HTMLのバイト列
+            filter_shops: 対象店舗のみに絞り込むかどうか
+        """
+        from lxml_extractor import extract_sales
+        return extract_sales(raw, shop_filter=self._is_target_shop if filter_shops else None)
+    
     def format_sale_message(self, sale):
         """セール情報を通知用フォーマットに変換"""
         return f"""
@@ -258,32 +675,89 @@ class KaldiSaleScraper:
 🔗 {sale.get('url', '#')}
 """
 
-    def save_to_text_file(self, sales_info, output_file="sales_output.txt"):
-        """セール情報をテキストファイルに保存"""
-        if not sales_info:
-            return False
+    def format_change_message(self, change):
+        """前回のスナップショットからの変更を通知用フォーマットに変換
+        
+        追加されたセール情報は format_sale_message と同じ形式で、
+        それ以外は変更された項目の前回と今回の値を表示する。
+        
+        Args:
+            change: SaleChange
+        """
+        sale = change.sale
+        if change.kind == ADDED:
+            return self.format_sale_message(sale)
+        
+        if change.kind == ENDED:
+            header = "🏁 セール終了"
+        elif change.kind == STATUS_CHANGED:
+            old_status, new_status = change.changes["status"]
+            header = f"🔔 {old_status or '不明'} → {new_status or '不明'}!"
+        else:
+            header = "✏️ セール内容変更"
+        
+        lines = [
+            header,
+            f"📍 {sale.get('shop', '不明')}",
+            f"🎯 {sale.get('title', 'セール詳細不明')}",
+            f"📅 {sale.get('date', '日付不明')}"
+        ]
+        if change.kind == STATUS_CHANGED:
+            lines.append(f"💰 {sale.get('detail', '')}")
+        for field, (old, new) in change.changes.items():
+            if field != "status":
+                lines.append(f"・{FIELD_LABELS.get(field, field)}: {old or '（なし）'} → {new or '（なし）'}")
+        lines.append(f"🔗 {sale.get('url', '#')}")
+        return "\n" + "\n".join(lines) + "\n"
+
+    def save_to_text_file(self, sales_info, output_file="sales_output.txt", format_message=None):
+        """セール情報をテキストファイルに保存
         
-        # 出力ディレクトリを確保
-        output_path = Path(output_file)
-        os.makedirs(output_path.parent, exist_ok=True)
+        セール情報は1件ずつ書き込むため、ジェネレータも渡せる。
+        セール情報が1件もない場合はファイルを作成しない。
         
-        with open(output_file, "w", encoding="utf-8") as f:
+        Args:
+            sales_info: セール情報のリストまたはイテラブル
+            output_file: 出力ファイル名
+            format_message: 1件を文字列に変換する関数（Noneの場合は format_sale_message）
+            
+        Returns:
+            保存したセール情報の件数
+        """
+        format_message = format_message or self.format_sale_message
+        count = 0
+        f = None
+        try:
             for sale in sales_info:
-                message = self.format_sale_message(sale)
+                if f is None:
+                    # 出力ディレクトリを確保
+                    output_path = Path(output_file)
+                    os.makedirs(output_path.parent, exist_ok=True)
+                    f = open(output_file, "w", encoding="utf-8")
+                
+                message = format_message(sale)
                 f.write(message)
                 f.write("\n" + "-"*40 + "\n")  # 区切り線
+                count += 1
+        finally:
+            if f is not None:
+                f.close()
         
-        return True
+        return count
         
     def generate_sale_id(self, sale):
         """セール情報のユニークID生成
         
         Args:
-            sale: セール情報辞書
+            sale: Saleまたはセール情報辞書
             
         Returns:
             セールのユニークID
         """
+        # Saleは最初に計算したIDを使い回す
+        if isinstance(sale, Sale):
+            return sale.sale_id
+        
         # 重要なフィールドを連結してハッシュを生成
         key_fields = [
             sale.get('shop', ''),
@@ -296,46 +770,49 @@ class KaldiSaleScraper:
         # SHA256ハッシュを生成して16進数文字列で返す
         return hashlib.sha256(hash_string.encode('utf-8')).hexdigest()
     
+    @property
+    def history_store(self):
+        """通知履歴ストア（最初のアクセス時に開く）
+        
+        SQLiteの履歴ファイルがまだ存在せず、同じ名前の従来のJSON履歴ファイル
+        （例: notification_history.json）がある場合は自動的に移行する。
+        """
+        if self._history_store is None:
+            start = time.perf_counter()
+            legacy_file = self.history_file.with_suffix(".json")
+            if (self.history_file.suffix != ".json" and not self.history_file.exists()
+                    and legacy_file.exists()):
+                count = migrate_json_to_sqlite(legacy_file, self.history_file, debug=self.debug)
+                print(f"通知履歴をSQLiteに移行しました: {legacy_file} -> {self.history_file} ({count}件)")
+            self._history_store = open_history_store(self.history_file, debug=self.debug,
+                                                     bloom=self.use_bloom_filter)
+            # JSON形式の履歴はここで全件読み込まれるため、読み込み時間も含めて記録する
+            self.metrics.set("history_entries", len(self._history_store))
+            self.metrics.observe("history_open_seconds", time.perf_counter() - start)
+        return self._history_store
+    
     def load_notification_history(self):
         """通知履歴の読み込み
         
         Returns:
-            通知履歴の辞書（セールID: 通知日時）
+            通知履歴の辞書（セールID: 通知情報）
         """
-        if not self.history_file.exists():
-            if self.debug:
-                print(f"履歴ファイルが存在しません: {self.history_file}")
-            return {}
-            
-        try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-                
-            if self.debug:
-                print(f"通知履歴を読み込みました: {len(history)}件")
-                
-            return history
-        except (json.JSONDecodeError, IOError) as e:
-            if self.debug:
-                print(f"履歴ファイルの読み込みエラー: {e}")
-            return {}
+        history_store = self.history_store
+        with self.metrics.timer("history_load_seconds"):
+            history = history_store.load_all()
+        self.metrics.set("history_entries", len(history))
+        return history
     
     def save_notification_history(self, history):
         """通知履歴の保存
         
         Args:
-            history: 保存する通知履歴辞書
+            history: 保存する通知履歴辞書（既存の履歴に追加・上書きされる）
         """
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
-                
-            if self.debug:
-                print(f"通知履歴を保存しました: {len(history)}件")
-                
-        except IOError as e:
-            if self.debug:
-                print(f"履歴ファイルの保存エラー: {e}")
+        history_store = self.history_store
+        with self.metrics.timer("history_save_seconds"):
+            history_store.add_many(history)
+        self.metrics.set("history_entries", len(history_store))
     
     def filter_new_sales(self, sales_info):
         """新しいセール情報のみをフィルタリング
@@ -346,24 +823,286 @@ class KaldiSaleScraper:
         Returns:
             未通知のセール情報リスト
         """
-        # 通知履歴を読み込む
-        history = self.load_notification_history()
+        return list(self.iter_new_sales(sales_info))
+    
+    def iter_new_sales(self, sales_info):
+        """新しいセール情報のみを1件ずつ返す
+        
+        Args:
+            sales_info: 全セール情報のリストまたはイテラブル
+            
+        Yields:
+            未通知のセール情報辞書
+        """
+        # 通知履歴（全件は読み込まず、セールIDごとに確認する）
+        # サーバーでは同じストアを使い回すため、別のプロセス（手動の実行など）が追加した履歴を先に反映する
+        history = self.history_store
+        history.refresh()
+        today = datetime.date.today()
+        checked = 0
+        new = 0
+        lookup_seconds = 0.0
         
-        # 新しいセール情報をフィルタリング
-        new_sales = []
         for sale in sales_info:
+            # 終了済みのセールは履歴から削除されている可能性があるため通知しない
+            if isinstance(sale, Sale):
+                # Saleは抽出時に解析済みのセール期間を使う
+                ended = self.retention_policy.is_end_passed(sale.end, today)
+            else:
+                ended = self.retention_policy.is_period_ended(sale.get('date', ''), today)
+            if ended:
+                if self.debug:
+                    print(f"終了済みのセール: {sale.get('shop')} - {sale.get('title')}")
+                continue
+            
             sale_id = self.generate_sale_id(sale)
             
-            # 履歴にないセール情報のみを追加
-            if sale_id not in history:
-                new_sales.append(sale)
+            start = time.perf_counter()
+            is_new = sale_id not in history
+            lookup_seconds += time.perf_counter() - start
+            checked += 1
+            
+            # 履歴にないセール情報のみを返す
+            if is_new:
+                new += 1
                 if self.debug:
                     print(f"新しいセール情報: {sale.get('shop')} - {sale.get('title')}")
+                yield sale
             else:
                 if self.debug:
                     print(f"既に通知済み: {sale.get('shop')} - {sale.get('title')}")
         
-        return new_sales
+        self.metrics.inc("dedup_checked_total", checked)
+        self.metrics.inc("dedup_new_total", new)
+        self.metrics.observe("history_lookup_seconds", lookup_seconds)
+    
+    def diff_latest_snapshot(self):
+        """最新のスナップショットを前回処理したスナップショットと店舗ごとに比較
+        
+        比較元がない場合（初回実行時）は、最新のセール情報をすべて追加として扱う。
+        比較元は更新しないため、処理が終わった後に save_diff_baseline() を呼び出す。
+        
+        Returns:
+            (対象店舗の変更のリスト, 最新のHTMLファイルパス, 最新の全店舗のセール情報リスト) のタプル
+        """
+        listed = self._list_html_files()
+        if not listed:
+            return [], None, []
+        latest_file = self._latest_html_file(listed)
+        latest_sales = list(self.iter_sales(latest_only=True, filter_shops=False))
+        
+        source, baseline = self.diff_baseline.load()
+        if self.debug:
+            print(f"差分の比較: {source or '（比較元なし）'} -> {latest_file}")
+        
+        changes = [change for change in diff_sales(baseline or [], latest_sales)
+                   if self._is_target_shop(change.shop)]
+        for change in changes:
+            self.metrics.inc("diff_changes_total", kind=change.kind)
+        return changes, latest_file, latest_sales
+    
+    def save_diff_baseline(self, latest_file, latest_sales):
+        """差分の比較元を最新のスナップショットに更新
+        
+        Args:
+            latest_file: 最新のHTMLファイルパス
+            latest_sales: 最新の全店舗のセール情報リスト
+        """
+        self.diff_baseline.save(latest_file, latest_sales)
+    
+    def processed_fingerprint(self, mode, latest_only=False):
+        """解析対象のHTMLファイルと設定のハッシュ
+        
+        前回の実行から値が変わっていなければ、解析しても新しいセール情報・変更は見つからない。
+        スナップショットはファイル名が内容のハッシュのため、同じ内容のHTMLを取得し直しても値は変わらない。
+        通知履歴（差分モードでは比較元）がない場合は、前回の結果を使えないためNoneを返す。
+        
+        Args:
+            mode: 実行モード（"notify" または "diff"）
+            latest_only: 最新のHTMLファイルのみを解析するかどうか
+            
+        Returns:
+            SHA256の16進数文字列、または判定できない場合はNone
+        """
+        state_file = self.diff_baseline.baseline_file if mode == "diff" else self.history_file
+        if not state_file.exists():
+            return None
+        
+        listed = self._list_html_files()
+        if (latest_only or mode == "diff") and listed:
+            latest_file = self._latest_html_file(listed)
+            listed = [item for item in listed if item[0] == latest_file]
+        
+        files = []
+        for path, _ in listed:
+            if path.parent == self.snapshot_store.root:
+                files.append(path.name)
+            else:
+                # 従来形式のHTMLファイルはサイズと更新日時で判定する
+                stat = path.stat()
+                files.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        
+        key = json.dumps({
+            "mode": mode,
+            "files": sorted(files),
+            "target_shops": sorted(self.target_shops) if self.target_shops else None,
+            "extractor_version": EXTRACTOR_VERSION,
+            "parser_backend": self.parser_backend,
+            "state_file": str(state_file.resolve())
+        }, ensure_ascii=False)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+    
+    def is_unchanged_since_last_run(self, fingerprint):
+        """前回処理した時から解析対象のHTMLファイルと設定が変わっていないかどうか
+        
+        Args:
+            fingerprint: processed_fingerprint() の戻り値
+        """
+        if fingerprint is None or not self.last_processed_file.exists():
+            return False
+        try:
+            with open(self.last_processed_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("fingerprint") == fingerprint
+        except (json.JSONDecodeError, IOError) as e:
+            if self.debug:
+                print(f"前回の処理状態の読み込みエラー: {e}")
+            return False
+    
+    def save_last_processed(self, fingerprint):
+        """処理し終えたHTMLファイルと設定のハッシュを保存
+        
+        Args:
+            fingerprint: processed_fingerprint() の戻り値（Noneの場合は保存しない）
+        """
+        if fingerprint is None:
+            return
+        data = {"fingerprint": fingerprint, "processed_at": datetime.datetime.now().isoformat()}
+        tmp_file = self.last_processed_file.with_name(self.last_processed_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.last_processed_file)
+    
+    def export_sales(self, export_dir):
+        """すべてのスナップショットのセール情報（全店舗）をエクスポート
+        
+        スナップショットの日付ごとにパーティションを分けてgzip圧縮したCSVに書き出す。
+        書き出し済みのスナップショットは書き出さない。
+        
+        Args:
+            export_dir: エクスポート先ディレクトリパス
+            
+        Returns:
+            (書き出したスナップショット数, 書き出した行数) のタプル
+        """
+        from sale_export import SaleExporter
+        exporter = SaleExporter(export_dir, debug=self.debug)
+        
+        cache = self.parse_cache
+        exported = 0
+        rows = 0
+        for date, source, fetched_at, html_file in self._list_snapshot_sources():
+            if exporter.is_exported(date, source) or not html_file.exists():
+                continue
+            rows += exporter.write(date, source, fetched_at, self._all_shop_sales(html_file, cache),
+                                   self.generate_sale_id)
+            exported += 1
+        
+        exporter.save_manifest()
+        return exported, rows
+    
+    def _list_snapshot_sources(self):
+        """すべてのスナップショットと従来形式のHTMLファイルを日付順に列挙
+        
+        Returns:
+            (日付, 識別子, 取得日時, HTMLファイルパス) のタプルのリスト
+        """
+        sources = []
+        # サーバーでは別のプロセスが保存したスナップショットも対象にする
+        self.snapshot_store.refresh()
+        for date, entries in sorted(self.snapshot_store.manifest["dates"].items()):
+            seen = set()
+            for entry in entries:
+                if entry["sha256"] not in seen:
+                    seen.add(entry["sha256"])
+                    sources.append((date, entry["sha256"], entry["fetched_at"], self.snapshot_store.path_for(entry["sha256"])))
+        # 従来形式のHTMLファイル（kaldi_sale_YYYYMMDD_HHMMSS.html）
+        for path in sorted(list(self.html_dir.glob("*.html")) + list(self.html_dir.glob("*.html.gz"))):
+            match = re.search(r"(\d{8})", path.name)
+            mtime = datetime.datetime.fromtimestamp(path.stat().st_mtime)
+            date = match.group(1) if match else mtime.strftime("%Y%m%d")
+            sources.append((date, path.name.split(".")[0], mtime.isoformat(), path))
+        return sources
+    
+    def _all_shop_sales(self, html_file, cache=None):
+        """HTMLファイル1件の全店舗のセール情報（解析キャッシュがあれば再解析しない）"""
+        file_sales = cache.get(html_file) if cache else None
+        if file_sales is None:
+            file_sales = self._iter_html_file(html_file, cache, filter_shops=False)
+        return file_sales
+    
+    @property
+    def sale_index(self):
+        """セール情報の全文検索用の索引（最初のアクセス時に開く）"""
+        if self._sale_index is None:
+            from sale_index import SaleIndex
+            self._sale_index = SaleIndex(self.sale_index_file, debug=self.debug)
+        return self._sale_index
+    
+    def update_sale_index(self):
+        """索引に追加していないスナップショットのセール情報（全店舗）を索引に追加
+        
+        スナップショットは日付ごとに記録するため、同じ内容のHTMLを別の日付で取得した場合は
+        索引済みのセール情報の最終掲載日と状態だけを更新する。
+        直前に解析したスナップショットは解析キャッシュのセール情報を使うため、再解析しない。
+        
+        Returns:
+            (追加したスナップショット数, 新しく追加したセール情報の件数) のタプル
+        """
+        index = self.sale_index
+        cache = self.parse_cache
+        indexed = 0
+        added = 0
+        for date, source, _, html_file in self._list_snapshot_sources():
+            # 同じ内容のスナップショットも日付ごとに追加し、最後に掲載されていた日付を更新する
+            key = f"{date}/{source}"
+            if index.is_indexed(key) or not html_file.exists():
+                continue
+            added += index.add_snapshot(key, date, self._all_shop_sales(html_file, cache),
+                                        self.generate_sale_id)
+            indexed += 1
+        
+        return indexed, added
+    
+    def search_sales(self, query, shops=None, limit=50):
+        """索引からセール情報を検索（索引に追加していないスナップショットは先に追加する）
+        
+        Args:
+            query: 検索語（空白区切りで複数指定した場合はすべてを含むもの）
+            shops: 店舗名のリスト（Noneの場合は全店舗）
+            limit: 最大件数
+            
+        Returns:
+            セール情報の辞書のリスト（最後に掲載されていた日付の新しい順）
+        """
+        self.update_sale_index()
+        return self.sale_index.search(query, shops=shops, limit=limit)
+    
+    def compact_history(self):
+        """期限切れの通知履歴を削除してストアを書き直す
+        
+        Returns:
+            削除前後の件数とファイルサイズの辞書
+        """
+        size_before = self.history_file.stat().st_size if self.history_file.exists() else 0
+        count_before, count_after = self.history_store.compact(self.retention_policy)
+        size_after = self.history_file.stat().st_size if self.history_file.exists() else 0
+        
+        return {
+            "count_before": count_before,
+            "count_after": count_after,
+            "size_before": size_before,
+            "size_after": size_after
+        }
     
     def update_notification_history(self, sales_info):
         """セール情報を通知履歴に追加
@@ -371,13 +1110,12 @@ class KaldiSaleScraper:
         Args:
             sales_info: 通知したセール情報リスト
         """
-        # 通知履歴を読み込む
-        history = self.load_notification_history()
+        history = {}
         
         # 現在の日時
         now = datetime.datetime.now().isoformat()
         
-        # 新しい通知を履歴に追加
+        # 新しい通知をまとめて履歴に追加
         for sale in sales_info:
             sale_id = self.generate_sale_id(sale)
             history[sale_id] = {
@@ -390,9 +1128,20 @@ class KaldiSaleScraper:
         # 履歴を保存
         self.save_notification_history(history)
     
+    @property
+    def delivery(self):
+        """Discord送信エンジン（HTTPセッションを使い回すため最初のアクセス時に1回だけ作成）"""
+        if self._delivery is None:
+            from discord_delivery import DiscordDelivery
+            self._delivery = DiscordDelivery(self.webhook_urls, debug=self.debug, metrics=self.metrics)
+        return self._delivery
+    
     def notify_discord(self, sales_info, update_history=False):
         """Discord Webhookを使用してセール情報を通知
         
+        複数のセール情報を文字数の上限までまとめて送信する。
+        Webhookが複数ある場合は並行して送信する。
+        
         Args:
             sales_info: 通知するセール情報リスト
             update_history: 通知履歴を更新するかどうか
@@ -400,36 +1149,22 @@ class KaldiSaleScraper:
         Returns:
             通知成功の場合はTrue
         """
-        if not self.webhook_url or not sales_info:
+        if not self.webhook_urls or not sales_info:
             if self.debug:
-                if not self.webhook_url:
+                if not self.webhook_urls:
                     print("Discord通知: Webhook URLが設定されていません")
                 if not sales_info:
                     print("Discord通知: 通知するセール情報がありません")
             return False
         
         if self.debug:
-            print(f"Discord通知: {len(sales_info)}件のセール情報を送信します")
+            print(f"Discord通知: {len(sales_info)}件のセール情報を{len(self.webhook_urls)}件のWebhookに送信します")
             # Webhookの最初の数文字を表示（セキュリティのため全部は表示しない）
-            webhook_prefix = self.webhook_url[:30] + "..." if len(self.webhook_url) > 30 else self.webhook_url
-            print(f"Discord Webhook URL: {webhook_prefix}")
+            for webhook_url in self.webhook_urls:
+                webhook_prefix = webhook_url[:30] + "..." if len(webhook_url) > 30 else webhook_url
+                print(f"Discord Webhook URL: {webhook_prefix}")
         
-        for i, sale in enumerate(sales_info):
-            message = self.format_sale_message(sale)
-            
-            if self.debug:
-                print(f"Discord通知 {i+1}/{len(sales_info)}: {sale.get('shop')} - {sale.get('title')}")
-                
-            webhook = DiscordWebhook(url=self.webhook_url, content=message)
-            response = webhook.execute()
-            
-            if self.debug:
-                print(f"Discord通知レスポンス: ステータスコード {response.status_code}")
-            
-            # API制限を避けるため少し待機
-            if i < len(sales_info) - 1:
-                import time
-                time.sleep(1)
+        success = self._send_messages(sales_info, self.format_sale_message)
         
         # 通知履歴更新フラグがあれば通知履歴を更新
         if update_history:
@@ -437,17 +1172,105 @@ class KaldiSaleScraper:
             if self.debug:
                 print(f"Discord通知: {len(sales_info)}件のセール情報を履歴に追加しました")
         
-        return True
+        return success
+    
+    def notify_changes(self, changes):
+        """前回のスナップショットからの変更をDiscordに通知
+        
+        Args:
+            changes: SaleChangeのリスト
+        
+        Returns:
+            通知成功の場合はTrue
+        """
+        if not self.webhook_urls or not changes:
+            if self.debug:
+                if not self.webhook_urls:
+                    print("Discord通知: Webhook URLが設定されていません")
+                if not changes:
+                    print("Discord通知: 通知する変更がありません")
+            return False
+        
+        if self.debug:
+            print(f"Discord通知: {len(changes)}件の変更を{len(self.webhook_urls)}件のWebhookに送信します")
+        
+        return self._send_messages(changes, self.format_change_message, sale_of=lambda change: change.sale)
+    
+    def _send_messages(self, items, format_message, sale_of=None):
+        """通知用フォーマットに変換してすべてのWebhook（購読設定がある場合は購読している通知先）に送信
+        
+        Args:
+            items: セール情報または変更のリスト
+            format_message: 1件を通知用フォーマットに変換する関数
+            sale_of: 1件からセール情報を取り出す関数（Noneの場合は1件がセール情報）
+        
+        Returns:
+            すべての通知に成功した場合はTrue
+        """
+        if self.subscriptions:
+            # 購読している通知先ごとに振り分けて送信（各メッセージは1回だけ作成）
+            messages = {id(item): format_message(item) for item in items}
+            routed = self.subscriptions.route(items, sale_of=sale_of)
+            if self.debug:
+                for sub, sub_items in routed.items():
+                    print(f"Discord通知: {sub.name} に{len(sub_items)}件")
+            # 同じWebhook URLの通知先はまとめ、両方が購読しているセール情報は1回だけ送信
+            by_url = {}
+            for sub, sub_items in routed.items():
+                url_items = by_url.setdefault(sub.webhook_url, {})
+                for item in sub_items:
+                    url_items.setdefault(id(item), item)
+            success = self.delivery.send_routed({
+                url: [messages[item_id] for item_id in url_items]
+                for url, url_items in by_url.items()
+            })
+        else:
+            success = self.delivery.send([format_message(item) for item in items])
+        
+        if self.debug:
+            print(f"Discord通知結果: {self.delivery.stats}")
+        return success
 
-def main():
+def parse_date_range(value):
+    """--date-range の値（START:END、または1日だけの場合は START）を日付の組に変換
+    
+    Args:
+        value: YYYY-MM-DD:YYYY-MM-DD 形式の文字列
+        
+    Returns:
+        (開始日, 終了日) の datetime.date のタプル
+    """
     import argparse
     
-    # .envファイルを読み込む
-    load_dotenv()
+    start, _, end = value.partition(':')
+    try:
+        start_date = datetime.date.fromisoformat(start.strip())
+        end_date = datetime.date.fromisoformat(end.strip() or start.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"期間は YYYY-MM-DD:YYYY-MM-DD の形式で指定してください（例: 2025-03-10:2025-03-16）: {value}"
+        )
+    if end_date < start_date:
+        raise argparse.ArgumentTypeError(f"終了日が開始日より前です: {value}")
+    return start_date, end_date
+
+def parse_args(argv=None):
+    """コマンドライン引数の解析
+    
+    Args:
+        argv: 引数のリスト（Noneの場合はsys.argvを使用）
+        
+    Returns:
+        argparse.Namespace
+    """
+    import argparse
     
     # コマンドライン引数の設定
     parser = argparse.ArgumentParser(description='カルディセール情報取得ツール')
-    parser.add_argument('--url', type=str, help='セール情報を取得するURL（指定しない場合は現在の日付で自動生成）')
+    parser.add_argument('--url', type=str, action='append', help='セール情報を取得するURL（複数指定可、指定しない場合は現在の日付で自動生成）')
+    parser.add_argument('--date-range', type=parse_date_range, metavar='START:END', help='指定期間の各日付のHTMLを取得する（例: 2025-03-10:2025-03-16）')
+    parser.add_argument('--days-ahead', type=int, help='今日から指定日数先までの各日付のHTMLを取得する（予告セールの確認用）')
+    parser.add_argument('--fetch-workers', type=int, default=4, help='複数のHTMLを取得する際の同時接続数（デフォルト: 4）')
     parser.add_argument('--notify', action='store_true', help='Discordに通知する')
     parser.add_argument('--output', type=str, help='出力テキストファイル名（.envファイルの設定を上書き、デフォルト: sales_output.txt）')
     parser.add_argument('--fetch-only', action='store_true', help='HTMLの取得のみを行う')
@@ -456,11 +1279,38 @@ def main():
     parser.add_argument('--shops', type=str, help='対象店舗のリスト（カンマ区切り）')
     parser.add_argument('--all-shops', action='store_true', help='全店舗を対象にする')
     parser.add_argument('--discord-webhook', type=str, help='Discord Webhook URL（.envファイルの設定を上書き）')
-    parser.add_argument('--history-file', type=str, help='通知履歴ファイルパス（デフォルト: ./data/notification_history.json）')
+    parser.add_argument('--subscriptions', type=str, help='通知先ごとの購読店舗の設定ファイル（JSON、指定した場合は--shopsと--discord-webhookより優先）')
+    parser.add_argument('--history-file', type=str, help='通知履歴ファイルパス（デフォルト: ./data/notification_history.db、拡張子が.jsonの場合はJSON形式）')
+    parser.add_argument('--migrate-history', type=str, metavar='JSON_FILE', help='JSON形式の通知履歴を--history-fileのSQLiteに移行して終了する')
+    parser.add_argument('--history-bloom', action='store_true', help='ブルームフィルタで通知済みかどうかを事前判定する')
+    parser.add_argument('--compact-history', action='store_true', help='期限切れの通知履歴を削除して終了する')
+    parser.add_argument('--history-grace-days', type=int, help='セール終了後に通知履歴を保持する日数（デフォルト: 7）')
+    parser.add_argument('--history-max-age-days', type=int, help='通知日時から通知履歴を保持する最大日数（デフォルト: 365、0で無制限）')
     parser.add_argument('--force-notify', action='store_true', help='通知履歴を無視して強制的に通知する')
+    parser.add_argument('--latest-only', action='store_true', help='最新のHTMLファイルのみを解析する')
+    parser.add_argument('--export', action='store_true', help='すべてのスナップショットのセール情報を日付ごとのgzip圧縮CSVにエクスポートして終了する')
+    parser.add_argument('--export-dir', type=str, help='エクスポート先ディレクトリ（.envファイルの設定を上書き、デフォルト: ./data/export）')
+    parser.add_argument('--workers', type=int, help='HTMLファイルを並列に解析するプロセス数（.envファイルの設定を上書き、デフォルト: 1）')
+    parser.add_argument('--index', action='store_true', help='実行のたびに新しいスナップショットのセール情報を全文検索用の索引に追加する')
+    parser.add_argument('--search', type=str, metavar='QUERY', help='索引からタイトル・セール内容・注意事項に検索語を含むセール情報を検索して終了する（--shopsで店舗を絞り込み）')
+    parser.add_argument('--search-limit', type=int, default=50, help='検索結果の最大件数（デフォルト: 50）')
+    parser.add_argument('--diff', action='store_true', help='最新のHTMLを前回処理したHTMLと比較し、追加・変更・終了したセール情報のみを出力・通知する')
+    parser.add_argument('--no-parse-cache', action='store_true', help='解析キャッシュを使用せずにすべてのHTMLファイルを再解析する')
+    parser.add_argument('--parser', type=str, choices=PARSER_BACKENDS, help='HTML解析バックエンド（デフォルト: lxml）')
+    parser.add_argument('--profile-dir', type=str, help='実行ごとのcProfileの結果を保存するディレクトリ（.envファイルの設定を上書き）')
+    parser.add_argument('--check-parser-parity', action='store_true', help='解析バックエンド間で抽出結果が一致するか検証して終了する')
     parser.add_argument('--debug', action='store_true', help='デバッグモード（詳細情報を表示）')
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+def create_scraper(args):
+    """コマンドライン引数と環境変数からスクレイパーを作成
     
+    Args:
+        args: parse_args() の戻り値
+        
+    Returns:
+        KaldiSaleScraper
+    """
     # Discord Webhook URLを取得（優先順位: コマンドライン引数 > 環境変数）
     webhook_url = None
     if args.notify:
@@ -477,67 +1327,325 @@ def main():
         # デフォルトの対象店舗リスト
         target_shops = ["池袋店", "渋谷店", "新宿店", "立川若葉ケヤキモール店"]
     
+    # 通知先ごとの購読店舗（優先順位: コマンドライン引数 > 環境変数）
+    subscriptions_file = args.subscriptions or os.environ.get("SUBSCRIPTIONS_FILE")
+    subscriptions = load_subscriptions(subscriptions_file) if subscriptions_file else None
+    
     # デバッグモードの設定（コマンドラインオプション > 環境変数）
     debug_mode = args.debug or os.environ.get("DEBUG") == "1"
     
     # 履歴ファイルパスの設定
-    history_file = args.history_file or os.environ.get("HISTORY_FILE") or "./data/notification_history.json"
+    history_file = args.history_file or os.environ.get("HISTORY_FILE") or "./data/notification_history.db"
+    
+    # 通知履歴の保持ポリシー（優先順位: コマンドライン引数 > 環境変数 > デフォルト値）
+    grace_days = args.history_grace_days
+    if grace_days is None:
+        grace_days = int(os.environ.get("HISTORY_GRACE_DAYS", "7"))
+    max_age_days = args.history_max_age_days
+    if max_age_days is None:
+        max_age_days = int(os.environ.get("HISTORY_MAX_AGE_DAYS", "365"))
+    retention_policy = RetentionPolicy(grace_days=grace_days, max_age_days=max_age_days or None)
+    
+    # 解析バックエンド（優先順位: コマンドライン引数 > 環境変数 > デフォルト値）
+    parser_backend = args.parser or os.environ.get("PARSER_BACKEND") or "lxml"
+    
+    # 解析プロセス数（優先順位: コマンドライン引数 > 環境変数 > デフォルト値）
+    parse_workers = args.workers or int(os.environ.get("PARSE_WORKERS", "1"))
     
     # スクレイパーインスタンス
-    scraper = KaldiSaleScraper(
+    return KaldiSaleScraper(
         html_dir="./data",
         target_shops=target_shops,
         webhook_url=webhook_url,
         debug=debug_mode,
-        history_file=history_file
+        history_file=history_file,
+        use_parse_cache=not args.no_parse_cache,
+        parser_backend=parser_backend,
+        retention_policy=retention_policy,
+        fetch_workers=args.fetch_workers,
+        parse_workers=parse_workers,
+        use_sale_index=args.index or os.environ.get("SALE_INDEX") == "1",
+        subscriptions=subscriptions,
+        use_bloom_filter=args.history_bloom or os.environ.get("HISTORY_BLOOM") == "1"
     )
+
+def run(scraper, args):
+    """HTMLの取得からセール情報の出力・通知までを1回実行
+    
+    実行時間と段階ごとの経過時間は scraper.metrics に記録する。
+    --profile-dir（環境変数: PROFILE_DIR）が指定されている場合は、
+    cProfileの結果を実行ごとにファイルに保存する。
+    
+    Args:
+        scraper: KaldiSaleScraper
+        args: parse_args() の戻り値
+        
+    Returns:
+        実行結果の辞書（status, found, new, notified）
+    """
+    profile_dir = args.profile_dir or os.environ.get("PROFILE_DIR")
+    profiler = None
+    if profile_dir:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    status = "error"
+    start = time.perf_counter()
+    try:
+        result = _run(scraper, args)
+        status = result["status"]
+        return result
+    finally:
+        scraper.metrics.observe("run_seconds", time.perf_counter() - start)
+        scraper.metrics.inc("runs_total", status=status)
+        if profiler:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            profile_file = Path(profile_dir) / f"run_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.prof"
+            profiler.dump_stats(profile_file)
+            print(f"プロファイル結果を保存しました: {profile_file}")
+
+def _run(scraper, args):
+    """run() の本体（取得・解析・重複判定・出力・通知）"""
+    result = {"status": "done", "found": 0, "new": 0, "notified": False}
+    metrics = scraper.metrics
     
     # no-fetchオプションが指定されていない場合はHTMLを取得
     if not args.no_fetch:
-        # force-fetchオプションを渡して、同じ日付のHTMLが存在しても強制取得するかどうかを制御
-        html_path = scraper.fetch_and_save_html(args.url, force_fetch=args.force_fetch)
-        if not html_path:
-            print("HTMLの取得に失敗しました")
-            return
+        with metrics.timer("stage_seconds", stage="fetch"):
+            # 取得するURLの決定（優先順位: URL指定 > 期間指定 > 日数指定 > 今日の日付）
+            if args.url:
+                urls = args.url
+            elif args.date_range:
+                urls = scraper.get_kaldi_urls(*args.date_range)
+            elif args.days_ahead is not None:
+                today = datetime.date.today()
+                urls = scraper.get_kaldi_urls(today, today + datetime.timedelta(days=args.days_ahead))
+            else:
+                urls = [None]
         
-        # fetch-onlyオプションが指定されている場合はここで終了
-        if args.fetch_only:
-            return
-    
-    # セール情報を抽出
-    sales_info = scraper.parse_html_files()
-    if not sales_info:
-        print("セール情報は見つかりませんでした")
-        return
+            # force-fetchオプションを渡して、同じ日付のHTMLが存在しても強制取得するかどうかを制御
+            if urls == [None]:
+                html_paths = [scraper.fetch_and_save_html(force_fetch=args.force_fetch)]
+            else:
+                html_paths = scraper.fetch_many_html(urls, force_fetch=args.force_fetch)
+            if not any(html_paths):
+                print("HTMLの取得に失敗しました")
+                result["status"] = "fetch_failed"
+                return result
         
+            # fetch-onlyオプションが指定されている場合はここで終了
+            if args.fetch_only:
+                result["status"] = "fetched"
+                return result
+    
+    # 出力ファイル名の決定（優先順位: コマンドラインオプション > 環境変数 > デフォルト値）
+    output_file = args.output or os.environ.get("OUTPUT_FILE") or "sales_output.txt"
+    
+    # 差分モード（優先順位: コマンドライン引数 > 環境変数）
+    mode = "diff" if args.diff or os.environ.get("DIFF_MODE") == "1" else "notify"
+    
+    # 解析対象のHTMLファイルが前回の実行から変わっていない場合は、解析せずに終了する
+    fingerprint = None
+    if not args.force_notify:
+        fingerprint = scraper.processed_fingerprint(mode, latest_only=args.latest_only)
+        if scraper.is_unchanged_since_last_run(fingerprint):
+            print("HTMLファイルは前回の実行から変更されていません。新しいセール情報はありません。")
+            result["status"] = "unchanged"
+            return result
+    
+    if mode == "diff":
+        result = _run_diff(scraper, args, result, output_file)
+    else:
+        result = _run_notify(scraper, args, result, output_file)
+    
+    # 新しいスナップショットのセール情報を全文検索用の索引に追加（優先順位: コマンドライン引数 > 環境変数）
+    if scraper.use_sale_index:
+        with metrics.timer("stage_seconds", stage="index"):
+            indexed, added = scraper.update_sale_index()
+        if indexed:
+            print(f"{indexed}件のスナップショットを索引に追加しました（新しいセール情報: {added}件）")
+    
+    scraper.save_last_processed(fingerprint)
+    return result
+
+def _run_notify(scraper, args, result, output_file):
+    """通常モードの run() の本体
+    
+    すべてのHTMLファイル（--latest-only の場合は最新のファイル）のセール情報から、
+    未通知のセール情報のみを出力・通知する。
+    """
+    metrics = scraper.metrics
+    
+    # セール情報を1件ずつ抽出し、フィルタリングと出力まで逐次処理する
+    found_count = 0
+    new_sales = []
+    
+    def count_found(sales):
+        nonlocal found_count
+        for sale in sales:
+            found_count += 1
+            yield sale
+    
+    def collect_new(sales):
+        for sale in sales:
+            new_sales.append(sale)
+            yield sale
+    
+    pipeline = count_found(scraper.iter_sales(latest_only=args.latest_only))
+    
     # 未通知のセール情報だけをフィルタリング（--force-notifyが指定されていない場合）
     if not args.force_notify:
-        new_sales = scraper.filter_new_sales(sales_info)
-        if not new_sales:
-            print("新しいセール情報はありません。すべて既に通知済みです。")
-            return
-        sales_info = new_sales
+        pipeline = scraper.iter_new_sales(pipeline)
     else:
-        print(f"強制実行モード: 重複チェックをスキップします。{len(sales_info)}件のセール情報を処理します。")
+        print("強制実行モード: 重複チェックをスキップします。")
     
-    # 出力ファイル名の決定（優先順位: コマンドラインオプション > 環境変数 > デフォルト値）
-    output_file = args.output or os.environ.get("OUTPUT_FILE") or "sales_output.txt"
+    # テキストファイルに保存（新しいセール情報がない場合はファイルを更新しない）
+    # 解析・重複判定・保存は逐次処理のため、まとめて1つの段階として計測する
+    with metrics.timer("stage_seconds", stage="process"):
+        scraper.save_to_text_file(collect_new(pipeline), output_file)
+    
+    result["found"] = found_count
+    result["new"] = len(new_sales)
     
-    # テキストファイルに保存
-    scraper.save_to_text_file(sales_info, output_file)
+    if not found_count:
+        print("セール情報は見つかりませんでした")
+        result["status"] = "no_sales"
+        return result
+    
+    if not new_sales:
+        print("新しいセール情報はありません。すべて既に通知済みです。")
+        result["status"] = "no_new_sales"
+        return result
+    
+    sales_info = new_sales
     print(f"{len(sales_info)}件のセール情報を{output_file}に保存しました")
     
     # 履歴に追加（ファイル保存時に重複排除のため）
     # --notify が指定されていない場合も履歴には追加する
     if not args.force_notify:
-        scraper.update_notification_history(sales_info)
+        with metrics.timer("stage_seconds", stage="history"):
+            scraper.update_notification_history(sales_info)
         print(f"{len(sales_info)}件のセール情報を履歴に追加しました")
     
     # Discord通知（--notifyオプションがある場合のみ）
-    if args.notify and webhook_url:
+    if args.notify and scraper.webhook_urls:
         # 履歴はすでに更新されているので、update_history=Falseを指定
-        scraper.notify_discord(sales_info, update_history=False)
-        print(f"{len(sales_info)}件のセール情報をDiscordに通知しました")
+        with metrics.timer("stage_seconds", stage="notify"):
+            result["notified"] = scraper.notify_discord(sales_info, update_history=False)
+        if result["notified"]:
+            print(f"{len(sales_info)}件のセール情報をDiscordに通知しました")
+        else:
+            print("Discordへの通知に一部失敗しました")
+    
+    return result
+
+def _run_diff(scraper, args, result, output_file):
+    """差分モードの run() の本体
+    
+    最新のスナップショットを前回処理したスナップショットと比較し、
+    追加・変更・状態の変化・終了したセール情報のみを出力・通知する。
+    """
+    metrics = scraper.metrics
+    
+    with metrics.timer("stage_seconds", stage="process"):
+        changes, latest_file, latest_sales = scraper.diff_latest_snapshot()
+        
+        # 追加されたセール情報は通知履歴でも確認する（初回実行時や、一度終了して再び掲載されたセール）
+        if not args.force_notify:
+            added = [change.sale for change in changes if change.kind == ADDED]
+            new_ids = {id(sale) for sale in scraper.iter_new_sales(added)}
+            changes = [change for change in changes if change.kind != ADDED or id(change.sale) in new_ids]
+        else:
+            print("強制実行モード: 重複チェックをスキップします。")
+        
+        scraper.save_to_text_file(changes, output_file, format_message=scraper.format_change_message)
+    
+    result["found"] = sum(1 for sale in latest_sales if scraper._is_target_shop(sale["shop"]))
+    result["new"] = len(changes)
+    result["changes"] = {}
+    for change in changes:
+        result["changes"][change.kind] = result["changes"].get(change.kind, 0) + 1
+    
+    if not result["found"] and not changes:
+        print("セール情報は見つかりませんでした")
+        result["status"] = "no_sales"
+        return result
+    
+    # 次回はこのスナップショットと比較する
+    with metrics.timer("stage_seconds", stage="history"):
+        scraper.save_diff_baseline(latest_file, latest_sales)
+        if not args.force_notify:
+            scraper.update_notification_history([change.sale for change in changes if change.kind != ENDED])
+    
+    if not changes:
+        print("前回のスナップショットから変更されたセール情報はありません。")
+        result["status"] = "no_new_sales"
+        return result
+    
+    summary = "、".join(f"{kind}: {count}件" for kind, count in result["changes"].items())
+    print(f"{len(changes)}件の変更（{summary}）を{output_file}に保存しました")
+    
+    # Discord通知（--notifyオプションがある場合のみ）
+    if args.notify and scraper.webhook_urls:
+        with metrics.timer("stage_seconds", stage="notify"):
+            result["notified"] = scraper.notify_changes(changes)
+        if result["notified"]:
+            print(f"{len(changes)}件の変更をDiscordに通知しました")
+        else:
+            print("Discordへの通知に一部失敗しました")
+    
+    return result
+
+def main():
+    # .envファイルを読み込む
+    load_dotenv()
+    
+    args = parse_args()
+    scraper = create_scraper(args)
+    
+    # JSON形式の通知履歴をSQLiteに移行する場合
+    if args.migrate_history:
+        if scraper.history_file.suffix == ".json":
+            print("移行先の履歴ファイルにはSQLiteのパス（例: ./data/notification_history.db）を指定してください")
+            return
+        count = migrate_json_to_sqlite(args.migrate_history, scraper.history_file, debug=scraper.debug)
+        print(f"通知履歴をSQLiteに移行しました: {args.migrate_history} -> {scraper.history_file} ({count}件)")
+        return
+    
+    # 通知履歴のコンパクションのみを行う場合
+    if args.compact_history:
+        result = scraper.compact_history()
+        print(f"通知履歴をコンパクションしました: {scraper.history_file}")
+        print(f"  件数: {result['count_before']}件 -> {result['count_after']}件")
+        print(f"  サイズ: {result['size_before']}バイト -> {result['size_after']}バイト")
+        return
+    
+    # セール情報のエクスポートのみを行う場合
+    if args.export:
+        export_dir = args.export_dir or os.environ.get("EXPORT_DIR") or "./data/export"
+        exported, rows = scraper.export_sales(export_dir)
+        print(f"セール情報をエクスポートしました: {export_dir} ({exported}スナップショット、{rows}行)")
+        return
+    
+    # 索引からセール情報を検索する場合（店舗は --shops を指定した場合のみ絞り込む）
+    if args.search:
+        shops = [shop.strip() for shop in args.shops.split(',')] if args.shops else None
+        results = scraper.search_sales(args.search, shops=shops, limit=args.search_limit)
+        for sale in results:
+            print(f"{sale['last_seen']} {sale['shop']} [{sale['status']}] {sale['title']} ({sale['date']})")
+            print(f"    {sale['detail']}")
+        print(f"{len(results)}件のセール情報が見つかりました: {args.search}")
+        return
+    
+    # 解析バックエンドの検証のみを行う場合
+    if args.check_parser_parity:
+        if not scraper.check_parser_parity():
+            raise SystemExit(1)
+        return
+    
+    run(scraper, args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
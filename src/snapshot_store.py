@@ -0,0 +1,170 @@
+import os
+import gzip
+import json
+import hashlib
+import datetime
+from pathlib import Path
+
+from history import file_lock
+
+
+def open_html(path):
+    """HTMLファイルをバイナリモードで開く（.gzの場合は展開しながら読み込む）
+
+    Args:
+        path: HTMLファイルパス
+
+    Returns:
+        バイナリモードのファイルオブジェクト
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+class SnapshotStore:
+    """取得したHTMLのスナップショットストア
+
+    HTMLは内容のSHA256ハッシュをファイル名にしてgzip圧縮で保存し、
+    同じ内容のHTMLは1つのファイルにまとめる。
+    日付ごとの取得履歴はマニフェスト（manifest.json）で管理し、
+    日付からのスナップショット検索はディレクトリを走査せずにマニフェストで行う。
+    マニフェストの更新はロックファイルで排他制御し、別のプロセス（CLIとサーバーなど）が
+    更新したマニフェストは参照時に読み込み直す。
+    """
+
+    def __init__(self, root, debug=False):
+        """
+        初期化
+
+        Args:
+            root: スナップショットを保存するディレクトリパス
+            debug: デバッグモードフラグ
+        """
+        self.root = Path(root)
+        self.manifest_file = self.root / "manifest.json"
+        self.lock_file = self.root / "manifest.json.lock"
+        self.debug = debug
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest_signature = None
+        self.manifest = self._load_manifest()
+
+    def _signature(self):
+        """マニフェストのサイズと更新日時（ファイルがない場合はNone）"""
+        try:
+            stat = self.manifest_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_manifest(self):
+        self.manifest_signature = self._signature()
+        if self.manifest_signature is None:
+            return {"snapshots": {}, "dates": {}}
+        with open(self.manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        tmp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+        self.manifest_signature = self._signature()
+
+    def refresh(self):
+        """別のプロセスがマニフェストを更新していれば読み込み直す
+
+        Returns:
+            読み込み直したかどうか
+        """
+        if self._signature() == self.manifest_signature:
+            return False
+        if self.debug:
+            print(f"マニフェストが更新されたため読み込み直します: {self.manifest_file}")
+        self.manifest = self._load_manifest()
+        return True
+
+    def path_for(self, sha256):
+        """ハッシュに対応するスナップショットファイルパス"""
+        return self.root / f"{sha256}.html.gz"
+
+    def put(self, content, date, url=None):
+        """HTMLをスナップショットとして保存
+
+        同じ内容のスナップショットが既にある場合はファイルを書き込まず、
+        日付の取得履歴だけを追加する。
+        ロックを取得してからマニフェストを読み込み直して追加するため、
+        複数のプロセスが同時に保存しても取得履歴は失われない。
+
+        Args:
+            content: HTMLのバイト列
+            date: YYYYMMDD形式の日付文字列
+            url: 取得元のURL
+
+        Returns:
+            (スナップショットファイルパス, 新しい内容だったかどうか) のタプル
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self.path_for(sha256)
+        now = datetime.datetime.now().isoformat()
+
+        with file_lock(self.lock_file):
+            self.manifest = self._load_manifest()
+
+            is_new = sha256 not in self.manifest["snapshots"]
+            if is_new:
+                tmp_file = path.with_name(path.name + ".tmp")
+                with gzip.open(tmp_file, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_file, path)
+                self.manifest["snapshots"][sha256] = {
+                    "size": len(content),
+                    "compressed_size": path.stat().st_size,
+                    "first_seen": now
+                }
+
+            entries = self.manifest["dates"].setdefault(date, [])
+            entries.append({"sha256": sha256, "fetched_at": now, "url": url})
+            self._save_manifest()
+
+        if self.debug:
+            if is_new:
+                print(f"スナップショットを保存しました: {path} ({len(content)} -> {path.stat().st_size} バイト)")
+            else:
+                print(f"同じ内容のスナップショットが既にあります: {path}")
+
+        return path, is_new
+
+    def find_by_date(self, date):
+        """指定日付の最新のスナップショットを取得
+
+        Args:
+            date: YYYYMMDD形式の日付文字列
+
+        Returns:
+            スナップショットファイルパス、または見つからない場合はNone
+        """
+        self.refresh()
+        entries = self.manifest["dates"].get(date)
+        if not entries:
+            return None
+        return self.path_for(entries[-1]["sha256"])
+
+    def last_listed(self):
+        """スナップショットごとの最新のページの日付と取得日時
+
+        同じ内容のスナップショットが複数の日付で取得されている場合は、最も新しい日付の取得履歴を使う。
+
+        Returns:
+            スナップショットファイルパス: (YYYYMMDD形式の日付, 取得日時（ISO形式）) の辞書（日付・取得日時の古い順）
+        """
+        self.refresh()
+        listed = {}
+        for date, entries in self.manifest["dates"].items():
+            for entry in entries:
+                path = self.path_for(entry["sha256"])
+                key = (date, entry["fetched_at"])
+                if key > listed.get(path, ("", "")):
+                    listed[path] = key
+        return dict(sorted(listed.items(), key=lambda item: item[1]))
@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+
+from sale_index import KeywordMatcher, normalize, sale_text
+
+
+class Subscription:
+    """通知先（Discord Webhook）と、その通知先が購読する店舗・キーワードの組
+
+    Attributes:
+        name: 通知先の名前（ログ表示用）
+        webhook_url: Discord Webhook URL
+        shops: 購読する店舗名のfrozenset（Noneの場合は全店舗）
+        keywords: 購読するキーワード（正規化済み）のfrozenset（Noneの場合はすべてのセール情報）
+    """
+
+    def __init__(self, webhook_url, shops=None, name=None, keywords=None):
+        self.webhook_url = webhook_url
+        self.shops = frozenset(shops) if shops else None
+        keywords = frozenset(normalize(keyword) for keyword in keywords or () if normalize(keyword))
+        self.keywords = keywords or None
+        self.name = name or webhook_url[:30]
+
+    def __repr__(self):
+        keywords = f", keywords={sorted(self.keywords)}" if self.keywords else ""
+        return f"Subscription({self.name!r}, shops={sorted(self.shops) if self.shops else '全店舗'}{keywords})"
+
+
+class SubscriptionTable:
+    """購読設定の一覧と、店舗名から購読者を引く索引
+
+    店舗名 -> 購読者リストの辞書を作っておき、
+    各セール情報の通知先を購読者の数によらず1回の辞書検索で求める。
+    キーワードを購読する通知先がある場合は、全通知先のキーワードの索引（KeywordMatcher）を作っておき、
+    各セール情報に含まれるキーワードを1回だけ求めて振り分ける。
+    """
+
+    def __init__(self, subscriptions):
+        """
+        初期化
+
+        Args:
+            subscriptions: Subscriptionのリスト
+        """
+        self.subscriptions = list(subscriptions)
+        # 全店舗を購読する通知先
+        self.all_shops = [sub for sub in self.subscriptions if sub.shops is None]
+        # 店舗名 -> 購読者リスト（全店舗の購読者も含める）
+        self.shop_index = {}
+        for sub in self.subscriptions:
+            for shop in sub.shops or ():
+                self.shop_index.setdefault(shop, list(self.all_shops)).append(sub)
+        self.keyword_matcher = KeywordMatcher(
+            keyword for sub in self.subscriptions for keyword in sub.keywords or ()
+        )
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    @property
+    def webhook_urls(self):
+        """通知先のWebhook URLのリスト（重複を除いた購読順）"""
+        return list(dict.fromkeys(sub.webhook_url for sub in self.subscriptions))
+
+    @property
+    def target_shops(self):
+        """いずれかの通知先が購読している店舗のリスト（全店舗の購読者がいる場合はNone）"""
+        if self.all_shops:
+            return None
+        return sorted(self.shop_index)
+
+    def follows(self, shop):
+        """店舗を購読している通知先がいるかどうか"""
+        return bool(self.all_shops) or shop in self.shop_index
+
+    def subscribers_for(self, shop):
+        """店舗を購読している通知先のリスト"""
+        return self.shop_index.get(shop, self.all_shops)
+
+    def route(self, sales_info, sale_of=None):
+        """セール情報を購読している通知先ごとに振り分ける
+
+        キーワードを購読している通知先には、購読している店舗のセール情報のうち、
+        タイトル・セール内容・注意事項にいずれかのキーワードを含むものだけを振り分ける。
+
+        Args:
+            sales_info: セール情報リスト
+            sale_of: 1件からセール情報を取り出す関数（Noneの場合は1件がセール情報）
+
+        Returns:
+            Subscription: セール情報リスト の辞書（購読順）
+        """
+        routed = {sub: [] for sub in self.subscriptions}
+        for item in sales_info:
+            sale = sale_of(item) if sale_of else item
+            subscribers = self.subscribers_for(sale.get("shop", ""))
+            matched = None
+            for sub in subscribers:
+                if sub.keywords:
+                    # 含まれるキーワードはセール情報ごとに1回だけ求める
+                    if matched is None:
+                        matched = self.keyword_matcher.match(sale_text(sale))
+                    if sub.keywords.isdisjoint(matched):
+                        continue
+                routed[sub].append(item)
+        return routed
+
+
+def load_subscriptions(path):
+    """購読設定ファイルを読み込む
+
+    ファイル形式（JSON）:
+        [
+            {"name": "池袋チャンネル", "webhook_url": "https://...", "shops": ["池袋店", "渋谷店"]},
+            {"name": "コーヒー豆チャンネル", "webhook_url": "https://...", "keywords": ["コーヒー豆"]},
+            {"name": "全店舗チャンネル", "webhook_url": "https://..."}
+        ]
+
+    shops を省略するか空にすると全店舗を購読する。
+    keywords を指定すると、いずれかのキーワードを含むセール情報のみを購読する。
+
+    Args:
+        path: 購読設定ファイルパス
+
+    Returns:
+        SubscriptionTable
+    """
+    with open(Path(path), "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    return SubscriptionTable(
+        Subscription(item["webhook_url"], shops=item.get("shops"), name=item.get("name"),
+                     keywords=item.get("keywords"))
+        for item in data
+    )
@@ -0,0 +1,118 @@
+"""HTMLの取得（条件付きリクエスト・再試行）をローカルのスタブサーバーで確認する
+
+benchmarks/stub_kaldi_server.py をバックグラウンドのスレッドで起動して取得する。
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+import datetime
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from fetcher import SnapshotFetcher  # noqa: E402
+from scraper import KaldiSaleScraper, parse_args  # noqa: E402
+from stub_kaldi_server import StubKaldiServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    server = StubKaldiServer(("127.0.0.1", 0), num_shops=20).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = KaldiSaleScraper(tmp_path / "html", target_shops=None, history_file=tmp_path / "history.db")
+    # 再試行の待機はしない
+    scraper._fetcher = SnapshotFetcher(state_file=scraper.html_dir / "fetch_state.json", backoff=0,
+                                       sleep=lambda seconds: None, metrics=scraper.metrics)
+    return scraper
+
+
+def snapshot_files(scraper):
+    return sorted(scraper.html_dir.glob("snapshots/*.html.gz"))
+
+
+def test_fetch_and_not_modified(server, scraper):
+    urls = [server.url_for("2026-10-15"), server.url_for("2026-10-16")]
+
+    paths = scraper.fetch_many_html(urls)
+    assert all(paths)
+    assert len(snapshot_files(scraper)) == 2
+    assert server.requests_count == 2
+
+    # 強制取得でも内容が変わっていなければ304になり、新しいファイルは作らない
+    assert scraper.fetch_many_html(urls, force_fetch=True) == paths
+    assert server.not_modified_count == 2
+    assert len(snapshot_files(scraper)) == 2
+
+    # 内容が変わった日付だけ新しいスナップショットを保存する
+    server.set_page("2026-10-16", "<html><body>更新後</body></html>")
+    new_paths = scraper.fetch_many_html(urls, force_fetch=True)
+    assert new_paths[0] == paths[0]
+    assert new_paths[1] != paths[1]
+    assert len(snapshot_files(scraper)) == 3
+
+
+def test_retry_on_server_error(server, scraper):
+    server.fail_first = 2
+
+    path = scraper.fetch_and_save_html(server.url_for("2026-10-15"))
+    assert path is not None
+    assert server.failed_count == 2
+    assert server.requests_count == 3
+    assert scraper.metrics.snapshot()["fetch_retries_total"][0]["value"] == 2
+
+
+def test_date_range_urls(server, scraper):
+    args = parse_args(["--date-range", "2026-10-15:2026-10-17"])
+    assert args.date_range == (datetime.date(2026, 10, 15), datetime.date(2026, 10, 17))
+    urls = [url.replace("https://map.kaldi.co.jp", f"http://127.0.0.1:{server.server_address[1]}")
+            for url in scraper.get_kaldi_urls(*args.date_range)]
+
+    assert all(scraper.fetch_many_html(urls))
+    assert len(snapshot_files(scraper)) == 3
+
+
+@pytest.mark.parametrize("value", ["2026-10-15..2026-10-17", "2026/10/15:2026/10/17", "2026-10-17:2026-10-15"])
+def test_invalid_date_range(value, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["--date-range", value])
+    assert "--date-range" in capsys.readouterr().err
+
+
+def latest_sales(scraper):
+    return [dict(sale) for sale in scraper.iter_sales(latest_only=True, filter_shops=False)]
+
+
+def test_latest_after_backfill(server, scraper):
+    today = datetime.date.today()
+    today_path = scraper.fetch_and_save_html(server.url_for(today))
+    expected = latest_sales(scraper)
+
+    # 今日のページの後に過去の日付をまとめて取得しても、最新は今日のページのまま
+    backfill = [server.url_for(today - datetime.timedelta(days=days)) for days in range(17, 0, -1)]
+    assert all(scraper.fetch_many_html(backfill))
+    assert scraper._latest_html_file(scraper._list_html_files()) == today_path
+    assert latest_sales(scraper) == expected
+    assert scraper.diff_latest_snapshot()[1] == today_path
+
+
+def test_latest_after_days_ahead(server, scraper):
+    today = datetime.date.today()
+    today_path = scraper.fetch_and_save_html(server.url_for(today))
+
+    # 先の日付のページ（--days-ahead）は、後に取得しても最新として扱わない
+    ahead = [server.url_for(today + datetime.timedelta(days=days)) for days in range(1, 4)]
+    assert all(scraper.fetch_many_html(ahead))
+    listed = scraper._list_html_files()
+    assert [path for path, _ in listed][0] == today_path
+    assert scraper._latest_html_file(listed) == today_path
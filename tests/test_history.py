@@ -0,0 +1,39 @@
+"""通知履歴ストアを複数のプロセス（CLIとサーバーなど）から使用した場合の動作を確認する
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from history import open_history_store  # noqa: E402
+
+
+def entry():
+    return {"notified_at": "2026-10-17T08:00:00", "shop": "池袋店", "title": "コーヒー豆10%OFF",
+            "date": "2026/10/15〜10/20"}
+
+
+@pytest.mark.parametrize("name", ["history.json", "history.db"])
+@pytest.mark.parametrize("bloom", [False, True], ids=["plain", "bloom"])
+def test_refresh_sees_other_writer(tmp_path, name, bloom):
+    server_store = open_history_store(tmp_path / name, bloom=bloom)
+    cli_store = open_history_store(tmp_path / name, bloom=bloom)
+
+    server_store.add_many({"a1": entry()})
+    assert "a1" in server_store
+
+    cli_store.add_many({"b1": entry()})
+    server_store.refresh()
+    assert "b1" in server_store
+    assert len(server_store) == 2
+
+    # 読み込み直す前に追加した場合も、別のプロセスの履歴を失わない
+    cli_store.add_many({"b2": entry()})
+    server_store.add_many({"a2": entry()})
+    assert "b2" in server_store
+    assert sorted(open_history_store(tmp_path / name).load_all()) == ["a1", "a2", "b1", "b2"]
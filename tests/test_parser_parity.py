@@ -0,0 +1,104 @@
+"""解析バックエンド（bs4・lxml）の抽出結果の一致を保存済みのセールページで確認する
+
+tests/fixtures のHTMLはカルディのセール情報ページと同じ構造で、
+kaldi_sale_malformed.html には閉じタグの省略やリンク内のscriptなど、崩れたマークアップを含めている。
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+import shutil
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from lxml_extractor import iter_sales  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+from scraper import EXTRACTOR_VERSION, KaldiSaleScraper  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+FIXTURES = sorted(FIXTURES_DIR.glob("*.html"))
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    return KaldiSaleScraper(tmp_path, target_shops=None, history_file=tmp_path / "history.db",
+                            use_parse_cache=False)
+
+
+def extract(scraper, html_file, backend):
+    return [dict(sale) for sale in scraper._extract_with_backend(backend, html_file.read_bytes(),
+                                                                 filter_shops=False)]
+
+
+@pytest.mark.parametrize("html_file", FIXTURES, ids=lambda path: path.name)
+def test_backends_agree(scraper, html_file):
+    expected = extract(scraper, html_file, "bs4")
+    assert expected
+    assert extract(scraper, html_file, "lxml") == expected
+    with open(html_file, "rb") as f:
+        assert [dict(sale) for sale in iter_sales(f)] == expected
+
+
+def test_check_parser_parity(scraper):
+    assert scraper.check_parser_parity(FIXTURES)
+
+
+def test_malformed_markup(scraper):
+    sales = {sale["shop"]: sale for sale in extract(scraper, FIXTURES_DIR / "kaldi_sale_malformed.html", "lxml")}
+
+    # セール情報テーブル外の行、店舗名のない行、セール内容のない行は対象外
+    assert sorted(sales) == ["A店", "B店", "C店（リンクなし）", "E店", "F店", "G店"]
+    # 閉じタグを省略した<p>は次の<p>で閉じる（セール期間に次の段落を含めない）
+    assert sales["A店"]["date"] == "2026/01/01〜01/03"
+    assert sales["A店"]["detail"] == "Dx"
+    # script・style・コメントの文字列は含めない
+    assert sales["F店"]["shop"] == "F店"
+    assert sales["E店"]["shop"] == "E店"
+    assert sales["E店"]["title"] == "コメント入り"
+    assert sales["C店（リンクなし）"]["url"] == ""
+    assert sales["C店（リンクなし）"]["detail"] == "パスタ <10%OFF> &\xa0調味料"
+
+
+def test_target_shops_filter(tmp_path):
+    scraper = KaldiSaleScraper(tmp_path, target_shops=["渋谷店", "新宿店"], history_file=tmp_path / "history.db",
+                               use_parse_cache=False)
+    raw = (FIXTURES_DIR / "kaldi_sale_basic.html").read_bytes()
+    for backend in ("bs4", "lxml"):
+        shops = [sale["shop"] for sale in scraper._extract_with_backend(backend, raw)]
+        assert shops == ["渋谷店", "新宿店"]
+
+
+def test_parse_cache_is_keyed_by_backend(tmp_path):
+    html_file = tmp_path / "kaldi_sale_20261015.html"
+    shutil.copy(FIXTURES_DIR / "kaldi_sale_basic.html", html_file)
+
+    lxml_scraper = KaldiSaleScraper(tmp_path, target_shops=None, history_file=tmp_path / "history.db",
+                                    parser_backend="lxml")
+    sales = list(lxml_scraper.iter_sales(filter_shops=False))
+    assert len(sales) == 4
+
+    cache_file = lxml_scraper.parse_cache_file
+    assert ParseCache(cache_file, EXTRACTOR_VERSION, parser_backend="lxml").get(html_file) == sales
+    # 別のバックエンドではlxmlで解析した結果を使わない
+    assert ParseCache(cache_file, EXTRACTOR_VERSION, parser_backend="bs4").get(html_file) is None
+
+    bs4_scraper = KaldiSaleScraper(tmp_path, target_shops=None, history_file=tmp_path / "history.db",
+                                   parser_backend="bs4")
+    assert list(bs4_scraper.iter_sales(filter_shops=False)) == sales
+    assert bs4_scraper.metrics.snapshot().get("parse_cache_hits_total") is None
+
+
+@pytest.mark.parametrize("parse_workers", [1, 2])
+@pytest.mark.parametrize("use_parse_cache", [True, False], ids=["cache", "no-cache"])
+def test_filter_shops_flag(tmp_path, use_parse_cache, parse_workers):
+    for date in ("20261015", "20261016"):
+        shutil.copy(FIXTURES_DIR / "kaldi_sale_basic.html", tmp_path / f"kaldi_sale_{date}.html")
+    scraper = KaldiSaleScraper(tmp_path, target_shops=["渋谷店"], history_file=tmp_path / "history.db",
+                               use_parse_cache=use_parse_cache, parse_workers=parse_workers)
+
+    # 解析キャッシュの有無や並列解析によらず、filter_shops=False では全店舗を返す
+    assert len(list(scraper.iter_sales(filter_shops=False))) == 8
+    assert [sale["shop"] for sale in scraper.iter_sales()] == ["渋谷店", "渋谷店"]
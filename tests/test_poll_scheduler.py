@@ -0,0 +1,153 @@
+"""適応スケジューラーの確認間隔を差し替えた時計で確認する
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from poll_scheduler import PollScheduler  # noqa: E402
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+class FakePoll:
+    """確認した日時を記録し、results の値を順に返す（使い切った場合は最後の値）"""
+
+    def __init__(self, clock, results=(False,)):
+        self.clock = clock
+        self.results = list(results)
+        self.polled_at = []
+
+    def __call__(self):
+        self.polled_at.append(self.clock())
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+def make_scheduler(start, results=(False,), upcoming_starts=None, daily_budget=1000):
+    clock = FakeClock(start)
+    poll = FakePoll(clock, results)
+    scheduler = PollScheduler(poll, upcoming_starts=upcoming_starts, clock=clock,
+                              min_interval=15 * MINUTE, max_interval=6 * HOUR, daily_budget=daily_budget)
+    return scheduler, clock, poll
+
+
+def run(scheduler, clock, until, max_sleep=60):
+    """until まで run_forever() と同じように tick() と待機（最長 max_sleep 秒）を繰り返す"""
+    while clock.now < until:
+        clock.advance(min(scheduler.tick(), max_sleep))
+
+
+def test_backoff_doubles_and_resets_on_change():
+    results = [False] * 7 + [True, False]
+    scheduler, clock, poll = make_scheduler(datetime.datetime(2026, 10, 1, 0, 0), results)
+
+    delays = [scheduler.tick()]
+    for _ in range(len(results) - 1):
+        clock.advance(delays[-1])
+        delays.append(scheduler.tick())
+
+    # 変わらなかった回数に応じて倍にし（最長6時間）、変わった場合は最短の間隔に戻す
+    assert [delay / MINUTE for delay in delays] == [30, 60, 120, 240, 360, 360, 360, 15, 30]
+    assert len(poll.polled_at) == len(results)
+
+
+def test_min_interval_inside_hot_window():
+    start_date = datetime.date(2026, 10, 20)
+    scheduler, clock, poll = make_scheduler(datetime.datetime(2026, 10, 19, 6, 0),
+                                            upcoming_starts=lambda: [start_date])
+
+    hot_start = datetime.datetime(2026, 10, 19, 18, 0)
+    hot_end = datetime.datetime(2026, 10, 20, 18, 0)
+    assert not scheduler.is_hot(hot_start - datetime.timedelta(seconds=1))
+    assert scheduler.is_hot(hot_start)
+    assert scheduler.is_hot(hot_end - datetime.timedelta(seconds=1))
+    assert not scheduler.is_hot(hot_end)
+
+    run(scheduler, clock, datetime.datetime(2026, 10, 21, 6, 0))
+
+    # 開始日の前日18時から開始日の18時までは最短の間隔で確認する
+    inside = [at for at in poll.polled_at if hot_start <= at < hot_end]
+    gaps = {(b - a).total_seconds() for a, b in zip(inside, inside[1:])}
+    assert gaps == {15 * MINUTE}
+    assert inside[0] - hot_start <= datetime.timedelta(minutes=15)
+    assert len(inside) >= 24 * 4 - 1
+
+    # 前後は変わらなかった回数に応じて間隔が空く
+    before = [at for at in poll.polled_at if at < hot_start]
+    after = [at for at in poll.polled_at if at >= hot_end]
+    assert len(before) < 10
+    assert (after[-1] - after[-2]).total_seconds() > 15 * MINUTE
+
+
+def test_enters_hot_window_while_waiting():
+    start_date = datetime.date(2026, 10, 20)
+    scheduler, clock, poll = make_scheduler(datetime.datetime(2026, 10, 19, 12, 0),
+                                            upcoming_starts=lambda: [start_date])
+    for _ in range(4):
+        clock.advance(scheduler.tick())
+    assert scheduler.next_poll_at > datetime.datetime(2026, 10, 19, 18, 15)
+
+    # 待機中に開始日の前後に入った場合は、次に確認する日時を決め直す
+    clock.now = datetime.datetime(2026, 10, 19, 18, 0)
+    assert scheduler.tick() == 15 * MINUTE
+
+
+def test_daily_budget_and_midnight_reset():
+    scheduler, clock, poll = make_scheduler(datetime.datetime(2026, 10, 1, 9, 0), results=(True,),
+                                            daily_budget=3)
+
+    # 次に確認する日時より前に呼び出しても、上限に達した後は確認しない
+    for _ in range(5):
+        scheduler.next_poll_at = None
+        scheduler.tick()
+        clock.advance(MINUTE)
+    assert len(poll.polled_at) == 3
+    assert scheduler.remaining_budget(clock.now) == 0
+    assert scheduler.next_poll_at == datetime.datetime(2026, 10, 2, 0, 0)
+
+    # 日付が変わると回数がリセットされ、0時に確認する
+    clock.now = datetime.datetime(2026, 10, 2, 0, 0)
+    scheduler.tick()
+    assert poll.polled_at[-1] == datetime.datetime(2026, 10, 2, 0, 0)
+    assert scheduler.remaining_budget(clock.now) == 2
+
+    # 残りの回数で日付が変わるまで確認できるように間隔を空け、1日の回数は上限を超えない
+    run(scheduler, clock, datetime.datetime(2026, 10, 5, 0, 0))
+    per_day = {}
+    for at in poll.polled_at:
+        per_day[at.date()] = per_day.get(at.date(), 0) + 1
+    assert per_day[datetime.date(2026, 10, 1)] == 3
+    assert all(0 < per_day[datetime.date(2026, 10, day)] <= 3 for day in (2, 3, 4))
+    assert all(datetime.datetime(2026, 10, day, 0, 0) in poll.polled_at for day in (2, 3, 4))
+
+
+def test_skipped_poll_does_not_consume_budget():
+    scheduler, clock, poll = make_scheduler(datetime.datetime(2026, 10, 1, 9, 0), results=(None,),
+                                            daily_budget=3)
+
+    for _ in range(5):
+        assert scheduler.tick() == 15 * MINUTE
+        clock.advance(15 * MINUTE)
+
+    # 確認しなかった場合は回数に数えず、変わらなかった回数も増やさない
+    assert len(poll.polled_at) == 5
+    assert scheduler.remaining_budget(clock.now) == 3
+    assert scheduler.unchanged_streak == 0
+    assert scheduler.last_poll_at is None
+    assert scheduler.metrics.snapshot()["polls_total"] == [{"labels": {"result": "skipped"}, "value": 5}]
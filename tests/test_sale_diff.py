@@ -0,0 +1,104 @@
+"""前回と今回のセール情報の比較（追加・変更・状態の変化・終了）を確認する
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from sale_diff import ADDED, CHANGED, ENDED, STATUS_CHANGED, diff_sales  # noqa: E402
+from sale_record import Sale  # noqa: E402
+
+
+def sale(shop, title, date, status="開催中", detail="", as_dict=False):
+    data = {"shop": shop, "status": status, "title": title, "date": date, "detail": detail}
+    return data if as_dict else Sale.from_dict(data)
+
+
+def kinds(changes):
+    return [(change.kind, change.shop, change.sale["title"]) for change in changes]
+
+
+@pytest.fixture(params=[False, True], ids=["sale", "dict"])
+def as_dict(request):
+    # 比較元（diff_baseline.json）は辞書で読み込むため、前回のセール情報は両方の形式で確認する
+    return request.param
+
+
+def test_unchanged(as_dict):
+    previous = [sale("E店", "コーヒーセール", "2026/10/01〜10/05", as_dict=as_dict)]
+    current = [sale("E店", "コーヒーセール", "2026/10/01〜10/05")]
+    assert diff_sales(previous, current) == []
+
+
+def test_added(as_dict):
+    previous = [sale("E店", "コーヒーセール", "2026/10/01〜10/05", as_dict=as_dict)]
+    current = [sale("E店", "コーヒーセール", "2026/10/01〜10/05"), sale("F店", "パスタセール", "2026/10/03〜10/06")]
+    assert kinds(diff_sales(previous, current)) == [(ADDED, "F店", "パスタセール")]
+
+
+def test_changed(as_dict):
+    previous = [sale("E店", "コーヒーセール", "2026/10/01〜10/05", detail="10%OFF", as_dict=as_dict)]
+    current = [sale("E店", "コーヒーセール", "2026/10/01〜10/07", detail="20%OFF")]
+    changes = diff_sales(previous, current)
+    assert kinds(changes) == [(CHANGED, "E店", "コーヒーセール")]
+    assert changes[0].changes == {"date": ("2026/10/01〜10/05", "2026/10/01〜10/07"), "detail": ("10%OFF", "20%OFF")}
+
+
+def test_title_changed_in_same_period(as_dict):
+    # タイトルが変わっても期間が重なる場合は同じセールの変更とする
+    previous = [sale("E店", "コーヒーセール", "2026/10/01〜10/05", as_dict=as_dict),
+                sale("E店", "紅茶セール", "2026/10/10〜10/12", as_dict=as_dict)]
+    current = [sale("E店", "コーヒー豆セール", "2026/10/01〜10/05"),
+               sale("E店", "紅茶セール", "2026/10/10〜10/12")]
+    changes = diff_sales(previous, current)
+    assert kinds(changes) == [(CHANGED, "E店", "コーヒー豆セール")]
+    assert changes[0].changes == {"title": ("コーヒーセール", "コーヒー豆セール")}
+
+
+def test_status_changed(as_dict):
+    previous = [sale("E店", "コーヒーセール", "2026/10/20〜10/25", status="予告", as_dict=as_dict)]
+    current = [sale("E店", "コーヒーセール", "2026/10/20〜10/25", status="開催中")]
+    changes = diff_sales(previous, current)
+    assert kinds(changes) == [(STATUS_CHANGED, "E店", "コーヒーセール")]
+    assert changes[0].changes == {"status": ("予告", "開催中")}
+
+
+def test_ended(as_dict):
+    previous = [sale("E店", "コーヒーセール", "2026/10/01〜10/05", as_dict=as_dict),
+                sale("F店", "パスタセール", "2026/10/03〜10/06", as_dict=as_dict)]
+    current = [sale("E店", "コーヒーセール", "2026/10/01〜10/05")]
+    changes = diff_sales(previous, current)
+    assert kinds(changes) == [(ENDED, "F店", "パスタセール")]
+    assert changes[0].previous is previous[1]
+
+
+def test_replaced(as_dict):
+    # 前のセールが終わって次のセールが掲載された場合は、変更ではなく終了と追加
+    previous = [sale("E店", "old sale", "10/01〜10/05", as_dict=as_dict)]
+    current = [sale("E店", "new sale", "10/20〜10/25", status="予告")]
+    assert kinds(diff_sales(previous, current)) == [(ADDED, "E店", "new sale"), (ENDED, "E店", "old sale")]
+
+
+def test_replaced_among_several(as_dict):
+    previous = [sale("E店", "コーヒーセール", "2026/10/01〜10/05", as_dict=as_dict),
+                sale("E店", "パスタセール", "2026/10/03〜10/06", as_dict=as_dict)]
+    current = [sale("E店", "お菓子セール", "2026/10/20〜10/25", status="予告"),
+               sale("E店", "コーヒーセール", "2026/10/01〜10/05"),
+               sale("E店", "パスタフェア", "2026/10/04〜10/08")]
+    changes = diff_sales(previous, current)
+    assert kinds(changes) == [
+        (ADDED, "E店", "お菓子セール"),
+        (CHANGED, "E店", "パスタフェア"),
+    ]
+    assert changes[1].previous["title"] == "パスタセール"
+
+
+def test_unknown_period_is_not_paired(as_dict):
+    previous = [sale("E店", "コーヒーセール", "", as_dict=as_dict)]
+    current = [sale("E店", "紅茶セール", "")]
+    assert kinds(diff_sales(previous, current)) == [(ADDED, "E店", "紅茶セール"), (ENDED, "E店", "コーヒーセール")]
@@ -0,0 +1,50 @@
+"""全文検索用の索引へのスナップショットの追加を確認する
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from scraper import KaldiSaleScraper  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def postings_count(scraper):
+    return scraper.sale_index.conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+
+
+def test_same_content_on_later_dates(tmp_path):
+    scraper = KaldiSaleScraper(tmp_path, target_shops=None, history_file=tmp_path / "history.db")
+    content = (FIXTURES_DIR / "kaldi_sale_basic.html").read_bytes()
+
+    scraper.snapshot_store.put(content, "20261015")
+    assert scraper.update_sale_index() == (1, 4)
+    postings = postings_count(scraper)
+
+    # 同じ内容のHTMLを別の日付で取得した場合は、最終掲載日だけを更新する
+    scraper.snapshot_store.put(content, "20261016")
+    scraper.snapshot_store.put(content, "20261017")
+    assert scraper.update_sale_index() == (2, 0)
+    assert postings_count(scraper) == postings
+    assert scraper.update_sale_index() == (0, 0)
+
+    results = scraper.search_sales("セール")
+    assert len(results) == 3
+    assert {(sale["first_seen"], sale["last_seen"]) for sale in results} == {("20261015", "20261017")}
+
+
+def test_status_follows_latest_date(tmp_path):
+    scraper = KaldiSaleScraper(tmp_path, target_shops=None, history_file=tmp_path / "history.db")
+    content = (FIXTURES_DIR / "kaldi_sale_basic.html").read_bytes()
+
+    scraper.snapshot_store.put(content, "20261015")
+    scraper.snapshot_store.put(content.replace("予告".encode(), "開催中".encode()), "20261016")
+    scraper.snapshot_store.put(content, "20261017")
+    scraper.update_sale_index()
+
+    [wine] = scraper.search_sales("ワイン")
+    assert (wine["status"], wine["last_seen"]) == ("予告", "20261017")
@@ -0,0 +1,45 @@
+"""スナップショットストアのマニフェストを複数のプロセスから更新した場合の動作を確認する
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from snapshot_store import SnapshotStore  # noqa: E402
+
+
+def put_many(root, worker, count):
+    store = SnapshotStore(root)
+    for i in range(count):
+        store.put(f"{worker}-{i}".encode(), f"2026101{worker}")
+
+
+def test_reload_changes_from_other_store(tmp_path):
+    server_store = SnapshotStore(tmp_path)
+    cli_store = SnapshotStore(tmp_path)
+
+    path, _ = cli_store.put(b"<html>cli</html>", "20261015")
+    assert server_store.find_by_date("20261015") == path
+
+    # 古いマニフェストで上書きして別のストアの取得履歴を消さない
+    server_store.put(b"<html>server</html>", "20261016")
+    manifest = SnapshotStore(tmp_path).manifest
+    assert sorted(manifest["dates"]) == ["20261015", "20261016"]
+    assert len(manifest["snapshots"]) == 2
+
+
+def test_concurrent_put(tmp_path):
+    processes = [multiprocessing.Process(target=put_many, args=(tmp_path, worker, 20)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    manifest = SnapshotStore(tmp_path).manifest
+    assert len(manifest["snapshots"]) == 60
+    assert sorted(len(entries) for entries in manifest["dates"].values()) == [20, 20, 20]
@@ -0,0 +1,57 @@
+"""購読設定による通知先ごとの振り分けをローカルのWebhookスタブサーバーで確認する
+
+実行例:
+    python -m pytest -q tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from sale_record import Sale  # noqa: E402
+from scraper import KaldiSaleScraper  # noqa: E402
+from subscriptions import Subscription, SubscriptionTable  # noqa: E402
+from stub_webhook import StubWebhookServer  # noqa: E402
+
+SALES = [
+    Sale(shop="池袋店", title="コーヒー豆10%OFF", date="2026/10/15〜10/20"),
+    Sale(shop="池袋店", title="パスタ20%OFF", date="2026/10/15〜10/20"),
+    Sale(shop="渋谷店", title="コーヒー豆セール", date="2026/10/15〜10/20"),
+    Sale(shop="新宿店", title="お菓子セール", date="2026/10/15〜10/20"),
+]
+
+
+@pytest.fixture
+def server():
+    server = StubWebhookServer(("127.0.0.1", 0), bucket_size=100).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def sent_titles(server):
+    text = "\n".join(server.messages)
+    return {sale.title: text.count(sale.title) for sale in SALES}
+
+
+def test_shared_webhook_url(server, tmp_path):
+    subscriptions = SubscriptionTable([
+        Subscription(server.url, shops=["池袋店"]),
+        Subscription(server.url, keywords=["コーヒー豆"]),
+    ])
+    assert subscriptions.webhook_urls == [server.url]
+
+    scraper = KaldiSaleScraper(tmp_path, history_file=tmp_path / "history.db", subscriptions=subscriptions)
+    assert scraper._send_messages(SALES, scraper.format_sale_message)
+
+    # 同じURLの通知先の振り分けをまとめ、両方が購読しているセール情報は1回だけ送信する
+    assert sent_titles(server) == {
+        "コーヒー豆10%OFF": 1,
+        "パスタ20%OFF": 1,
+        "コーヒー豆セール": 1,
+        "お菓子セール": 0,
+    }